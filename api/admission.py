@@ -0,0 +1,210 @@
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from src.utils.exceptions import RAGSystemError
+
+# Priority classes, most urgent first
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+
+class AdmissionRejected(RAGSystemError):
+    """Raised when a request is shed instead of queued"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self, priority: str, client_id: str, future: asyncio.Future, weight: int = 1):
+        self.priority = priority
+        self.client_id = client_id
+        self.future = future
+        self.weight = weight
+        self.enqueued_at = time.monotonic()
+
+
+class AdmissionController:
+    """Bounded, prioritized admission of requests to the LLM workflow.
+
+    At most max_concurrency slots are in use at once; a request takes as
+    many slots as its weight (a batch, one per worker). The rest wait in a single
+    queue of at most max_queue entries ordered by priority class, then
+    arrival. Each client may hold at most per_client_limit running or
+    queued requests. Before queueing, the wait is estimated from the
+    requests ahead and a moving average of service time per class, and a
+    request that could not start before its deadline is rejected right away
+    with a Retry-After hint; one whose deadline passes while queued is
+    dropped. Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        max_queue: int = 32,
+        per_client_limit: int = 4,
+        initial_service_seconds: float = 10.0,
+        smoothing: float = 0.2
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.per_client_limit = per_client_limit
+        self.smoothing = smoothing
+        self.logger = logging.getLogger(__name__)
+
+        self.running = 0
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._queued: Dict[str, int] = defaultdict(int)
+        self._queued_weight: Dict[str, int] = defaultdict(int)
+        self._seq = itertools.count()
+        self._per_client: Dict[str, int] = defaultdict(int)
+        self._service_seconds = {priority: initial_service_seconds for priority in PRIORITIES}
+
+        self.admitted: Dict[str, int] = defaultdict(int)
+        self.shed: Dict[str, int] = defaultdict(int)
+        self.queue_wait_seconds = 0.0
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        client_id: str,
+        priority: str = INTERACTIVE,
+        deadline: Optional[float] = None,
+        weight: int = 1
+    ) -> AsyncIterator[None]:
+        """Hold `weight` slots for the body of the block, waiting at most deadline seconds for them"""
+        weight = min(max(1, weight), self.max_concurrency)
+        await self._acquire(client_id, priority, deadline, weight)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record_service(priority, time.monotonic() - start)
+            self._release(client_id, weight)
+
+    def estimated_wait(self, priority: str = INTERACTIVE) -> float:
+        """Seconds a request of this class would queue if it arrived now"""
+        if self.running < self.max_concurrency and not self._queue:
+            return 0.0
+        rank = PRIORITIES.index(priority)
+        # Queued slot-seconds ahead of us plus, on average, half a request per busy slot
+        work = sum(self._queued_weight[p] * self._service_seconds[p] for p in PRIORITIES[:rank + 1])
+        work += self.running * self._mean_service() / 2
+        return work / self.max_concurrency
+
+    async def _acquire(self, client_id: str, priority: str, deadline: Optional[float], weight: int = 1) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+        if self._per_client.get(client_id, 0) >= self.per_client_limit:
+            self._reject(429, "client_quota", priority, self._service_seconds[priority])
+        if self.running + weight <= self.max_concurrency and not self._queue:
+            self._grant(client_id, priority, weight)
+            return
+        if len(self._queue) >= self.max_queue:
+            self._reject(503, "queue_full", priority, self.estimated_wait(priority))
+        wait = self.estimated_wait(priority)
+        if deadline is not None and wait > deadline:
+            self._reject(503, "deadline", priority, wait)
+
+        waiter = _Waiter(priority, client_id, asyncio.get_running_loop().create_future(), weight)
+        heapq.heappush(self._queue, (PRIORITIES.index(priority), next(self._seq), waiter))
+        self._queued[priority] += 1
+        self._queued_weight[priority] += weight
+        self._per_client[client_id] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=deadline)
+        except asyncio.TimeoutError:
+            if not waiter.future.done():
+                self._abandon(waiter)
+                self._reject(503, "expired", priority, self.estimated_wait(priority))
+            # Otherwise granted just as the deadline passed: run it
+        except asyncio.CancelledError:
+            if waiter.future.done():
+                self._release(client_id, weight)
+            else:
+                self._abandon(waiter)
+            raise
+
+    def _grant(self, client_id: str, priority: str, weight: int = 1) -> None:
+        self.running += weight
+        self.admitted[priority] += 1
+        self._per_client[client_id] += 1
+
+    def _release(self, client_id: str, weight: int = 1) -> None:
+        self.running -= weight
+        self._decrement_client(client_id)
+        self._drain()
+
+    def _drain(self) -> None:
+        """Grant queued waiters in order while the head fits in the free slots"""
+        while self._queue:
+            waiter = self._queue[0][2]
+            if not waiter.future.done() and self.running + waiter.weight > self.max_concurrency:
+                # Strict order: the head waits for enough free slots
+                break
+            heapq.heappop(self._queue)
+            self._queued[waiter.priority] -= 1
+            self._queued_weight[waiter.priority] -= waiter.weight
+            if waiter.future.done():
+                continue
+            self.running += waiter.weight
+            self.admitted[waiter.priority] += 1
+            self.queue_wait_seconds += time.monotonic() - waiter.enqueued_at
+            waiter.future.set_result(None)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Take a waiter that gave up out of the queue and let the ones behind it move up"""
+        waiter.future.cancel()
+        self._decrement_client(waiter.client_id)
+        for i, entry in enumerate(self._queue):
+            if entry[2] is waiter:
+                self._queue[i] = self._queue[-1]
+                self._queue.pop()
+                heapq.heapify(self._queue)
+                self._queued[waiter.priority] -= 1
+                self._queued_weight[waiter.priority] -= waiter.weight
+                break
+        self._drain()
+
+    def _decrement_client(self, client_id: str) -> None:
+        self._per_client[client_id] -= 1
+        if self._per_client[client_id] <= 0:
+            del self._per_client[client_id]
+
+    def _reject(self, status_code: int, reason: str, priority: str, retry_after: float) -> None:
+        self.shed[reason] += 1
+        self.logger.warning(f"Shedding {priority} request ({reason}), retry after {retry_after:.1f}s")
+        raise AdmissionRejected(status_code, reason, max(1.0, retry_after))
+
+    def _record_service(self, priority: str, seconds: float) -> None:
+        previous = self._service_seconds[priority]
+        self._service_seconds[priority] = (1 - self.smoothing) * previous + self.smoothing * seconds
+
+    def _mean_service(self) -> float:
+        return sum(self._service_seconds.values()) / len(self._service_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        admitted = sum(self.admitted.values())
+        return {
+            "running": self.running,
+            "max_concurrency": self.max_concurrency,
+            "queue_depth": len(self._queue),
+            "queued": {priority: self._queued[priority] for priority in PRIORITIES},
+            "max_queue": self.max_queue,
+            "admitted": {priority: self.admitted[priority] for priority in PRIORITIES},
+            "shed": dict(self.shed),
+            "shed_total": sum(self.shed.values()),
+            "service_seconds": {p: round(s, 3) for p, s in self._service_seconds.items()},
+            "estimated_wait_seconds": {p: round(self.estimated_wait(p), 3) for p in PRIORITIES},
+            "mean_queue_wait_seconds": self.queue_wait_seconds / admitted if admitted else 0.0,
+        }
@@ -1,10 +1,20 @@
-from fastapi import FastAPI, HTTPException
+import math
+import time
+import secrets
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
 import logging
 from config.settings import Settings
+from api.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected
+from src.core.metadata_filter import to_where
 from src.workflow.workflow_builder import RAGWorkflowBuilder
-from src.utils.logging_config import setup_logging
+from src.utils.document_utils import summarize_sources
+from src.utils.logging_config import logging_stats, setup_logging
+from src.utils.profiling import RequestProfiler
 
 # Setup logging
 logger = setup_logging("INFO")
@@ -27,75 +37,265 @@ app.add_middleware(
 
 # Global workflow app
 workflow_app = None
+batch_runner = None
+hybrid_retriever = None
+grounding_checker = None
+web_search_agent = None
+session_cache = None
+query_stats = None
+index_manager = None
+admin_token = None
+profile_dir = None
+admission = None
+deadlines = {INTERACTIVE: None, BATCH: None}
 
 class QuestionRequest(BaseModel):
     question: str
     max_tokens: int = 1000
+    # Metadata filters, e.g. {"source": "https://..."} or {"ingested_at": {"$gte": "2024-06-01"}}
+    filters: Optional[Dict[str, Any]] = None
+    # Longest acceptable wait for a free slot before the request is shed
+    deadline_seconds: Optional[float] = Field(None, gt=0)
+    # Write a CPU profile, span trace and memory report for this request
+    profile: bool = False
+    # Conversation id; follow-ups reuse documents graded for earlier questions
+    session_id: Optional[str] = Field(None, max_length=128)
 
 class QuestionResponse(BaseModel):
     question: str
     answer: str
     sources: list = []
+    profile: Optional[Dict[str, Any]] = None
+
+class BatchQuestionRequest(BaseModel):
+    questions: List[str] = Field(..., min_length=1)
+    max_concurrency: Optional[int] = Field(None, ge=1)
+    filters: Optional[Dict[str, Any]] = None
+    deadline_seconds: Optional[float] = Field(None, gt=0)
+
+class BatchQuestionResult(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    sources: list = []
+    error: Optional[str] = None
+    latency_seconds: float
+
+class BatchQuestionResponse(BaseModel):
+    results: List[BatchQuestionResult]
+    succeeded: int
+    failed: int
+    retrieval_seconds: float
+    total_seconds: float
+    questions_per_second: float
+
+def validate_filters(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Normalize request filters, rejecting malformed ones with a 400"""
+    try:
+        return to_where(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {e}")
+
+def client_id(http_request: Request, header_client_id: Optional[str]) -> str:
+    """Identity used for per-client quotas: X-Client-Id, else the peer address"""
+    if header_client_id:
+        return header_client_id
+    return http_request.client.host if http_request.client else "unknown"
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    """Shed requests get 429/503 with a Retry-After hint"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": f"Request rejected: {exc.reason}", "retry_after": exc.retry_after},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))}
+    )
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the RAG workflow on startup"""
-    global workflow_app
+    global workflow_app, batch_runner, hybrid_retriever, grounding_checker, web_search_agent, session_cache
+    global query_stats, index_manager, admin_token, admission, profile_dir
     try:
         logger.info("Initializing RAG workflow...")
         settings = Settings()
+        setup_logging(
+            settings.log_level,
+            json_format=settings.log_json,
+            use_queue=settings.log_queue,
+            sample_rate=settings.log_sample_rate
+        )
         workflow_builder = RAGWorkflowBuilder(settings)
         workflow_app = workflow_builder.build_workflow()
+        batch_runner = workflow_builder.build_batch_runner(workflow_app)
+        hybrid_retriever = workflow_builder.hybrid_retriever
+        grounding_checker = workflow_builder.grounding_checker
+        web_search_agent = workflow_builder.web_search_agent
+        session_cache = workflow_builder.session_cache
+        query_stats = workflow_builder.query_stats
+        index_manager = workflow_builder.index_manager
+        admin_token = settings.admin_token
+        profile_dir = settings.profile_dir
+        admission = AdmissionController(
+            max_concurrency=settings.admission_max_concurrency,
+            max_queue=settings.admission_max_queue,
+            per_client_limit=settings.admission_per_client
+        )
+        deadlines[INTERACTIVE] = settings.admission_interactive_deadline
+        deadlines[BATCH] = settings.admission_batch_deadline
+        if index_manager:
+            index_manager.start_watcher()
         logger.info("RAG workflow initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize workflow: {e}")
         raise
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background index watching"""
+    if index_manager:
+        index_manager.stop_watcher()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "message": "RAG system is running"}
 
+def run_workflow(inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """Stream the workflow to completion and return its final state"""
+    final_output = None
+    for output in workflow_app.stream(inputs, config=config):
+        for key, value in output.items():
+            final_output = value
+    return final_output
+
+def run_profiled_workflow(inputs: Dict[str, Any]):
+    """Run the workflow under the request profiler, returning (final state, profile summary)"""
+    name = f"ask-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 10**6:06d}"
+    with RequestProfiler(profile_dir, name) as profiler:
+        final_output = run_workflow(inputs, {"callbacks": profiler.callbacks})
+    return final_output, profiler.summary
+
 @app.post("/ask", response_model=QuestionResponse)
-async def ask_question(request: QuestionRequest):
+async def ask_question(
+    request: QuestionRequest,
+    http_request: Request,
+    x_client_id: Optional[str] = Header(None),
+    x_admin_token: Optional[str] = Header(None)
+):
     """Ask a question to the RAG system"""
     if not workflow_app:
         raise HTTPException(status_code=500, detail="Workflow not initialized")
+    filters = validate_filters(request.filters)
+    deadline = request.deadline_seconds or deadlines[INTERACTIVE]
+    if request.profile:
+        # Profiles are written to the server's disk
+        require_admin(x_admin_token)
     
-    try:
-        logger.info(f"Processing question: {request.question[:100]}...")
-        
-        inputs = {"question": request.question}
+    async with admission.admit(client_id(http_request, x_client_id), INTERACTIVE, deadline):
+        try:
+            logger.info("Processing question: %.100s...", request.question)
+            
+            inputs = {"question": request.question}
+            if filters:
+                inputs["filters"] = filters
+            if request.session_id:
+                inputs["session_id"] = request.session_id
+            
+            # Get the final output, off the event loop so queued requests stay responsive
+            profile = None
+            if request.profile:
+                final_output, profile = await run_in_threadpool(run_profiled_workflow, inputs)
+            else:
+                final_output = await run_in_threadpool(run_workflow, inputs)
+            
+            if not final_output or "generation" not in final_output:
+                raise HTTPException(status_code=500, detail="Failed to generate answer")
+            
+            # Extract sources if available
+            sources = []
+            if "documents" in final_output and final_output["documents"]:
+                sources = summarize_sources(final_output["documents"])  # Top 3 sources
+            
+            return QuestionResponse(
+                question=request.question,
+                answer=final_output["generation"],
+                sources=sources,
+                profile=profile
+            )
         
-        # Get the final output
-        final_output = None
-        for output in workflow_app.stream(inputs):
-            for key, value in output.items():
-                final_output = value
-        
-        if not final_output or "generation" not in final_output:
-            raise HTTPException(status_code=500, detail="Failed to generate answer")
-        
-        # Extract sources if available
-        sources = []
-        if "documents" in final_output and final_output["documents"]:
-            sources = [
-                {
-                    "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                    "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
-                }
-                for doc in final_output["documents"][:3]  # Top 3 sources
-            ]
+        except Exception as e:
+            logger.error(f"Error processing question: {e}")
+            raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
+
+@app.post("/ask/batch", response_model=BatchQuestionResponse)
+async def ask_batch(
+    request: BatchQuestionRequest,
+    http_request: Request,
+    x_client_id: Optional[str] = Header(None)
+):
+    """Answer many questions with shared, batched retrieval"""
+    if not batch_runner:
+        raise HTTPException(status_code=500, detail="Workflow not initialized")
+    filters = validate_filters(request.filters)
+    deadline = request.deadline_seconds or deadlines[BATCH]
+    
+    # A batch holds one admission slot per concurrent graph run
+    workers = min(batch_runner.workers(len(request.questions), request.max_concurrency), admission.max_concurrency)
+    async with admission.admit(client_id(http_request, x_client_id), BATCH, deadline, weight=workers):
+        try:
+            logger.info("Processing batch of %d questions...", len(request.questions))
+            result = await run_in_threadpool(
+                batch_runner.run, request.questions, workers, filters
+            )
+            return BatchQuestionResponse(**result)
         
-        return QuestionResponse(
-            question=request.question,
-            answer=final_output["generation"],
-            sources=sources
+        except Exception as e:
+            logger.error(f"Error processing batch: {e}")
+            raise HTTPException(status_code=500, detail=f"Error processing batch: {str(e)}")
+
+@app.get("/metrics")
+async def metrics():
+    """Retrieval and grading counters, e.g. rerank skip rate and LLM grader calls avoided"""
+    if not hybrid_retriever:
+        raise HTTPException(status_code=500, detail="Workflow not initialized")
+    return {
+        "rerank": hybrid_retriever.rerank_stats.snapshot(),
+        "grounding": grounding_checker.stats() if grounding_checker else None,
+        "web_search_cache": web_search_agent.cache.stats() if web_search_agent else None,
+        "sessions": session_cache.stats() if session_cache else None,
+        "query_context": query_stats.snapshot() if query_stats else None,
+        "index": index_manager.status() if index_manager else None,
+        "admission": admission.stats() if admission else None,
+        "logging": logging_stats()
+    }
+
+def require_admin(token: Optional[str]):
+    """Check the admin token; admin features are disabled when none is configured"""
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not secrets.compare_digest(token or "", admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def require_index_admin(token: Optional[str]):
+    """Check the admin token and that the index supports hot-swapping"""
+    require_admin(token)
+    if not index_manager:
+        raise HTTPException(
+            status_code=409,
+            detail="No published index generation; run scripts/setup_vectorstore.py"
         )
-    
-    except Exception as e:
-        logger.error(f"Error processing question: {e}")
-        raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
+
+@app.post("/admin/reload", status_code=202)
+async def reload_index(x_admin_token: Optional[str] = Header(None)):
+    """Load the newest published index generation in the background and swap it in"""
+    require_index_admin(x_admin_token)
+    return {**index_manager.reload(), "index": index_manager.status()}
+
+@app.get("/admin/index")
+async def index_status(x_admin_token: Optional[str] = Header(None)):
+    """Live index generation, requests still draining from old ones and the last reload"""
+    require_index_admin(x_admin_token)
+    return index_manager.status()
 
 @app.get("/")
 async def root():
@@ -104,5 +304,7 @@ async def root():
         "message": "Welcome to the RAG System API",
         "docs": "/docs",
         "health": "/health",
-        "ask_endpoint": "/ask"
+        "ask_endpoint": "/ask",
+        "batch_endpoint": "/ask/batch",
+        "metrics": "/metrics"
     }
@@ -1,5 +1,5 @@
 from pydantic import BaseSettings
-from typing import List
+from typing import List, Optional
 
 class Settings(BaseSettings):
     # API Keys
@@ -14,16 +14,95 @@ class Settings(BaseSettings):
     # Vector store settings
     chunk_size: int = 256
     chunk_overlap: int = 0
+    split_workers: int = 1  # >1 splits documents in a process pool
+    dedup_threshold: Optional[float] = None  # e.g. 0.85 drops near-duplicate chunks
+    dedup_num_perm: int = 128
     collection_name: str = "rag-chroma"
     
+    # Dense vector backend: "chroma", or "numpy" for the in-process
+    # memory-mapped index under index_path
+    vector_backend: str = "chroma"
+    dense_index_type: str = "flat"  # "flat" or "ivf"
+    dense_dtype: str = "float16"  # "float16" or "int8"
+    ivf_nlist: int = 0  # 0 picks sqrt(number of chunks)
+    ivf_nprobe: int = 8
+    
     # Hybrid search settings
     semantic_weight: float = 0.7
     keyword_weight: float = 0.3
-    rerank_top_k: int = 10
-    final_top_k: int = 5
+    retrieval_candidate_k: int = 4  # results taken from each of dense and keyword search
+    rerank_top_k: int = 10  # fused candidates passed to the reranker
+    final_top_k: int = 5  # reranked chunks given to the LLM
+    rerank_batch_size: int = 64
+    
+    # Reranking: "full" cross-encodes every candidate; "adaptive" only those
+    # within rerank_margin (fraction of the best fused score) of the final_k cut
+    rerank_mode: str = "full"
+    rerank_margin: float = 0.1
+    rerank_first_stage_model: Optional[str] = None  # e.g. "cross-encoder/ms-marco-TinyBERT-L-2-v2"
+    rerank_first_stage_keep: int = 8
+    rerank_audit_rate: float = 0.0  # fraction of queries also fully reranked to measure agreement
+    
+    # Grounding pre-check before the LLM hallucination grader (opt-in); sentences are
+    # supported above both *_high scores and unsupported below both *_low scores
+    grounding_precheck: bool = False
+    grounding_overlap_high: float = 0.6
+    grounding_overlap_low: float = 0.1
+    grounding_similarity_high: float = 0.85
+    grounding_similarity_low: float = 0.35
+    
+    # Web search settings
+    web_search_k: int = 3
+    web_search_cache_size: int = 256
+    web_search_cache_ttl: float = 3600.0  # seconds
+    web_search_timeout: float = 10.0  # seconds per search call
+    web_search_variants: int = 1  # query variants searched concurrently; each is a Tavily call
+    
+    # Session reuse: chunks graded relevant for an /ask session_id answer its
+    # follow-ups when at least session_min_documents cross-encoder scores reach session_min_score
+    session_max_sessions: int = 1024
+    session_ttl: float = 1800.0  # seconds of inactivity before a session is dropped
+    session_max_documents: int = 20
+    session_min_score: float = 0.0
+    session_min_documents: int = 2
+    
+    # Batch question settings
+    batch_max_concurrency: int = 4
+    
+    # Admission control: caps workflow runs in flight against the LLM and sheds
+    # requests that could not start before their deadline (seconds)
+    admission_max_concurrency: int = 4
+    admission_max_queue: int = 32
+    admission_per_client: int = 4
+    admission_interactive_deadline: float = 30.0
+    admission_batch_deadline: float = 300.0
+    
+    # Local corpus: when set, ingest files from this directory instead of crawling default_urls
+    local_corpus_path: Optional[str] = None
+    loader_workers: int = 4
+    
+    # Streaming ingestion settings
+    ingest_queue_size: int = 8
+    embed_batch_size: int = 64
+    ingest_checkpoint_sources: int = 100  # checkpoint after this many completed sources...
+    ingest_checkpoint_bytes: int = 64 * 2**20  # ...or this much chunk text, whichever comes first
+    
+    # Logging: log_queue moves formatting and writes off request threads;
+    # log_sample_rate keeps that fraction of per-request INFO/DEBUG lines
+    log_level: str = "INFO"
+    log_json: bool = False
+    log_queue: bool = True
+    log_sample_rate: float = 1.0
     
     # Paths
     vectorstore_path: str = "./data/vectorstore"
+    index_path: str = "./data/index"
+    profile_dir: str = "./logs/profiles"  # per-request profiles from /ask "profile" or main.py --profile
+    
+    # Index generations: setup_vectorstore.py publishes each build under index_path
+    index_keep_generations: int = 2
+    index_watch_interval: float = 0.0  # seconds between checks for a new generation; 0 disables
+    admin_token: Optional[str] = None  # required in X-Admin-Token for /admin endpoints when set
     
     # Default URLs
     default_urls: List[str] = [
@@ -1,17 +1,38 @@
-import os
+import argparse
 import warnings
-import logging
 from dotenv import load_dotenv
-from pprint import pprint
 from config.settings import Settings
 from src.workflow.workflow_builder import RAGWorkflowBuilder
+from src.workflow.eval_runner import EvaluationRunner, iter_question_records, question_id
 from src.utils.logging_config import setup_logging
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
 
+SAMPLE_QUESTIONS = [
+    "What is prompt engineering?",
+    "How to save LLM cost?",
+    "What are the types of agent memory?",
+    "When will the Euro of Football take place?"  # This should trigger web search
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run questions through the RAG workflow")
+    parser.add_argument("--questions", help="JSONL file of questions (default: built-in sample questions)")
+    parser.add_argument("--output", default="logs/eval_results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=1, help="number of questions run concurrently")
+    parser.add_argument("--question-field", default="question", help="JSON field holding the question text")
+    parser.add_argument("--id-field", default="id", help="JSON field holding a stable question id")
+    parser.add_argument("--fresh", action="store_true", help="overwrite the output instead of resuming")
+    parser.add_argument("--profile", action="store_true",
+                        help="write a CPU profile, span trace and memory report per question")
+    parser.add_argument("--profile-dir", help="directory for profiles (default: settings.profile_dir)")
+    return parser.parse_args()
+
 def main():
     """Main application entry point"""
+    args = parse_args()
+    
     # Load environment variables
     load_dotenv()
     
@@ -22,45 +43,44 @@ def main():
     try:
         # Load settings
         settings = Settings()
+        setup_logging(
+            settings.log_level,
+            json_format=settings.log_json,
+            use_queue=settings.log_queue,
+            sample_rate=settings.log_sample_rate
+        )
         
         # Build workflow
         workflow_builder = RAGWorkflowBuilder(settings)
         app = workflow_builder.build_workflow()
         
-        # Test the system
-        test_questions = [
-            "What is prompt engineering?",
-            "How to save LLM cost?",
-            "What are the types of agent memory?",
-            "When will the Euro of Football take place?"  # This should trigger web search
-        ]
+        if args.questions:
+            records = iter_question_records(args.questions, args.question_field, args.id_field)
+        else:
+            records = ({"id": question_id(q), "question": q} for q in SAMPLE_QUESTIONS)
+        
+        def print_result(result):
+            print(f"\nQuestion: {result['question']}")
+            print(f"Answer: {result['answer'] if not result['error'] else 'ERROR: ' + result['error']}\n")
+        
+        profile_dir = (args.profile_dir or settings.profile_dir) if args.profile else None
+        runner = EvaluationRunner(app, workers=args.workers, profile_dir=profile_dir)
+        summary = runner.run(records, args.output, resume=not args.fresh, on_result=print_result)
         
-        for question in test_questions:
-            logger.info(f"\n{'='*60}")
-            logger.info(f"Testing question: {question}")
-            logger.info(f"{'='*60}")
-            
-            inputs = {"question": question}
-            
-            try:
-                # Stream the workflow execution
-                final_output = None
-                for output in app.stream(inputs):
-                    for key, value in output.items():
-                        logger.info(f"Finished running: {key}")
-                        final_output = value
-                
-                if final_output and "generation" in final_output:
-                    logger.info(f"\nFinal Answer: {final_output['generation']}")
-                    print(f"\nQuestion: {question}")
-                    print(f"Answer: {final_output['generation']}\n")
-                
-            except Exception as e:
-                logger.error(f"Error processing question '{question}': {e}")
+        print(
+            f"Completed {summary['completed']} questions ({summary['errors']} errors, "
+            f"{summary['skipped']} already done) in {summary['total_seconds']:.1f}s, "
+            f"{summary['questions_per_second']:.2f} q/s"
+        )
+        print(
+            f"Latency p50={summary['latency_p50']:.2f}s p90={summary['latency_p90']:.2f}s "
+            f"p95={summary['latency_p95']:.2f}s p99={summary['latency_p99']:.2f}s"
+        )
+        print(f"Reranking: {workflow_builder.hybrid_retriever.rerank_stats.snapshot()}")
     
     except Exception as e:
         logger.error(f"Application startup failed: {e}")
         raise
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,104 @@
+import time
+import argparse
+import tempfile
+import numpy as np
+from config.settings import Settings
+from src.core.embeddings import EmbeddingManager
+from src.core.index_store import IndexStore
+from src.core.index_manager import resolve_index_dir
+from src.core.vector_index import DenseIndex, normalize
+from src.utils.logging_config import setup_logging
+
+VARIANTS = [
+    ("flat", "float16"),
+    ("flat", "int8"),
+    ("ivf", "float16"),
+    ("ivf", "int8"),
+]
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth neighbours by brute-force float32 cosine similarity"""
+    scores = normalize(queries) @ normalize(vectors).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall(found: list, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def latency_ms(timings: list) -> str:
+    p50, p95 = np.percentile(np.array(timings) * 1000, [50, 95])
+    return f"p50={p50:.2f}ms p95={p95:.2f}ms"
+
+
+def main():
+    """Compare recall and latency of the NumPy dense index against Chroma"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--queries", type=int, default=200, help="number of sampled chunk vectors used as queries")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    logger = setup_logging("INFO")
+    settings = Settings()
+    index_dir = resolve_index_dir(settings.index_path)
+    if index_dir is None:
+        raise SystemExit("No index found; run scripts/setup_vectorstore.py first")
+    store = IndexStore(index_dir)
+    if store.vectors is None:
+        raise SystemExit("Index has no stored vectors; rerun scripts/setup_vectorstore.py")
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(store), min(args.queries, len(store)), replace=False)
+    # Perturb sampled chunk vectors so queries are not exact duplicates of indexed rows
+    queries = np.asarray(store.vectors[sample], dtype=np.float32)
+    queries += rng.normal(scale=0.05 * np.abs(queries).mean(), size=queries.shape).astype(np.float32)
+    truth = exact_top_k(np.asarray(store.vectors), queries, args.k)
+    chunk_ids = [store.get_metadata(i).get("chunk_id") for i in range(len(store))]
+
+    print(f"{len(store)} chunks, {len(queries)} queries, k={args.k}")
+
+    # Chroma: one query per call, as HybridRetriever issues them today
+    embedding_manager = EmbeddingManager(persist_directory=settings.vectorstore_path)
+    chroma = embedding_manager.load_vectorstore(
+        store.manifest.get("collection_name", settings.collection_name)
+    )
+    id_to_row = {chunk_id: row for row, chunk_id in enumerate(chunk_ids)}
+    found, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        docs = chroma.similarity_search_by_vector(query.tolist(), k=args.k)
+        timings.append(time.perf_counter() - start)
+        found.append([id_to_row.get(doc.metadata.get("chunk_id"), -1) for doc in docs])
+    print(f"chroma          recall@{args.k}={recall(found, truth):.3f} {latency_ms(timings)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for index_type, dtype in VARIANTS:
+            index = DenseIndex.build(f"{tmp}/{index_type}-{dtype}", store.vectors, dtype=dtype, index_type=index_type)
+
+            timings = []
+            found = []
+            for query in queries:
+                start = time.perf_counter()
+                ids, _ = index.search(query, args.k, args.nprobe)
+                timings.append(time.perf_counter() - start)
+                found.append(ids[0].tolist())
+
+            batch_start = time.perf_counter()
+            for start in range(0, len(queries), args.batch_size):
+                index.search(queries[start:start + args.batch_size], args.k, args.nprobe)
+            batch_qps = len(queries) / (time.perf_counter() - batch_start)
+
+            print(
+                f"{index_type:<4} {dtype:<8}  recall@{args.k}={recall(found, truth):.3f} "
+                f"{latency_ms(timings)} batched={batch_qps:.0f} q/s"
+            )
+
+    logger.info("Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
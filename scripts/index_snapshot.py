@@ -0,0 +1,80 @@
+import os
+import time
+import argparse
+from config.settings import Settings
+from src.core.embeddings import EmbeddingManager
+from src.core.index_store import IndexStore
+from src.core.index_manager import (
+    new_generation_dir, prune_generations, publish_generation, resolve_index_dir
+)
+from src.core.snapshot import export_snapshot, import_snapshot, read_snapshot_info
+from src.utils.logging_config import setup_logging
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Export the index to a portable Parquet/Arrow snapshot, or bootstrap a node from one"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="write the live index to a snapshot file")
+    export.add_argument("--output", required=True, help="snapshot path; .arrow writes Arrow IPC, else Parquet")
+    export.add_argument("--index-dir", help="index to export (default: the live generation)")
+
+    load = commands.add_parser("import", help="load a snapshot as a new index generation")
+    load.add_argument("--input", required=True, help="snapshot file written by export")
+    load.add_argument("--no-publish", action="store_true", help="build the generation without making it live")
+    return parser.parse_args()
+
+def main():
+    """Export or import an index snapshot"""
+    args = parse_args()
+    logger = setup_logging("INFO")
+
+    try:
+        settings = Settings()
+        start = time.perf_counter()
+
+        if args.command == "export":
+            index_dir = args.index_dir or resolve_index_dir(settings.index_path)
+            if not index_dir:
+                raise SystemExit(f"No index under {settings.index_path}; run scripts/setup_vectorstore.py")
+            info = export_snapshot(IndexStore(index_dir), args.output)
+            logger.info(
+                f"Exported {info['num_chunks']} chunks from {index_dir} to {args.output} "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+            return
+
+        info = read_snapshot_info(args.input)
+        logger.info(f"Importing snapshot of {info['num_chunks']} {info['vector_dim']}-d chunks...")
+        index_dir = new_generation_dir(settings.index_path)
+
+        # Chroma gets the stored embeddings directly; the model is only loaded, never called
+        embedding_manager, collection_name = None, None
+        if settings.vector_backend == "chroma":
+            embedding_manager = EmbeddingManager(persist_directory=settings.vectorstore_path)
+            collection_name = f"{settings.collection_name}-{os.path.basename(index_dir)}"
+
+        import_snapshot(args.input, index_dir, embedding_manager, collection_name)
+        IndexStore(index_dir).build_dense_index(
+            dtype=settings.dense_dtype,
+            index_type=settings.dense_index_type,
+            nlist=settings.ivf_nlist
+        )
+        logger.info(f"Built index generation {index_dir} in {time.perf_counter() - start:.2f}s")
+
+        if not args.no_publish:
+            publish_generation(settings.index_path, index_dir)
+            logger.info(f"Published index generation {os.path.basename(index_dir)}")
+            drop_collection = embedding_manager.delete_vectorstore if embedding_manager else None
+            for removed in prune_generations(
+                settings.index_path, settings.index_keep_generations, drop_collection
+            ):
+                logger.info(f"Removed old index generation {removed}")
+
+    except Exception as e:
+        logger.error(f"Snapshot {args.command} failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
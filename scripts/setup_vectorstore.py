@@ -1,11 +1,33 @@
+import os
+import json
+import argparse
 import logging
 from config.settings import Settings
 from src.core.document_processor import DocumentProcessor
 from src.core.embeddings import EmbeddingManager
+from src.core.index_store import IndexStore, IndexStoreWriter
+from src.core.index_manager import new_generation_dir, prune_generations, publish_generation
+from src.core.ingestion_pipeline import IngestionPipeline
+from src.core.local_loader import LocalDirectoryLoader
+from src.utils.document_utils import assign_chunk_ids, stamp_ingested_at
 from src.utils.logging_config import setup_logging
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Initialize vector store with documents")
+    parser.add_argument(
+        "--pipeline", action="store_true",
+        help="stream sources through concurrent crawl/split/embed/upsert stages in constant memory"
+    )
+    parser.add_argument(
+        "--local-dir", help="ingest HTML/Markdown/PDF/text files from this directory instead of crawling URLs"
+    )
+    parser.add_argument("--checkpoint", help="checkpoint file for --pipeline (default: next to the index)")
+    parser.add_argument("--fresh", action="store_true", help="ignore an existing --pipeline checkpoint")
+    return parser.parse_args()
+
 def main():
     """Initialize vector store with documents"""
+    args = parse_args()
     logger = setup_logging("INFO")
     logger.info("Setting up vectorstore...")
     
@@ -16,30 +38,110 @@ def main():
         processor = DocumentProcessor(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
-            firecrawl_api_key=settings.firecrawl_api_key
+            firecrawl_api_key=settings.firecrawl_api_key,
+            split_workers=settings.split_workers,
+            dedup_threshold=settings.dedup_threshold,
+            dedup_num_perm=settings.dedup_num_perm
         )
         
         embedding_manager = EmbeddingManager(
             persist_directory=settings.vectorstore_path
         )
         
-        # Process documents
-        logger.info(f"Processing {len(settings.default_urls)} URLs...")
-        documents = processor.crawl_urls(settings.default_urls)
-        doc_splits = processor.split_documents(documents)
-        filtered_docs = processor.filter_metadata(doc_splits)
+        local_dir = args.local_dir or settings.local_corpus_path
         
-        # Create vectorstore
-        vectorstore = embedding_manager.create_vectorstore(
-            documents=filtered_docs,
-            collection_name=settings.collection_name
+        # Each build writes a new generation next to the live one; running API
+        # processes swap to it once it is published
+        checkpoint_path = args.checkpoint or os.path.join(settings.index_path, "ingest_checkpoint.json")
+        index_dir = resume_generation(checkpoint_path) if args.pipeline and not args.fresh else None
+        index_dir = index_dir or new_generation_dir(settings.index_path)
+        collection_name = f"{settings.collection_name}-{os.path.basename(index_dir)}"
+        logger.info(f"Building index generation {index_dir}")
+        
+        if args.pipeline:
+            if settings.dedup_threshold:
+                # Survivors are already indexed when a later duplicate arrives
+                logger.warning("DEDUP_THRESHOLD is ignored in --pipeline mode")
+            sources, load_sources = settings.default_urls, None
+            if local_dir:
+                loader = LocalDirectoryLoader(local_dir, workers=settings.loader_workers)
+                sources, load_sources = list(loader.iter_paths()), loader.iter_files
+            pipeline = IngestionPipeline(
+                processor=processor,
+                embedding_manager=embedding_manager,
+                index_dir=index_dir,
+                collection_name=collection_name,
+                checkpoint_path=checkpoint_path,
+                queue_size=settings.ingest_queue_size,
+                embed_batch_size=settings.embed_batch_size,
+                load_sources=load_sources,
+                checkpoint_sources=settings.ingest_checkpoint_sources,
+                checkpoint_bytes=settings.ingest_checkpoint_bytes
+            )
+            summary = pipeline.run(sources, resume=not args.fresh)
+            num_chunks = summary["chunks"]
+        else:
+            num_chunks = build_in_memory(
+                settings, processor, embedding_manager, logger, index_dir, collection_name, local_dir
+            )
+        
+        IndexStore(index_dir).build_dense_index(
+            dtype=settings.dense_dtype,
+            index_type=settings.dense_index_type,
+            nlist=settings.ivf_nlist
         )
+        publish_generation(settings.index_path, index_dir)
+        logger.info(f"Published index generation {os.path.basename(index_dir)}")
+        for removed in prune_generations(
+            settings.index_path, settings.index_keep_generations, embedding_manager.delete_vectorstore
+        ):
+            logger.info(f"Removed old index generation {removed}")
         
-        logger.info(f"Vectorstore setup complete with {len(filtered_docs)} documents")
+        logger.info(f"Vectorstore setup complete with {num_chunks} documents")
         
     except Exception as e:
         logger.error(f"Vectorstore setup failed: {e}")
         raise
 
+def resume_generation(checkpoint_path: str):
+    """Generation directory of an interrupted --pipeline run, if any"""
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path) as f:
+        return json.load(f).get("index_dir")
+
+def build_in_memory(
+    settings, processor, embedding_manager, logger, index_dir, collection_name, local_dir=None
+) -> int:
+    """Load, split and embed the whole corpus in memory, then write it out"""
+    # Process documents
+    if local_dir:
+        documents = processor.load_directory(local_dir, workers=settings.loader_workers)
+    else:
+        logger.info(f"Processing {len(settings.default_urls)} URLs...")
+        documents = processor.crawl_urls(settings.default_urls)
+    filtered_docs = processor.deduplicate(list(processor.iter_split_documents(documents)))
+    
+    # Embed once and share the vectors between Chroma and the index store
+    ids = assign_chunk_ids(filtered_docs)
+    stamp_ingested_at(filtered_docs)
+    vectors = embedding_manager.embed_documents(
+        [doc.page_content for doc in filtered_docs]
+    )
+    
+    # Create vectorstore
+    embedding_manager.create_vectorstore(
+        documents=filtered_docs,
+        collection_name=collection_name,
+        embeddings=vectors,
+        ids=ids
+    )
+    
+    # Write memory-mapped index shared by all API workers
+    index_writer = IndexStoreWriter(index_dir)
+    index_writer.add(filtered_docs, vectors)
+    index_writer.close({"collection_name": collection_name})
+    return len(filtered_docs)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
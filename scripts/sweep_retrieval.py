@@ -0,0 +1,286 @@
+import os
+import json
+import time
+import argparse
+import tempfile
+import itertools
+import tracemalloc
+from typing import Any, Dict, List
+import mmh3
+import numpy as np
+import tiktoken
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from src.core.document_processor import DocumentProcessor
+from src.core.index_store import IndexStore, IndexStoreWriter
+from src.core.keyword_index import tokenize
+from src.core.retriever import HybridRetriever
+from src.core.vector_index import NumpyVectorStore
+from src.utils.document_utils import assign_chunk_ids
+from src.utils.logging_config import setup_logging
+
+
+class HashingEmbeddings(Embeddings):
+    """Offline stand-in embedding: signed feature hashing of word unigrams and bigrams"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        words = tokenize(text)
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            h = mmh3.hash(feature)
+            vector[h % self.dim] += 1.0 if h >= 0 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+class LexicalReranker:
+    """Offline stand-in cross-encoder: fraction of query terms found in the passage"""
+
+    def predict(self, pairs: List[List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        scores = []
+        for query, passage in pairs:
+            terms, words = set(tokenize(query)), set(tokenize(passage))
+            scores.append(len(terms & words) / len(terms) if terms else 0.0)
+        return np.asarray(scores, dtype=np.float32)
+
+
+def parse_grid(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def load_questions(path: str) -> List[Dict[str, Any]]:
+    """Labelled questions, one JSON object per line.
+
+    Each has a "question" and at least one label: "sources" (file names or
+    URLs, matched as a suffix of the chunk's source) and/or "answers" (text
+    snippets, matched case-insensitively inside the chunk). Labels refer to
+    the corpus rather than to chunk ids, so they survive re-chunking.
+    """
+    questions = []
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            labels = [("source", s) for s in record.get("sources", [])]
+            labels += [("answer", a.lower()) for a in record.get("answers", [])]
+            if not labels:
+                raise SystemExit(f"Question without sources or answers: {record.get('question')}")
+            questions.append({"question": record["question"], "labels": labels})
+    return questions
+
+
+def found_labels(documents: List[Document], labels: List[tuple]) -> int:
+    found = 0
+    for kind, value in labels:
+        if kind == "source":
+            found += any(str(doc.metadata.get("source", "")).endswith(value) for doc in documents)
+        else:
+            found += any(value in doc.page_content.lower() for doc in documents)
+    return found
+
+
+def build_index(
+    documents: List[Document],
+    chunk_size: int,
+    chunk_overlap: int,
+    embeddings: Embeddings,
+    index_dir: str
+) -> Dict[str, Any]:
+    """Split, embed and index the corpus; returns the store and build cost"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = list(processor.iter_split_documents(documents))
+    assign_chunk_ids(chunks)
+    vectors = embeddings.embed_documents([doc.page_content for doc in chunks])
+    writer = IndexStoreWriter(index_dir)
+    writer.add(chunks, vectors)
+    writer.close()
+    store = IndexStore(index_dir)
+    store.build_dense_index()
+    build_seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    disk_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(index_dir) for name in names
+    )
+    return {
+        "store": store,
+        "chunks": len(chunks),
+        "build_seconds": build_seconds,
+        "peak_memory_mb": peak / 2**20,
+        "index_mb": disk_bytes / 2**20,
+    }
+
+
+def evaluate(
+    retriever: HybridRetriever,
+    questions: List[Dict[str, Any]],
+    top_k: int,
+    final_k: int,
+    encoding
+) -> Dict[str, Any]:
+    """Per-query retrieval and rerank latency, label recall and context size"""
+    retrieval, rerank, recalls, hits, context = [], [], [], [], []
+    for record in questions:
+        start = time.perf_counter()
+        candidates = retriever._hybrid_candidates([record["question"]], top_k)[0]
+        retrieved = time.perf_counter()
+        documents = retriever._rerank_documents(record["question"], candidates, final_k) if candidates else []
+        reranked = time.perf_counter()
+
+        found = found_labels(documents, record["labels"])
+        retrieval.append(retrieved - start)
+        rerank.append(reranked - retrieved)
+        recalls.append(found / len(record["labels"]))
+        hits.append(found > 0)
+        context.append(sum(len(encoding.encode(doc.page_content)) for doc in documents))
+
+    retrieval_ms, rerank_ms = np.array(retrieval) * 1000, np.array(rerank) * 1000
+    return {
+        "recall": float(np.mean(recalls)),
+        "hit_rate": float(np.mean(hits)),
+        "retrieval_p50_ms": float(np.percentile(retrieval_ms, 50)),
+        "rerank_p50_ms": float(np.percentile(rerank_ms, 50)),
+        "latency_p95_ms": float(np.percentile(retrieval_ms + rerank_ms, 95)),
+        "context_tokens": float(np.mean(context)),
+    }
+
+
+def pareto_front(rows: List[Dict[str, Any]]) -> None:
+    """Mark rows no other row beats on recall, p95 latency and context size at once"""
+    def dominates(a, b):
+        no_worse = (
+            a["recall"] >= b["recall"]
+            and a["latency_p95_ms"] <= b["latency_p95_ms"]
+            and a["context_tokens"] <= b["context_tokens"]
+        )
+        better = (
+            a["recall"] > b["recall"]
+            or a["latency_p95_ms"] < b["latency_p95_ms"]
+            or a["context_tokens"] < b["context_tokens"]
+        )
+        return no_worse and better
+
+    for row in rows:
+        row["pareto"] = not any(dominates(other, row) for other in rows if other is not row)
+
+
+def print_table(rows: List[Dict[str, Any]], show_all: bool) -> None:
+    columns = [
+        ("chunk", "chunk_size", "{:>5}"), ("ovl", "chunk_overlap", "{:>4}"),
+        ("cand", "candidate_k", "{:>4}"), ("top", "top_k", "{:>4}"), ("final", "final_k", "{:>5}"),
+        ("chunks", "chunks", "{:>7}"), ("build_s", "build_seconds", "{:>8.2f}"),
+        ("peak_MB", "peak_memory_mb", "{:>8.1f}"), ("index_MB", "index_mb", "{:>8.1f}"),
+        ("retr_ms", "retrieval_p50_ms", "{:>8.2f}"), ("rerank_ms", "rerank_p50_ms", "{:>9.2f}"),
+        ("p95_ms", "latency_p95_ms", "{:>8.2f}"), ("ctx_tok", "context_tokens", "{:>8.0f}"),
+        ("hit", "hit_rate", "{:>5.2f}"), ("recall", "recall", "{:>6.3f}"),
+    ]
+    print("  ".join(f"{title:>{len(fmt.format(0))}}" for title, _, fmt in columns))
+    for row in sorted(rows, key=lambda r: (-r["recall"], r["latency_p95_ms"], r["context_tokens"])):
+        if show_all or row["pareto"]:
+            line = "  ".join(fmt.format(row[key]) for _, key, fmt in columns)
+            print(f"{line}{'  *' if row['pareto'] else ''}")
+
+
+def main():
+    """Sweep chunking and retrieval depth over a local corpus and report the best trade-offs.
+
+    Needs the API's Python dependencies (the retriever imports
+    sentence_transformers even when the stand-in reranker is used) and
+    tiktoken's gpt2 encoding, which the text splitter and the context
+    token counts use. tiktoken downloads it on first use; to run without
+    network access, point TIKTOKEN_CACHE_DIR at a directory holding it.
+    """
+    parser = argparse.ArgumentParser(description=main.__doc__.split("\n")[0])
+    parser.add_argument("--corpus", required=True, help="directory of HTML/Markdown/PDF/text files")
+    parser.add_argument("--questions", required=True, help="JSONL of labelled questions (see load_questions)")
+    parser.add_argument("--chunk-sizes", default="128,256,512", help="comma-separated chunk sizes in tokens")
+    parser.add_argument("--overlaps", default="0,32", help="comma-separated chunk overlaps in tokens")
+    parser.add_argument("--candidate-k", default="4,8", help="results taken from each retriever before fusion")
+    parser.add_argument("--top-k", default="5,10,20", help="fused candidates sent to the reranker")
+    parser.add_argument("--final-k", default="3,5", help="reranked chunks passed to generation")
+    parser.add_argument(
+        "--models", choices=["standin", "local"], default="standin",
+        help="standin: hashing embeddings and a lexical reranker, no model downloads; "
+             "local: the GPT4All embeddings and cross-encoder the API uses"
+    )
+    parser.add_argument("--rerank-model", default="cross-encoder/ms-marco-MiniLM-L-6-v2")
+    parser.add_argument("--all", action="store_true", help="print every configuration, not only the Pareto front")
+    parser.add_argument("--output", help="write every result row to this JSONL file")
+    args = parser.parse_args()
+
+    setup_logging("WARNING")
+    questions = load_questions(args.questions)
+    documents = DocumentProcessor().load_directory(args.corpus)
+    if not documents or not questions:
+        raise SystemExit("Need at least one document and one question")
+
+    if args.models == "local":
+        from sentence_transformers import CrossEncoder
+        from src.core.embeddings import EmbeddingManager
+        embeddings, reranker = EmbeddingManager().embeddings, CrossEncoder(args.rerank_model)
+    else:
+        embeddings, reranker = HashingEmbeddings(), LexicalReranker()
+    # Same encoding the text splitter measures chunk sizes with
+    encoding = tiktoken.get_encoding("gpt2")
+
+    depths = [
+        (candidate_k, top_k, final_k)
+        for candidate_k, top_k, final_k in itertools.product(
+            parse_grid(args.candidate_k), parse_grid(args.top_k), parse_grid(args.final_k)
+        )
+        # Fusion returns at most 2 * candidate_k chunks, so deeper top_k only repeats a row
+        if final_k <= top_k <= 2 * candidate_k
+    ]
+    if not depths:
+        raise SystemExit("No depth in the grid satisfies final_k <= top_k <= 2 * candidate_k")
+    print(f"{len(documents)} documents, {len(questions)} questions, models={args.models}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for chunk_size, chunk_overlap in itertools.product(parse_grid(args.chunk_sizes), parse_grid(args.overlaps)):
+            if chunk_overlap >= chunk_size:
+                continue
+            build = build_index(
+                documents, chunk_size, chunk_overlap, embeddings, f"{tmp}/{chunk_size}-{chunk_overlap}"
+            )
+            store = build.pop("store")
+            vectorstore = NumpyVectorStore(store.dense_index, store, embeddings)
+
+            for candidate_k, top_k, final_k in depths:
+                retriever = HybridRetriever(
+                    vectorstore, index_store=store, reranker=reranker, candidate_k=candidate_k
+                )
+                row = {
+                    "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                    "candidate_k": candidate_k, "top_k": top_k, "final_k": final_k, **build,
+                }
+                row.update(evaluate(retriever, questions, top_k, final_k, encoding))
+                rows.append(row)
+
+    pareto_front(rows)
+    print_table(rows, args.all)
+    print("* Pareto-optimal: no other configuration has higher recall, lower p95 latency and less context")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        print(f"Wrote {len(rows)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -22,7 +22,7 @@ class RAGAgent:
     def generate_answer(self, question: str, documents: List[Document]) -> str:
         """Generate answer using RAG on retrieved documents"""
         try:
-            self.logger.info(f"Generating answer for question: {question[:100]}...")
+            self.logger.info("Generating answer for question: %.100s...", question)
             
             # Format documents for context
             context = format_docs(documents)
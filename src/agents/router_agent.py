@@ -19,12 +19,12 @@ class RouterAgent:
     def route_question(self, question: str) -> str:
         """Route question to appropriate datasource"""
         try:
-            self.logger.info(f"Routing question: {question[:100]}...")
+            self.logger.info("Routing question: %.100s...", question)
             
             result = self.router_chain.invoke({"question": question})
             datasource = result.get('datasource', 'vectorstore')
             
-            self.logger.info(f"Routed to: {datasource}")
+            self.logger.info("Routed to: %s", datasource)
             return datasource
             
         except Exception as e:
@@ -1,28 +1,139 @@
+import re
 import logging
-from typing import List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
 from langchain_community.tools.tavily_search import TavilySearchResults
 from langchain.docstore.document import Document
+from src.utils.cache import TTLCache
+
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on", "for",
+    "and", "or", "with", "what", "which", "who", "how", "why", "when", "where", "do",
+    "does", "did", "can", "could", "should", "would", "i", "you", "me", "my", "it", "about",
+}
+_NON_WORD = re.compile(r"[^\w\s-]")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lower-cased, punctuation dropped, whitespace collapsed"""
+    return " ".join(_NON_WORD.sub(" ", query.lower()).split())
+
+
+def keyword_variant(query: str) -> str:
+    """The query reduced to its content words"""
+    return " ".join(word for word in normalize_query(query).split() if word not in _STOPWORDS)
+
 
 class WebSearchAgent:
-    def __init__(self, tavily_api_key: str, k: int = 3):
-        self.web_search_tool = TavilySearchResults(api_key=tavily_api_key, k=k)
+    """Web search with a TTL/LRU result cache and concurrent query variants.
+
+    Any object with the TavilySearchResults interface, i.e.
+    `invoke({"query": ...})` returning a list of {"url", "content"} dicts,
+    can be passed as search_tool, so a local stub works without network access.
+    """
+
+    def __init__(
+        self,
+        tavily_api_key: Optional[str] = None,
+        k: int = 3,
+        search_tool: Any = None,
+        cache_size: int = 256,
+        cache_ttl: float = 3600.0,
+        timeout: float = 10.0,
+        max_variants: int = 1,
+        max_workers: int = 4
+    ):
+        self.web_search_tool = search_tool or TavilySearchResults(api_key=tavily_api_key, k=k)
+        self.cache = TTLCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        self.timeout = timeout
+        self.max_variants = max(1, max_variants)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="websearch")
+        # Identical searches already running, shared instead of re-issued
+        self._in_flight: Dict[str, Future] = {}
+        self._in_flight_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
-    
-    def search(self, query: str) -> Document:
-        """Perform web search and return results as a document"""
+
+    def search(self, query: str, variants: Optional[List[str]] = None) -> List[Document]:
+        """Search the query and its variants concurrently, returning one document per result URL"""
         try:
-            self.logger.info(f"Performing web search for: {query[:100]}...")
-            
-            # Perform web search
-            search_results = self.web_search_tool.invoke({"query": query})
-            
-            # Combine results into a single document
-            web_content = "\n".join([result["content"] for result in search_results])
-            web_document = Document(page_content=web_content)
-            
-            self.logger.info(f"Web search completed, found {len(search_results)} results")
-            return web_document
-            
+            self.logger.info("Performing web search for: %.100s...", query)
+            queries = self._variants(query, variants)
+
+            futures = {q: self._submit(q) for q in queries}
+            done, not_done = wait(futures.values(), timeout=self.timeout)
+            if not_done:
+                self.logger.warning("%d web searches timed out after %ss", len(not_done), self.timeout)
+                # Later identical queries start a fresh search rather than wait on a hung one
+                self._evict(futures, not_done)
+
+            documents, seen_urls = [], set()
+            for q, future in futures.items():
+                if future not in done or future.exception() is not None:
+                    if future in done:
+                        self.logger.error(f"Error in web search for '{q}': {future.exception()}")
+                    continue
+                for result in future.result():
+                    url = result.get("url")
+                    if not result.get("content") or (url and url in seen_urls):
+                        continue
+                    seen_urls.add(url)
+                    metadata = {"source": url or "web_search", "query": q}
+                    if result.get("title"):
+                        metadata["title"] = result["title"]
+                    documents.append(Document(page_content=result["content"], metadata=metadata))
+
+            self.logger.info("Web search completed, found %d results", len(documents))
+            return documents
+
         except Exception as e:
             self.logger.error(f"Error in web search: {e}")
-            return Document(page_content="Web search failed.")
+            return []
+
+    def _variants(self, query: str, variants: Optional[List[str]]) -> List[str]:
+        candidates = [query] + list(variants or []) + [keyword_variant(query)]
+        queries, keys = [], set()
+        for candidate in candidates:
+            key = normalize_query(candidate)
+            if key and key not in keys:
+                keys.add(key)
+                queries.append(candidate)
+        return queries[:self.max_variants]
+
+    def _submit(self, query: str) -> Future:
+        """Cached result, a search already in flight, or a new search"""
+        key = normalize_query(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        with self._in_flight_lock:
+            future = self._in_flight.get(key)
+            started = future is None
+            if started:
+                future = self._pool.submit(self._run, query)
+                self._in_flight[key] = future
+        if started:
+            # Cache results even when the caller has stopped waiting; registered
+            # outside the lock since it runs inline if the search already finished
+            future.add_done_callback(lambda f: self._finish(key, f))
+        return future
+
+    def _run(self, query: str) -> List[Dict[str, Any]]:
+        return list(self.web_search_tool.invoke({"query": query}) or [])
+
+    def _evict(self, futures: Dict[str, Future], timed_out) -> None:
+        with self._in_flight_lock:
+            for q, future in futures.items():
+                key = normalize_query(q)
+                if future in timed_out and self._in_flight.get(key) is future:
+                    del self._in_flight[key]
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._in_flight_lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
@@ -0,0 +1,206 @@
+import os
+import json
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from langchain.docstore.document import Document
+from src.core.keyword_index import map_array
+from src.core.metadata_filter import cache_key, where_mask
+
+COLUMNS_FILE = "columns.json"
+
+# Columns with more distinct values than this are stored row by row instead
+# of dictionary-encoded (e.g. chunk_id, which is unique per chunk)
+MAX_DICTIONARY_SIZE = 65536
+
+# Filter bitmaps kept per store, least recently used evicted first
+MAX_CACHED_FILTERS = 128
+
+
+class Column:
+    """One metadata key across all chunks.
+
+    "dict" columns hold each distinct value once plus an int32 code per row
+    (-1 when the row lacks the key); "plain" columns hold one encoded value
+    per row. Values are JSON-encoded so str/int/float/bool round-trip.
+    """
+
+    def __init__(self, name: str, kind: str, data: np.ndarray, offsets: np.ndarray, codes: Optional[np.ndarray] = None):
+        self.name = name
+        self.kind = kind
+        self.data = data
+        self.offsets = offsets
+        self.codes = codes
+        self._distinct: Optional[List[Any]] = None
+
+    def _decode(self, j: int) -> Any:
+        start, end = self.offsets[j], self.offsets[j + 1]
+        if start == end:
+            return None
+        return json.loads(bytes(self.data[start:end]))
+
+    def value(self, i: int) -> Any:
+        """Value of row i, or None if the row has no such key"""
+        if self.kind == "dict":
+            code = self.codes[i]
+            return None if code < 0 else self._decode(int(code))
+        return self._decode(i)
+
+    def distinct(self) -> List[Any]:
+        """Distinct values of a dictionary column, decoded once and cached"""
+        if self._distinct is None:
+            self._distinct = [self._decode(j) for j in range(len(self.offsets) - 1)]
+        return self._distinct
+
+    def mask(self, predicate: Callable[[Any], bool]) -> np.ndarray:
+        """Boolean row mask of rows whose value satisfies the predicate"""
+        if self.kind == "dict":
+            allowed = np.array([predicate(v) for v in self.distinct()] + [False], dtype=bool)
+            # Code -1 (missing) indexes the trailing False
+            return allowed[self.codes]
+        return np.fromiter((predicate(self._decode(i)) for i in range(len(self.offsets) - 1)), dtype=bool)
+
+
+class ChunkStore:
+    """All chunk texts in one contiguous UTF-8 buffer plus columnar metadata.
+
+    Replaces a list of LangChain Documents: per-chunk cost is an offset and
+    one code per metadata column, and Documents are only materialized for
+    the chunks actually returned by a search.
+    """
+
+    def __init__(self, texts: np.ndarray, text_offsets: np.ndarray, columns: Dict[str, Column]):
+        self.texts = texts
+        self.text_offsets = text_offsets
+        self.columns = columns
+        self.num_chunks = len(text_offsets) - 1
+        self._masks: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._masks_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self.num_chunks
+
+    @classmethod
+    def open(cls, index_dir: str) -> "ChunkStore":
+        """Memory-map a chunk store written into an index directory"""
+        with open(os.path.join(index_dir, COLUMNS_FILE)) as f:
+            specs = json.load(f)["columns"]
+        columns = {}
+        for spec in specs:
+            prefix = os.path.join(index_dir, spec["file"])
+            columns[spec["name"]] = Column(
+                spec["name"],
+                spec["kind"],
+                map_array(prefix + ".data.bin", np.uint8),
+                np.load(prefix + ".offsets.npy", mmap_mode="r"),
+                np.load(prefix + ".codes.npy", mmap_mode="r") if spec["kind"] == "dict" else None,
+            )
+        return cls(
+            map_array(os.path.join(index_dir, "texts.bin"), np.uint8),
+            map_array(os.path.join(index_dir, "text_offsets.bin"), np.int64),
+            columns,
+        )
+
+    def get_text(self, i: int) -> str:
+        start, end = self.text_offsets[i], self.text_offsets[i + 1]
+        return bytes(self.texts[start:end]).decode("utf-8")
+
+    def get_metadata(self, i: int) -> Dict[str, Any]:
+        metadata = {}
+        for name, column in self.columns.items():
+            value = column.value(i)
+            if value is not None:
+                metadata[name] = value
+        return metadata
+
+    def get_document(self, i: int) -> Document:
+        """Materialize one chunk as a LangChain Document"""
+        return Document(page_content=self.get_text(i), metadata=self.get_metadata(i))
+
+    def filter_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        """Boolean bitmap of the chunks matching a normalized `where` clause, cached per clause"""
+        key = cache_key(where)
+        with self._masks_lock:
+            if key in self._masks:
+                self._masks.move_to_end(key)
+                return self._masks[key]
+        mask = where_mask(self.columns, self.num_chunks, where)
+        with self._masks_lock:
+            self._masks[key] = mask
+            if len(self._masks) > MAX_CACHED_FILTERS:
+                self._masks.popitem(last=False)
+        return mask
+
+    def iter_texts(self) -> Iterator[str]:
+        for i in range(self.num_chunks):
+            yield self.get_text(i)
+
+
+def write_columns(index_dir: str, metadatas: Callable[[], Iterable[Dict[str, Any]]], num_rows: int) -> None:
+    """Write metadata columns from two streaming passes over the row metadata.
+
+    The first pass finds each key's distinct values (capped at
+    MAX_DICTIONARY_SIZE) to choose its encoding; the second writes the columns.
+    """
+    distinct: Dict[str, Optional[set]] = {}
+    for metadata in metadatas():
+        for key, value in metadata.items():
+            values = distinct.setdefault(key, set())
+            if values is not None:
+                values.add(_encode(value))
+                if len(values) > MAX_DICTIONARY_SIZE:
+                    distinct[key] = None
+
+    writers = {}
+    for n, (key, values) in enumerate(distinct.items()):
+        prefix = os.path.join(index_dir, f"col{n}")
+        writers[key] = _ColumnWriter(key, prefix, sorted(values) if values is not None else None, num_rows)
+
+    for row, metadata in enumerate(metadatas()):
+        for key, writer in writers.items():
+            value = metadata.get(key)
+            writer.add(row, None if value is None else _encode(value))
+
+    specs = []
+    for n, writer in enumerate(writers.values()):
+        writer.close()
+        specs.append({"name": writer.name, "kind": writer.kind, "file": f"col{n}"})
+    with open(os.path.join(index_dir, COLUMNS_FILE), "w") as f:
+        json.dump({"columns": specs}, f, indent=2)
+
+
+class _ColumnWriter:
+    def __init__(self, name: str, prefix: str, dictionary: Optional[List[bytes]], num_rows: int):
+        self.name = name
+        self.prefix = prefix
+        self.kind = "dict" if dictionary is not None else "plain"
+        self._data = open(prefix + ".data.bin", "wb")
+        self._offsets = array("q", [0])
+        if dictionary is not None:
+            self._lookup = {value: code for code, value in enumerate(dictionary)}
+            self._codes = np.full(num_rows, -1, dtype=np.int32)
+            for value in dictionary:
+                self._append(value)
+
+    def _append(self, encoded: bytes) -> None:
+        self._data.write(encoded)
+        self._offsets.append(self._offsets[-1] + len(encoded))
+
+    def add(self, row: int, encoded: Optional[bytes]) -> None:
+        if self.kind == "dict":
+            if encoded is not None:
+                self._codes[row] = self._lookup[encoded]
+        else:
+            self._append(encoded or b"")
+
+    def close(self) -> None:
+        self._data.close()
+        np.save(self.prefix + ".offsets.npy", np.frombuffer(self._offsets, dtype=np.int64))
+        if self.kind == "dict":
+            np.save(self.prefix + ".codes.npy", self._codes)
+
+
+def _encode(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
@@ -0,0 +1,138 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+import mmh3
+import numpy as np
+from langchain.docstore.document import Document
+
+# Same universal hashing scheme as datasketch's MinHash
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Provenance kept on a surviving chunk is capped so boilerplate repeated on
+# every page does not blow up its metadata
+MAX_PROVENANCE_SOURCES = 10
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """Pick (bands, rows) whose LSH S-curve crosses just below the threshold.
+
+    Erring low favours recall; candidates are verified against the threshold
+    with their full signatures anyway.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        crossover = (1.0 / bands) ** (1.0 / rows)
+        if crossover <= threshold and (best is None or crossover > best[0]):
+            best = (crossover, bands, rows)
+    if best is None:
+        return num_perm, 1
+    return best[1], best[2]
+
+
+class MinHashDeduplicator:
+    """Drop chunks whose word-shingle Jaccard similarity to an earlier chunk
+    reaches the threshold, using MinHash signatures and banded LSH.
+
+    Chunks are compared only against earlier kept chunks, so the first
+    occurrence survives and records where its duplicates came from.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        shingle_size: int = 5,
+        seed: int = 1
+    ):
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.logger = logging.getLogger(__name__)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """32-bit hashes of the text's overlapping lower-cased word n-grams"""
+        tokens = text.lower().split()
+        n = self.shingle_size
+        if len(tokens) <= n:
+            grams = [" ".join(tokens)]
+        else:
+            grams = [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+        return np.fromiter((mmh3.hash(gram, signed=False) for gram in grams), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self.shingles(text)
+        # Overflow wraps in uint64, as in datasketch
+        with np.errstate(over="ignore"):
+            permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return np.bitwise_and(permuted, _MAX_HASH).min(axis=1)
+
+    def deduplicate(self, documents: List[Document]) -> Tuple[List[Document], Dict[str, Any]]:
+        """Return the surviving documents and statistics on what was removed.
+
+        Each survivor that absorbed duplicates gets a "duplicate_count" and a
+        newline-separated "duplicate_sources" metadata entry.
+        """
+        buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        signatures: List[np.ndarray] = []
+        kept: List[Document] = []
+        removed_bytes = 0
+
+        for doc in documents:
+            signature = self.signature(doc.page_content)
+            keys = [
+                (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+                for band in range(self.bands)
+            ]
+
+            original = self._find_original(signature, keys, buckets, signatures)
+            if original is None:
+                for key in keys:
+                    buckets[key].append(len(kept))
+                signatures.append(signature)
+                kept.append(doc)
+                continue
+
+            removed_bytes += len(doc.page_content.encode("utf-8"))
+            self._record_provenance(kept[original], doc)
+
+        stats = {
+            "chunks_in": len(documents),
+            "chunks_out": len(kept),
+            "chunks_removed": len(documents) - len(kept),
+            "bytes_saved": removed_bytes,
+        }
+        return kept, stats
+
+    def _find_original(self, signature, keys, buckets, signatures):
+        checked = set()
+        for key in keys:
+            for candidate in buckets.get(key, ()):
+                if candidate in checked:
+                    continue
+                checked.add(candidate)
+                if np.mean(signatures[candidate] == signature) >= self.threshold:
+                    return candidate
+        return None
+
+    @staticmethod
+    def _record_provenance(original: Document, duplicate: Document) -> None:
+        metadata = original.metadata
+        metadata["duplicate_count"] = metadata.get("duplicate_count", 0) + 1
+        source = duplicate.metadata.get("source")
+        if not source or source == metadata.get("source"):
+            return
+        sources = metadata["duplicate_sources"].split("\n") if metadata.get("duplicate_sources") else []
+        if source not in sources and len(sources) < MAX_PROVENANCE_SOURCES:
+            sources.append(source)
+            metadata["duplicate_sources"] = "\n".join(sources)
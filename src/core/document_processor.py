@@ -1,20 +1,59 @@
 import logging
-from typing import List
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.document_loaders import FireCrawlLoader
 from langchain.docstore.document import Document
-from src.utils.document_utils import filter_complex_metadata
+from src.utils.document_utils import clean_metadata, filter_complex_metadata
+from src.core.local_loader import LocalDirectoryLoader
+from src.core.deduplication import MinHashDeduplicator
 from src.utils.exceptions import DocumentProcessingError
 
+# Text splitter of each worker process in the parallel splitting pool
+_worker_splitter = None
+
+def _init_split_worker(chunk_size: int, chunk_overlap: int):
+    global _worker_splitter
+    _worker_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+
+def _split_batch(batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Split and clean a batch of (text, metadata) pairs inside a worker process"""
+    chunks = []
+    for text, metadata in batch:
+        metadata = clean_metadata(metadata)
+        for chunk in _worker_splitter.split_text(text):
+            chunks.append((chunk, dict(metadata)))
+    return chunks
+
 class DocumentProcessor:
-    def __init__(self, chunk_size: int = 256, chunk_overlap: int = 0, firecrawl_api_key: str = None):
+    def __init__(
+        self, 
+        chunk_size: int = 256, 
+        chunk_overlap: int = 0, 
+        firecrawl_api_key: str = None,
+        split_workers: int = 1,
+        split_batch_size: int = 16,
+        dedup_threshold: Optional[float] = None,
+        dedup_num_perm: int = 128
+    ):
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.firecrawl_api_key = firecrawl_api_key
+        self.split_workers = split_workers
+        self.split_batch_size = split_batch_size
         self.text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
             chunk_size=chunk_size, 
             chunk_overlap=chunk_overlap
         )
+        # Near-duplicate removal is off unless a similarity threshold is given
+        self.deduplicator = (
+            MinHashDeduplicator(threshold=dedup_threshold, num_perm=dedup_num_perm)
+            if dedup_threshold else None
+        )
         self.logger = logging.getLogger(__name__)
     
     def crawl_urls(self, urls: List[str]) -> List[Document]:
@@ -38,6 +77,17 @@ class DocumentProcessor:
             self.logger.error(f"Error crawling URLs: {e}")
             raise DocumentProcessingError(f"Failed to crawl URLs: {e}")
     
+    def load_directory(self, path: str, workers: int = 4) -> List[Document]:
+        """Load HTML, Markdown, PDF and text files under a local directory"""
+        try:
+            self.logger.info(f"Loading local files from {path}...")
+            docs = LocalDirectoryLoader(path, workers=workers).load()
+            self.logger.info(f"Successfully loaded {len(docs)} documents")
+            return docs
+        except Exception as e:
+            self.logger.error(f"Error loading directory: {e}")
+            raise DocumentProcessingError(f"Failed to load directory {path}: {e}")
+    
     def split_documents(self, documents: List[Document]) -> List[Document]:
         """Split documents into chunks"""
         try:
@@ -49,6 +99,75 @@ class DocumentProcessor:
             self.logger.error(f"Error splitting documents: {e}")
             raise DocumentProcessingError(f"Failed to split documents: {e}")
     
+    def deduplicate(self, documents: List[Document]) -> List[Document]:
+        """Drop near-duplicate chunks, keeping the first occurrence of each"""
+        if self.deduplicator is None:
+            return documents
+        try:
+            self.logger.info(f"Deduplicating {len(documents)} chunks...")
+            kept, stats = self.deduplicator.deduplicate(documents)
+            self.logger.info(
+                f"Removed {stats['chunks_removed']} near-duplicate chunks "
+                f"({stats['bytes_saved'] / 1e6:.2f} MB), {stats['chunks_out']} remain"
+            )
+            return kept
+        except Exception as e:
+            self.logger.error(f"Error deduplicating documents: {e}")
+            raise DocumentProcessingError(f"Failed to deduplicate documents: {e}")
+    
+    def iter_split_documents(
+        self, 
+        documents: Iterable[Document], 
+        workers: Optional[int] = None
+    ) -> Iterator[Document]:
+        """Split documents into metadata-filtered chunks, yielded as they are produced.
+        
+        Equivalent to split_documents followed by filter_metadata, but in a
+        single pass and without holding the corpus or its chunks in memory.
+        With more than one worker, batches of documents are split in a process
+        pool; output order always follows input order.
+        """
+        workers = workers or self.split_workers
+        try:
+            if workers <= 1:
+                for doc in documents:
+                    for chunk in self.text_splitter.split_text(doc.page_content):
+                        yield Document(page_content=chunk, metadata=clean_metadata(doc.metadata))
+                return
+            
+            self.logger.info(f"Splitting documents with {workers} worker processes...")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_split_worker,
+                initargs=(self.chunk_size, self.chunk_overlap)
+            ) as pool:
+                pending = deque()
+                for batch in self._batches(documents):
+                    # Keep a bounded window of batches in flight
+                    if len(pending) >= workers * 2:
+                        yield from self._to_documents(pending.popleft().result())
+                    pending.append(pool.submit(_split_batch, batch))
+                while pending:
+                    yield from self._to_documents(pending.popleft().result())
+        except Exception as e:
+            self.logger.error(f"Error splitting documents: {e}")
+            raise DocumentProcessingError(f"Failed to split documents: {e}")
+    
+    def _batches(self, documents: Iterable[Document]) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+        batch = []
+        for doc in documents:
+            batch.append((doc.page_content, doc.metadata))
+            if len(batch) >= self.split_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def _to_documents(chunks: List[Tuple[str, Dict[str, Any]]]) -> Iterator[Document]:
+        for text, metadata in chunks:
+            yield Document(page_content=text, metadata=metadata)
+    
     def filter_metadata(self, documents: List[Document]) -> List[Document]:
         """Clean document metadata"""
         try:
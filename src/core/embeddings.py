@@ -1,8 +1,10 @@
 import logging
-from typing import List
+from typing import Any, Dict, List, Optional
 from langchain.docstore.document import Document
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import GPT4AllEmbeddings
+from langchain_core.vectorstores import VectorStore
+from src.core.vector_index import NumpyVectorStore
 from src.utils.exceptions import EmbeddingError
 
 class EmbeddingManager:
@@ -12,21 +14,39 @@ class EmbeddingManager:
         self.embeddings = GPT4AllEmbeddings()
         self.logger = logging.getLogger(__name__)
     
+    def embed_documents(self, texts: List[str], batch_size: int = 256) -> List[List[float]]:
+        """Embed texts in batches"""
+        try:
+            vectors = []
+            for start in range(0, len(texts), batch_size):
+                vectors.extend(self.embeddings.embed_documents(texts[start:start + batch_size]))
+            return vectors
+        except Exception as e:
+            self.logger.error(f"Error embedding documents: {e}")
+            raise EmbeddingError(f"Failed to embed documents: {e}")
+    
     def create_vectorstore(
         self, 
         documents: List[Document], 
-        collection_name: str = "rag-chroma"
+        collection_name: str = "rag-chroma",
+        embeddings: Optional[List[List[float]]] = None,
+        ids: Optional[List[str]] = None
     ) -> Chroma:
-        """Create and populate vector store"""
+        """Create and populate vector store, reusing precomputed embeddings if given"""
         try:
             self.logger.info(f"Creating vectorstore with {len(documents)} documents...")
             
-            vectorstore = Chroma.from_documents(
-                documents=documents,
-                collection_name=collection_name,
-                embedding=self.embeddings,
-                persist_directory=self.persist_directory
-            )
+            if embeddings is None:
+                vectorstore = Chroma.from_documents(
+                    documents=documents,
+                    collection_name=collection_name,
+                    embedding=self.embeddings,
+                    persist_directory=self.persist_directory,
+                    ids=ids
+                )
+            else:
+                vectorstore = self.load_vectorstore(collection_name)
+                self.upsert(vectorstore, documents, embeddings, ids)
             
             self.logger.info("Vectorstore created successfully")
             return vectorstore
@@ -52,3 +72,85 @@ class EmbeddingManager:
         except Exception as e:
             self.logger.error(f"Error loading vectorstore: {e}")
             raise EmbeddingError(f"Failed to load vectorstore: {e}")
+    
+    def delete_vectorstore(self, collection_name: str):
+        """Drop a persisted collection, e.g. one paired with a pruned index generation"""
+        try:
+            Chroma(
+                collection_name=collection_name,
+                embedding_function=self.embeddings,
+                persist_directory=self.persist_directory
+            ).delete_collection()
+        except Exception as e:
+            self.logger.warning(f"Could not delete collection {collection_name}: {e}")
+    
+    def load_vector_backend(
+        self,
+        backend: str = "chroma",
+        collection_name: str = "rag-chroma",
+        index_store=None,
+        nprobe: int = 8
+    ) -> VectorStore:
+        """Load the configured dense backend: Chroma or the in-process NumPy index"""
+        if backend == "chroma":
+            return self.load_vectorstore(collection_name)
+        if backend == "numpy":
+            if index_store is None or index_store.dense_index is None:
+                raise EmbeddingError("NumPy backend requires an index built by setup_vectorstore.py")
+            self.logger.info(f"Using in-process dense index ({index_store.dense_index.config})")
+            return NumpyVectorStore(index_store.dense_index, index_store, self.embeddings, nprobe=nprobe)
+        raise EmbeddingError(f"Unknown vector backend: {backend}")
+    
+    def upsert(
+        self,
+        vectorstore: Chroma,
+        documents: List[Document],
+        embeddings: List[List[float]],
+        ids: List[str],
+        batch_size: int = 1000
+    ):
+        """Upsert documents with precomputed embeddings, skipping the embedding model"""
+        try:
+            for start in range(0, len(documents), batch_size):
+                batch = documents[start:start + batch_size]
+                vectorstore._collection.upsert(
+                    ids=ids[start:start + batch_size],
+                    embeddings=[list(map(float, v)) for v in embeddings[start:start + batch_size]],
+                    documents=[doc.page_content for doc in batch],
+                    metadatas=[doc.metadata or None for doc in batch]
+                )
+        except Exception as e:
+            self.logger.error(f"Error upserting into vectorstore: {e}")
+            raise EmbeddingError(f"Failed to upsert into vectorstore: {e}")
+
+def similarity_search_by_vectors(
+    vectorstore: VectorStore,
+    query_vectors: List[List[float]],
+    k: int = 4,
+    where: Optional[Dict[str, Any]] = None
+) -> List[List[Document]]:
+    """Dense search for many query vectors, in one backend call where the backend allows it.
+
+    LangChain's Chroma wrapper takes one vector per call, so this is the one
+    search that queries Chroma's collection directly. Other vector stores go
+    through their public API one vector at a time.
+    """
+    if isinstance(vectorstore, NumpyVectorStore):
+        results = vectorstore.similarity_search_with_score_by_vectors(query_vectors, k, filter=where)
+        return [[doc for doc, _ in hits] for hits in results]
+    if not isinstance(vectorstore, Chroma):
+        return [vectorstore.similarity_search_by_vector(vector, k=k, filter=where) for vector in query_vectors]
+    try:
+        # Chroma evaluates `where` in its own index
+        results = vectorstore._collection.query(
+            query_embeddings=query_vectors,
+            n_results=k,
+            where=where,
+            include=["documents", "metadatas"]
+        )
+    except Exception as e:
+        raise EmbeddingError(f"Failed to search vectorstore: {e}")
+    return [
+        [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+        for texts, metadatas in zip(results["documents"], results["metadatas"])
+    ]
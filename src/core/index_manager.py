@@ -0,0 +1,356 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import atexit
+import shutil
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+from langchain.docstore.document import Document
+from src.core.index_store import MANIFEST_FILE, IndexStore
+from src.utils.exceptions import IndexStoreError
+
+# Pointer file naming the live generation directory under the index root
+CURRENT_FILE = "CURRENT"
+GENERATION_PREFIX = "gen-"
+# Per serving process: a .json file listing the generations it has loaded and
+# a .lock file it holds an flock on for as long as it lives
+LEASE_DIR = "leases"
+
+
+def resolve_index_dir(root: str) -> Optional[str]:
+    """Directory of the live index: the generation named by CURRENT, or a plain index at root"""
+    pointer = os.path.join(root, CURRENT_FILE)
+    if os.path.exists(pointer):
+        with open(pointer) as f:
+            index_dir = os.path.join(root, f.read().strip())
+        return index_dir if IndexStore.exists(index_dir) else None
+    return root if IndexStore.exists(root) else None
+
+
+def new_generation_dir(root: str) -> str:
+    """Fresh, not yet published generation directory under the index root"""
+    name = f"{GENERATION_PREFIX}{time.strftime('%Y%m%d-%H%M%S')}"
+    index_dir = os.path.join(root, name)
+    suffix = 1
+    while os.path.exists(index_dir):
+        index_dir = os.path.join(root, f"{name}-{suffix}")
+        suffix += 1
+    return index_dir
+
+
+def publish_generation(root: str, index_dir: str) -> None:
+    """Atomically point CURRENT at a finished generation"""
+    if not IndexStore.exists(index_dir):
+        raise IndexStoreError(f"Cannot publish unfinished index {index_dir}")
+    tmp_path = os.path.join(root, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w") as f:
+        f.write(os.path.basename(index_dir))
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+
+def list_generations(root: str) -> List[str]:
+    """Finished generation directories under the index root, oldest first"""
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        os.path.join(root, name) for name in os.listdir(root)
+        if name.startswith(GENERATION_PREFIX) and os.path.exists(os.path.join(root, name, MANIFEST_FILE))
+    )
+
+
+class IndexLease:
+    """This process's claim on the generations it has loaded, so pruning leaves them alone.
+
+    Liveness is the flock on the .lock file, which the kernel drops when the
+    process exits, so it works across PID namespaces as long as the index
+    root is on one filesystem with working flock (a local disk or a volume
+    shared between containers on one host).
+    """
+
+    def __init__(self, root: str):
+        self.lease_dir = os.path.join(root, LEASE_DIR)
+        os.makedirs(self.lease_dir, exist_ok=True)
+        name = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.data_path = os.path.join(self.lease_dir, name + ".json")
+        self.lock_path = os.path.join(self.lease_dir, name + ".lock")
+        # Lock before the first write, so a pruner never sees our data without a live lock
+        self._lock_file = open(self.lock_path, "a")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def update(self, generations: List[str]) -> None:
+        """Atomically replace the list of loaded generations"""
+        with open(self.data_path + ".tmp", "w") as f:
+            json.dump(generations, f)
+        os.replace(self.data_path + ".tmp", self.data_path)
+
+    def remove(self) -> None:
+        for path in (self.data_path, self.lock_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._lock_file.close()
+
+
+def leased_generations(root: str) -> Set[str]:
+    """Generations loaded by any running process; leases whose owner has exited are removed"""
+    lease_dir = os.path.join(root, LEASE_DIR)
+    if not os.path.isdir(lease_dir):
+        return set()
+    leased = set()
+    names = os.listdir(lease_dir)
+    for name in names:
+        prefix, ext = os.path.splitext(os.path.join(lease_dir, name))
+        if ext == ".json" and os.path.basename(prefix) + ".lock" not in names:
+            # Owners lock before writing, so data without a lock is left from a removal
+            _remove_quietly(prefix + ".json")
+        if ext != ".lock":
+            continue
+        try:
+            lock_file = open(prefix + ".lock")
+        except FileNotFoundError:
+            continue
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Held: the owner is alive
+                try:
+                    with open(prefix + ".json") as f:
+                        leased.update(json.load(f))
+                except FileNotFoundError:
+                    pass
+                except ValueError as e:
+                    raise IndexStoreError(f"Unreadable index lease {prefix}.json: {e}")
+                continue
+            _remove_quietly(prefix + ".json")
+            _remove_quietly(prefix + ".lock")
+    return leased
+
+
+def _remove_quietly(path: str) -> None:
+    """Remove a file that a concurrent pruner may already have removed"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def prune_generations(
+    root: str,
+    keep: int = 2,
+    drop_collection: Optional[Callable[[str], None]] = None
+) -> List[str]:
+    """Delete all but the newest `keep` generations; returns removed dirs.
+
+    The live generation and any generation a running process still has
+    loaded (see IndexLease) are kept regardless. drop_collection is called
+    with the vector collection paired with each removed generation.
+    """
+    live = resolve_index_dir(root)
+    leased = leased_generations(root)
+    removed = []
+    for index_dir in list_generations(root)[:-keep or None]:
+        if live and os.path.abspath(index_dir) == os.path.abspath(live):
+            continue
+        if os.path.basename(index_dir) in leased:
+            continue
+        with open(os.path.join(index_dir, MANIFEST_FILE)) as f:
+            collection_name = json.load(f).get("collection_name")
+        shutil.rmtree(index_dir, ignore_errors=True)
+        if collection_name and drop_collection is not None:
+            drop_collection(collection_name)
+        removed.append(index_dir)
+    return removed
+
+
+class IndexGeneration:
+    """One loaded index directory and the retriever built on it, with a reference count"""
+
+    def __init__(self, index_dir: str, hybrid_retriever: Any):
+        self.index_dir = index_dir
+        self.name = os.path.basename(os.path.normpath(index_dir))
+        self.hybrid_retriever = hybrid_retriever
+        self.loaded_at = time.time()
+        self.refs = 0
+        self.retired = False
+
+    def release(self) -> None:
+        """Drop the retriever so its memory maps and vector store handles can be freed"""
+        self.hybrid_retriever = None
+
+
+class IndexManager:
+    """Serve retrieval from the live index generation and swap in rebuilt ones without a restart.
+
+    Each retriever call pins the live generation via acquire() for its
+    duration; reload() loads the newly published generation in a background
+    thread and swaps it in atomically, and the old generation is released
+    once its last in-flight call finishes. Pins are per call, not per
+    request: a request that retrieves again after a swap (e.g. a retry)
+    reads the new generation, and documents it kept from the old one are not
+    reused (see SessionRetrievalCache's generation). Exposes the
+    HybridRetriever methods used by the workflow, so it can stand in for one.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        load_generation: Callable[[str], Any],
+        watch_interval: float = 0.0
+    ):
+        self.root = root
+        self.load_generation = load_generation
+        self.watch_interval = watch_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._retired: List[IndexGeneration] = []
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.last_reload: Dict[str, Any] = {}
+
+        index_dir = resolve_index_dir(root)
+        if index_dir is None:
+            raise IndexStoreError(f"No published index under {root}")
+        self._lease = IndexLease(root)
+        self._lease.update([os.path.basename(os.path.normpath(index_dir))])
+        atexit.register(self._lease.remove)
+        self._current = self._load(index_dir)
+
+    def _load(self, index_dir: str) -> IndexGeneration:
+        start = time.perf_counter()
+        generation = IndexGeneration(index_dir, self.load_generation(index_dir))
+        self.logger.info(f"Loaded index generation {generation.name} in {time.perf_counter() - start:.2f}s")
+        return generation
+
+    @property
+    def current(self) -> IndexGeneration:
+        return self._current
+
+    @contextmanager
+    def acquire(self) -> Iterator[IndexGeneration]:
+        """Pin the live generation for the duration of one retriever call"""
+        with self._lock:
+            generation = self._current
+            generation.refs += 1
+        try:
+            yield generation
+        finally:
+            with self._lock:
+                generation.refs -= 1
+                release = generation.retired and generation.refs == 0
+                if release:
+                    self._retired.remove(generation)
+            if release:
+                self._release(generation)
+
+    def reload(self, wait: bool = False) -> Dict[str, Any]:
+        """Load the published generation in the background and swap it in"""
+        if not self._reload_lock.acquire(blocking=False):
+            return {"status": "already_reloading"}
+        if wait:
+            self._reload()
+            return self.last_reload
+        threading.Thread(target=self._reload, name="index-reload", daemon=True).start()
+        return {"status": "reloading"}
+
+    def _reload(self) -> None:
+        try:
+            index_dir = resolve_index_dir(self.root)
+            if index_dir is None:
+                raise IndexStoreError(f"No published index under {self.root}")
+            if os.path.abspath(index_dir) == os.path.abspath(self._current.index_dir):
+                self.last_reload = {"status": "unchanged", "generation": self._current.name, "at": time.time()}
+                return
+            new_generation = self._load(index_dir)
+            with self._lock:
+                old, self._current = self._current, new_generation
+                old.retired = True
+                release = old.refs == 0
+                if not release:
+                    self._retired.append(old)
+            self.logger.info(f"Swapped index generation {old.name} -> {new_generation.name}")
+            self._update_lease()
+            if release:
+                self._release(old)
+            self.last_reload = {"status": "swapped", "generation": new_generation.name, "at": time.time()}
+        except Exception as e:
+            self.logger.error(f"Error reloading index: {e}")
+            self.last_reload = {"status": "failed", "error": str(e), "at": time.time()}
+        finally:
+            self._reload_lock.release()
+
+    def _release(self, generation: IndexGeneration) -> None:
+        generation.release()
+        self._update_lease()
+        self.logger.info(f"Released index generation {generation.name}")
+
+    def _update_lease(self) -> None:
+        """Keep this process's lease in step with the generations it has mapped"""
+        with self._lock:
+            names = [self._current.name] + [g.name for g in self._retired]
+        try:
+            self._lease.update(names)
+        except OSError as e:
+            self.logger.error(f"Error writing index lease: {e}")
+
+    def start_watcher(self) -> None:
+        """Poll the CURRENT pointer and reload when a new generation is published"""
+        if self.watch_interval <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watcher(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.watch_interval):
+            try:
+                index_dir = resolve_index_dir(self.root)
+            except OSError:
+                continue
+            if index_dir and os.path.abspath(index_dir) != os.path.abspath(self._current.index_dir):
+                self.logger.info(f"New index generation published: {index_dir}")
+                self.reload(wait=True)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "root": self.root,
+                "current": self._current.name,
+                "loaded_at": self._current.loaded_at,
+                "in_flight": self._current.refs,
+                "draining": [{"generation": g.name, "in_flight": g.refs} for g in self._retired],
+                "last_reload": self.last_reload,
+                "watching": self._watcher is not None,
+            }
+
+    # HybridRetriever interface, each call pinned to one generation
+
+    @property
+    def rerank_stats(self):
+        return self._current.hybrid_retriever.rerank_stats
+
+    def retrieve_and_rerank(self, *args, **kwargs) -> List[Document]:
+        with self.acquire() as generation:
+            return generation.hybrid_retriever.retrieve_and_rerank(*args, **kwargs)
+
+    def retrieve_and_rerank_batch(self, *args, **kwargs) -> List[List[Document]]:
+        with self.acquire() as generation:
+            return generation.hybrid_retriever.retrieve_and_rerank_batch(*args, **kwargs)
+
+    def score_documents(self, *args, **kwargs):
+        with self.acquire() as generation:
+            return generation.hybrid_retriever.score_documents(*args, **kwargs)
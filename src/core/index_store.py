@@ -0,0 +1,248 @@
+import os
+import json
+import time
+import shutil
+import logging
+import tempfile
+import weakref
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from langchain.docstore.document import Document
+from src.core.chunk_store import ChunkStore, write_columns
+from src.core.keyword_index import (
+    BM25Index, BM25IndexBuilder, flush_sizes, map_array, open_for_append
+)
+from src.core.vector_index import DenseIndex
+from src.utils.exceptions import IndexStoreError
+
+MANIFEST_FILE = "manifest.json"
+DENSE_INDEX_DIR = "dense"
+INDEX_FORMAT_VERSION = 2
+
+# Directories already reported as holding an older index format; exists() is
+# polled by the index watcher, so each is reported once
+_warned_old_format = set()
+
+
+class IndexStoreWriter:
+    """Write chunk texts, metadata, BM25 postings and dense vectors to flat files.
+
+    Every file is append-only during the build and memory-mapped read-only by
+    IndexStore, so all API workers share one copy through the OS page cache.
+    The manifest is written last; a directory without one is an unfinished build.
+    Passing the state returned by checkpoint() resumes an interrupted build,
+    discarding anything appended after that checkpoint.
+    """
+
+    def __init__(self, index_dir: str, state: Optional[Dict[str, Any]] = None):
+        self.index_dir = index_dir
+        self.logger = logging.getLogger(__name__)
+
+        if state is None:
+            if os.path.exists(index_dir):
+                shutil.rmtree(index_dir)
+            os.makedirs(index_dir)
+
+        files = (state or {}).get("files", {})
+        self.num_chunks = (state or {}).get("num_chunks", 0)
+        self.vector_dim: Optional[int] = (state or {}).get("vector_dim")
+        self._text_bytes = (state or {}).get("text_bytes", 0)
+        self._metadata_bytes = (state or {}).get("metadata_bytes", 0)
+        self._files = {
+            name: open_for_append(self._path(name), files.get(name))
+            for name in ("texts.bin", "text_offsets.bin", "metadata.bin",
+                         "metadata_offsets.bin", "vectors.bin")
+        }
+        self._texts = self._files["texts.bin"]
+        self._text_offsets = self._files["text_offsets.bin"]
+        self._metadata = self._files["metadata.bin"]
+        self._metadata_offsets = self._files["metadata_offsets.bin"]
+        self._vectors = self._files["vectors.bin"]
+        if state is None:
+            self._text_offsets.write(np.int64(0).tobytes())
+            self._metadata_offsets.write(np.int64(0).tobytes())
+        self.keyword_builder = BM25IndexBuilder(index_dir, (state or {}).get("keyword"))
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def add(
+        self,
+        documents: List[Document],
+        vectors: Optional[Sequence[Sequence[float]]] = None
+    ) -> None:
+        """Append a batch of chunks and, optionally, their embeddings"""
+        if vectors is not None:
+            if len(vectors) != len(documents):
+                raise IndexStoreError("Number of vectors does not match number of documents")
+            batch = np.asarray(vectors, dtype=np.float32)
+            if self.vector_dim is None:
+                self.vector_dim = batch.shape[1]
+            elif batch.shape[1] != self.vector_dim:
+                raise IndexStoreError(f"Expected {self.vector_dim}-d vectors, got {batch.shape[1]}-d")
+            self._vectors.write(batch.tobytes())
+
+        for doc in documents:
+            text = doc.page_content.encode("utf-8")
+            metadata = json.dumps(doc.metadata, ensure_ascii=False).encode("utf-8")
+            self._texts.write(text)
+            self._metadata.write(metadata)
+            self._text_bytes += len(text)
+            self._metadata_bytes += len(metadata)
+            self._text_offsets.write(np.int64(self._text_bytes).tobytes())
+            self._metadata_offsets.write(np.int64(self._metadata_bytes).tobytes())
+            self.keyword_builder.add(doc.page_content)
+            self.num_chunks += 1
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Flush everything added so far and return the state needed to resume"""
+        return {
+            "num_chunks": self.num_chunks,
+            "vector_dim": self.vector_dim,
+            "text_bytes": self._text_bytes,
+            "metadata_bytes": self._metadata_bytes,
+            "files": flush_sizes(self._files),
+            "keyword": self.keyword_builder.checkpoint(),
+        }
+
+    def close(self, extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Finalize the keyword index and metadata columns and write the manifest.
+
+        `extra` is recorded in the manifest, e.g. the paired vector collection.
+        """
+        for f in self._files.values():
+            f.close()
+
+        # Row-wise metadata is only a build log; readers use the columns
+        write_columns(self.index_dir, self._iter_metadata, self.num_chunks)
+        os.remove(self._path("metadata.bin"))
+        os.remove(self._path("metadata_offsets.bin"))
+
+        manifest = {
+            "version": INDEX_FORMAT_VERSION,
+            "created_at": time.time(),
+            "num_chunks": self.num_chunks,
+            "text_bytes": self._text_bytes,
+            "vector_dim": self.vector_dim,
+        }
+        manifest.update(self.keyword_builder.finalize())
+        manifest.update(extra or {})
+
+        with open(self._path(MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        self.logger.info(f"Wrote index with {self.num_chunks} chunks to {self.index_dir}")
+        return manifest
+
+    def _iter_metadata(self):
+        offsets = map_array(self._path("metadata_offsets.bin"), np.int64)
+        data = map_array(self._path("metadata.bin"), np.uint8)
+        for i in range(self.num_chunks):
+            yield json.loads(bytes(data[offsets[i]:offsets[i + 1]]))
+
+
+class IndexStore:
+    """Zero-copy, read-only view of an index directory built by IndexStoreWriter"""
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.logger = logging.getLogger(__name__)
+
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise IndexStoreError(f"No index manifest found in {index_dir}")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("version") != INDEX_FORMAT_VERSION:
+            raise IndexStoreError(
+                f"Unsupported index version {self.manifest.get('version')} in {index_dir}; "
+                f"rebuild it with scripts/setup_vectorstore.py"
+            )
+
+        self.num_chunks = self.manifest["num_chunks"]
+        self.chunks = ChunkStore.open(index_dir)
+
+        self.vectors = None
+        dim = self.manifest.get("vector_dim")
+        if dim:
+            self.vectors = map_array(
+                self._path("vectors.bin"), np.float32, shape=(self.num_chunks, dim)
+            )
+
+        self.dense_index = None
+        if DenseIndex.exists(self._path(DENSE_INDEX_DIR)):
+            self.dense_index = DenseIndex(self._path(DENSE_INDEX_DIR))
+
+        self.keyword_index = BM25Index(index_dir, self.manifest["avg_doc_length"])
+        self.logger.info(f"Opened index with {self.num_chunks} chunks from {index_dir}")
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[Document],
+        vectors: Optional[Sequence[Sequence[float]]] = None
+    ) -> "IndexStore":
+        """Build a private index in a temporary directory, removed with the store"""
+        index_dir = tempfile.mkdtemp(prefix="rag-index-")
+        writer = IndexStoreWriter(index_dir)
+        writer.add(documents, vectors)
+        writer.close()
+        store = cls(index_dir)
+        weakref.finalize(store, shutil.rmtree, index_dir, ignore_errors=True)
+        return store
+
+    @classmethod
+    def exists(cls, index_dir: str) -> bool:
+        """Whether a finished index in the current format is present in the directory.
+
+        An index written in an older format counts as missing, so callers
+        rebuild it instead of failing to open it.
+        """
+        manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return False
+        with open(manifest_path) as f:
+            version = json.load(f).get("version")
+        if version != INDEX_FORMAT_VERSION:
+            key = (os.path.abspath(index_dir), version)
+            if key not in _warned_old_format:
+                _warned_old_format.add(key)
+                logging.getLogger(__name__).warning(
+                    f"Ignoring index in {index_dir}: format version {version}, expected "
+                    f"{INDEX_FORMAT_VERSION}; rebuild it with scripts/setup_vectorstore.py"
+                )
+            return False
+        return True
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    def __len__(self) -> int:
+        return self.num_chunks
+
+    def get_text(self, i: int) -> str:
+        return self.chunks.get_text(i)
+
+    def get_metadata(self, i: int) -> Dict[str, Any]:
+        return self.chunks.get_metadata(i)
+
+    def filter_mask(self, where: Dict[str, Any]) -> np.ndarray:
+        return self.chunks.filter_mask(where)
+
+    def build_dense_index(
+        self,
+        dtype: str = "float16",
+        index_type: str = "flat",
+        nlist: int = 0
+    ) -> DenseIndex:
+        """Quantize the stored vectors into the in-process dense index"""
+        if self.vectors is None:
+            raise IndexStoreError("Index was built without embedding vectors")
+        self.dense_index = DenseIndex.build(
+            self._path(DENSE_INDEX_DIR), self.vectors, dtype=dtype, index_type=index_type, nlist=nlist
+        )
+        return self.dense_index
+
+    def get_document(self, i: int) -> Document:
+        """Materialize one chunk as a LangChain Document"""
+        return self.chunks.get_document(i)
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from langchain.docstore.document import Document
+from src.core.document_processor import DocumentProcessor
+from src.core.embeddings import EmbeddingManager
+from src.core.index_store import IndexStoreWriter
+from src.utils.document_utils import assign_chunk_ids, stamp_ingested_at
+from src.utils.exceptions import DocumentProcessingError
+
+# Queue item marking that every chunk of a source has been sent downstream
+_SOURCE_DONE = "source_done"
+_END = None
+
+class StageStats:
+    """Items processed and busy time of one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+        }
+
+class IngestionPipeline:
+    """Crawl, split+filter, embed and upsert as concurrent stages joined by bounded queues.
+
+    Each stage runs in its own thread and only a few batches sit in each
+    queue, so memory stays flat whatever the corpus size. Every
+    `checkpoint_sources` completed sources or `checkpoint_bytes` of chunk
+    text, and once after the last source, the index writer is flushed, the
+    newly completed sources are appended to a log next to the checkpoint and
+    the checkpoint records the log's length. A restarted run skips the
+    logged sources and truncates the index files back to that checkpoint.
+    """
+
+    def __init__(
+        self,
+        processor: DocumentProcessor,
+        embedding_manager: EmbeddingManager,
+        index_dir: str,
+        collection_name: str = "rag-chroma",
+        checkpoint_path: Optional[str] = None,
+        queue_size: int = 8,
+        embed_batch_size: int = 64,
+        load_sources: Optional[Callable[[List[str]], Iterable[Tuple[str, List[Document]]]]] = None,
+        log_every: int = 10000,
+        checkpoint_sources: int = 100,
+        checkpoint_bytes: int = 64 * 2**20
+    ):
+        self.processor = processor
+        self.embedding_manager = embedding_manager
+        self.index_dir = index_dir
+        self.collection_name = collection_name
+        self.checkpoint_path = checkpoint_path or os.path.join(
+            os.path.dirname(os.path.abspath(index_dir)), "ingest_checkpoint.json"
+        )
+        self.queue_size = queue_size
+        self.embed_batch_size = embed_batch_size
+        self.load_sources = load_sources or self._crawl_sources
+        self.log_every = log_every
+        self.checkpoint_sources = checkpoint_sources
+        self.checkpoint_bytes = checkpoint_bytes
+        self.sources_log_path = self.checkpoint_path + ".sources"
+        self.logger = logging.getLogger(__name__)
+
+        self.stats = {name: StageStats(name) for name in ("crawl", "split_filter", "embed", "upsert")}
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def run(self, sources: List[str], resume: bool = True) -> Dict[str, Any]:
+        """Ingest every source not already completed and finalize the index"""
+        checkpoint = self._load_checkpoint() if resume else None
+        completed = self._load_completed(checkpoint)
+        pending_sources = [source for source in sources if source not in completed]
+        if completed:
+            self.logger.info(f"Resuming ingest: {len(completed)} sources already done")
+
+        writer = IndexStoreWriter(self.index_dir, checkpoint["writer"] if checkpoint else None)
+        vectorstore = self.embedding_manager.load_vectorstore(self.collection_name)
+
+        crawled = queue.Queue(self.queue_size)
+        chunks = queue.Queue(self.queue_size)
+        embedded = queue.Queue(self.queue_size)
+
+        stages = [
+            threading.Thread(target=self._guard, args=(self._crawl, pending_sources, crawled), name="crawl"),
+            threading.Thread(target=self._guard, args=(self._split, crawled, chunks), name="split_filter"),
+            threading.Thread(target=self._guard, args=(self._embed, chunks, embedded), name="embed"),
+            threading.Thread(
+                target=self._guard, args=(self._upsert, embedded, writer, vectorstore, completed), name="upsert"
+            ),
+        ]
+        start = time.perf_counter()
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+
+        if self._errors:
+            raise DocumentProcessingError(f"Ingestion failed: {self._errors[0]}")
+
+        manifest = writer.close({"collection_name": self.collection_name})
+        for path in (self.checkpoint_path, self.sources_log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        elapsed = time.perf_counter() - start
+
+        summary = {
+            "sources": len(pending_sources),
+            "chunks": manifest["num_chunks"],
+            "total_seconds": round(elapsed, 3),
+            "stages": self.stage_stats(),
+        }
+        self.logger.info(f"Ingestion finished: {summary}")
+        return summary
+
+    def stage_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    def _guard(self, stage: Callable, *args) -> None:
+        """Run a stage, stopping the whole pipeline if it fails"""
+        try:
+            stage(*args)
+        except BaseException as e:
+            self.logger.error(f"Ingestion stage {threading.current_thread().name} failed: {e}")
+            self._errors.append(e)
+            self._stop.set()
+
+    def _put(self, q: queue.Queue, item: Any) -> None:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _crawl_sources(self, urls: List[str]) -> Iterator[Tuple[str, List[Document]]]:
+        for url in urls:
+            yield url, self.processor.crawl_urls([url])
+
+    def _crawl(self, sources: List[str], out: queue.Queue) -> None:
+        stats = self.stats["crawl"]
+        loaded = iter(self.load_sources(sources))
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            item = next(loaded, _END)
+            stats.busy_seconds += time.perf_counter() - start
+            if item is _END:
+                break
+            stats.items += len(item[1])
+            self._put(out, item)
+        self._put(out, _END)
+
+    def _split(self, inp: queue.Queue, out: queue.Queue) -> None:
+        stats = self.stats["split_filter"]
+        while (item := self._get(inp)) is not _END:
+            source, documents = item
+            batch = []
+            start = time.perf_counter()
+            # Sources arrive one at a time; a per-source process pool would cost more than it saves
+            for chunk in self.processor.iter_split_documents(documents, workers=1):
+                batch.append(chunk)
+                if len(batch) >= self.embed_batch_size:
+                    stats.busy_seconds += time.perf_counter() - start
+                    stats.items += len(batch)
+                    self._put(out, (source, batch))
+                    batch = []
+                    start = time.perf_counter()
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += len(batch)
+            if batch:
+                self._put(out, (source, batch))
+            self._put(out, (source, _SOURCE_DONE))
+        self._put(out, _END)
+
+    def _embed(self, inp: queue.Queue, out: queue.Queue) -> None:
+        stats = self.stats["embed"]
+        seen_ids: Dict[str, Dict[str, int]] = {}
+        ingested_at = int(time.time())
+        while (item := self._get(inp)) is not _END:
+            source, batch = item
+            if batch == _SOURCE_DONE:
+                seen_ids.pop(source, None)
+                self._put(out, item)
+                continue
+            start = time.perf_counter()
+            ids = assign_chunk_ids(batch, seen_ids.setdefault(source, {}))
+            stamp_ingested_at(batch, ingested_at)
+            vectors = self.embedding_manager.embed_documents(
+                [doc.page_content for doc in batch], batch_size=self.embed_batch_size
+            )
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += len(batch)
+            self._put(out, (source, (batch, ids, vectors)))
+        self._put(out, _END)
+
+    def _upsert(self, inp: queue.Queue, writer: IndexStoreWriter, vectorstore, completed: set) -> None:
+        stats = self.stats["upsert"]
+        next_log = self.log_every
+        # Sources completed and chunk text written since the last checkpoint
+        done: List[str] = []
+        pending_bytes = 0
+        while (item := self._get(inp)) is not _END:
+            source, payload = item
+            if payload == _SOURCE_DONE:
+                completed.add(source)
+                done.append(source)
+                if len(done) >= self.checkpoint_sources or pending_bytes >= self.checkpoint_bytes:
+                    self._save_checkpoint(done, writer.checkpoint())
+                    done, pending_bytes = [], 0
+                continue
+            batch, ids, vectors = payload
+            start = time.perf_counter()
+            self.embedding_manager.upsert(vectorstore, batch, vectors, ids)
+            writer.add(batch, vectors)
+            stats.busy_seconds += time.perf_counter() - start
+            stats.items += len(batch)
+            pending_bytes += sum(len(doc.page_content) for doc in batch)
+            if stats.items >= next_log:
+                next_log += self.log_every
+                self.logger.info(f"Ingested {stats.items} chunks: {self.stage_stats()}")
+        if done and not self._stop.is_set():
+            self._save_checkpoint(done, writer.checkpoint())
+
+    def _load_checkpoint(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        with open(self.checkpoint_path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("index_dir") != os.path.abspath(self.index_dir):
+            self.logger.warning("Ignoring checkpoint written for a different index directory")
+            return None
+        log_bytes = checkpoint.get("sources_log_bytes")
+        if log_bytes is None or not os.path.exists(self.sources_log_path) \
+                or os.path.getsize(self.sources_log_path) < log_bytes:
+            self.logger.warning(f"Ignoring checkpoint without a complete source log at {self.sources_log_path}")
+            return None
+        return checkpoint
+
+    def _load_completed(self, checkpoint: Optional[Dict[str, Any]]) -> set:
+        """Sources logged up to the checkpoint; later log entries are dropped"""
+        if not checkpoint:
+            if os.path.exists(self.sources_log_path):
+                os.remove(self.sources_log_path)
+            return set()
+        with open(self.sources_log_path, "a+") as f:
+            f.truncate(checkpoint["sources_log_bytes"])
+            f.seek(0)
+            return set(f.read().splitlines())
+
+    def _save_checkpoint(self, done: List[str], writer_state: Dict[str, Any]) -> None:
+        """Append newly completed sources to the log, then atomically replace the checkpoint"""
+        with open(self.sources_log_path, "a") as f:
+            f.write("".join(f"{source}\n" for source in done))
+            f.flush()
+            os.fsync(f.fileno())
+            log_bytes = f.tell()
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "index_dir": os.path.abspath(self.index_dir),
+                "sources_log_bytes": log_bytes,
+                "writer": writer_state,
+            }, f)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,363 @@
+import os
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
+
+# Same defaults as rank_bm25.BM25Okapi, which backs langchain's BM25Retriever
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+_SPILL_FLUSH_SIZE = 1_000_000
+# Postings sorted in memory at a time when finalizing the index
+_RUN_POSTINGS = _SPILL_FLUSH_SIZE // 3
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenize text the same way as BM25Retriever's default preprocessing"""
+    return text.split()
+
+
+class BM25IndexBuilder:
+    """Build BM25 postings incrementally and write them as flat arrays.
+
+    Postings are spilled to disk as (term, doc, tf) triples while documents
+    are added, and finalize() sorts them externally, so only the vocabulary
+    (a dict of every distinct term) and a few arrays with one entry per term
+    are kept in memory during the build.
+    """
+
+    def __init__(self, index_dir: str, state: Optional[Dict[str, Any]] = None):
+        self.index_dir = index_dir
+        self._spill_path = os.path.join(index_dir, "postings.tmp")
+        self._vocab_path = os.path.join(index_dir, "vocab.log")
+        files = (state or {}).get("files", {})
+        self.num_docs = (state or {}).get("num_docs", 0)
+        self.total_length = (state or {}).get("total_length", 0)
+
+        self._spill = open_for_append(self._spill_path, files.get("postings.tmp"))
+        self._doc_lengths = open_for_append(
+            os.path.join(index_dir, "doc_lengths.bin"), files.get("doc_lengths.bin")
+        )
+        self._vocab_log = open_for_append(self._vocab_path, files.get("vocab.log"))
+        self._vocab: Dict[str, int] = {}
+        if state:
+            with open(self._vocab_path, "rb") as f:
+                for term in f.read().split(b"\n")[:-1]:
+                    self._vocab[term.decode("utf-8")] = len(self._vocab)
+        self._buffer = array("i")
+
+    def add(self, text: str) -> None:
+        """Add the next document's text to the index"""
+        tokens = tokenize(text)
+        doc_id = self.num_docs
+        for term, tf in Counter(tokens).items():
+            term_id = self._vocab.get(term)
+            if term_id is None:
+                # Whitespace-split terms never contain a newline
+                term_id = self._vocab[term] = len(self._vocab)
+                self._vocab_log.write(term.encode("utf-8") + b"\n")
+            self._buffer.extend((term_id, doc_id, tf))
+        if len(self._buffer) >= _SPILL_FLUSH_SIZE:
+            self._flush()
+
+        self._doc_lengths.write(np.int32(len(tokens)).tobytes())
+        self.total_length += len(tokens)
+        self.num_docs += 1
+
+    def _flush(self) -> None:
+        self._buffer.tofile(self._spill)
+        self._buffer = array("i")
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """Flush everything added so far and return the state needed to resume"""
+        self._flush()
+        return {
+            "num_docs": self.num_docs,
+            "total_length": self.total_length,
+            "files": flush_sizes({
+                "postings.tmp": self._spill,
+                "doc_lengths.bin": self._doc_lengths,
+                "vocab.log": self._vocab_log,
+            }),
+        }
+
+    def finalize(self) -> Dict[str, Any]:
+        """Sort spilled postings by term and write the final index files.
+
+        The spill file is cut into runs of _RUN_POSTINGS postings, each sorted
+        by term and written back to disk, and the runs are then merged one
+        window of terms at a time straight into the memory-mapped CSR arrays.
+        """
+        self._flush()
+        self._spill.close()
+        self._doc_lengths.close()
+        self._vocab_log.close()
+
+        terms = sorted(self._vocab)
+        remap = np.empty(len(terms), dtype=np.int32)
+        for new_id, term in enumerate(terms):
+            remap[self._vocab[term]] = new_id
+
+        runs_path = os.path.join(self.index_dir, "postings_runs.tmp")
+        run_terms_path = os.path.join(self.index_dir, "postings_run_terms.tmp")
+        runs, doc_freqs = self._sort_runs(remap, runs_path, run_terms_path)
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=term_offsets[1:])
+        num_postings = int(term_offsets[-1])
+
+        np.save(os.path.join(self.index_dir, "term_offsets.npy"), term_offsets)
+        self._merge_runs(runs_path, run_terms_path, runs, term_offsets)
+        np.save(os.path.join(self.index_dir, "idf.npy"), self._idf(doc_freqs))
+        _write_strings(
+            [term.encode("utf-8") for term in terms],
+            os.path.join(self.index_dir, "vocab.bin"),
+            os.path.join(self.index_dir, "vocab_offsets.npy"),
+        )
+        os.remove(self._spill_path)
+        os.remove(runs_path)
+        os.remove(run_terms_path)
+        os.remove(self._vocab_path)
+
+        return {
+            "num_terms": len(terms),
+            "num_postings": num_postings,
+            "avg_doc_length": self.total_length / max(self.num_docs, 1),
+        }
+
+    def _sort_runs(
+        self, remap: np.ndarray, runs_path: str, run_terms_path: str
+    ) -> Tuple[List[Tuple[int, int]], np.ndarray]:
+        """Write the spill file back as runs sorted by final term id.
+
+        Documents were spilled in order, so a stable sort keeps each term's
+        postings in doc order within a run. Term ids go to their own file so
+        the merge can binary search them in place. Returns the run bounds
+        and the document frequency of every term.
+        """
+        spill = map_array(self._spill_path, np.int32).reshape(-1, 3)
+        doc_freqs = np.zeros(len(remap), dtype=np.int64)
+        runs = []
+        with open(runs_path, "wb") as f, open(run_terms_path, "wb") as f_terms:
+            for lo in range(0, len(spill), _RUN_POSTINGS):
+                run = np.array(spill[lo:lo + _RUN_POSTINGS])
+                term_ids = remap[run[:, 0]]
+                order = np.argsort(term_ids, kind="stable")
+                term_ids[order].tofile(f_terms)
+                np.ascontiguousarray(run[order, 1:]).tofile(f)
+                doc_freqs += np.bincount(term_ids, minlength=len(remap))
+                runs.append((lo, lo + len(run)))
+        del spill
+        return runs, doc_freqs
+
+    def _merge_runs(
+        self, runs_path: str, run_terms_path: str, runs: List[Tuple[int, int]], term_offsets: np.ndarray
+    ) -> None:
+        """k-way merge of sorted runs into postings_docs.npy and postings_tf.npy.
+
+        Each window covers consecutive terms with about _RUN_POSTINGS
+        postings in total; every run contributes one contiguous slice to it,
+        and taking the slices in run order keeps postings in doc order.
+        """
+        num_postings, num_terms = int(term_offsets[-1]), len(term_offsets) - 1
+        docs_path = os.path.join(self.index_dir, "postings_docs.npy")
+        tf_path = os.path.join(self.index_dir, "postings_tf.npy")
+        if num_postings == 0:
+            np.save(docs_path, np.empty(0, dtype=np.int32))
+            np.save(tf_path, np.empty(0, dtype=np.int32))
+            return
+
+        run_terms = map_array(run_terms_path, np.int32)
+        run_postings = map_array(runs_path, np.int32).reshape(-1, 2)
+        docs_out = np.lib.format.open_memmap(docs_path, mode="w+", dtype=np.int32, shape=(num_postings,))
+        tf_out = np.lib.format.open_memmap(tf_path, mode="w+", dtype=np.int32, shape=(num_postings,))
+        cursors = [lo for lo, _ in runs]
+        first = 0
+        while first < num_terms:
+            # Ends past `first`, so one very common term still makes progress
+            last = max(
+                int(np.searchsorted(term_offsets, term_offsets[first] + _RUN_POSTINGS, side="right")) - 1,
+                first + 1
+            )
+            terms, postings = [], []
+            for i, (_, hi) in enumerate(runs):
+                # Same dtype as the mapped run, so the search reads pages in place
+                stop = cursors[i] + int(np.searchsorted(run_terms[cursors[i]:hi], np.int32(last)))
+                terms.append(run_terms[cursors[i]:stop])
+                postings.append(run_postings[cursors[i]:stop])
+                cursors[i] = stop
+            window = np.concatenate(postings)[np.argsort(np.concatenate(terms), kind="stable")]
+            lo, hi = term_offsets[first], term_offsets[last]
+            docs_out[lo:hi] = window[:, 0]
+            tf_out[lo:hi] = window[:, 1]
+            first = last
+        docs_out.flush()
+        tf_out.flush()
+        del docs_out, tf_out, run_terms, run_postings
+
+    def _idf(self, doc_freqs: np.ndarray) -> np.ndarray:
+        """Okapi IDF with rank_bm25's epsilon floor for very common terms"""
+        n = float(self.num_docs)
+        idf = np.log(n - doc_freqs + 0.5) - np.log(doc_freqs + 0.5)
+        if len(idf):
+            idf[idf < 0] = BM25_EPSILON * idf.mean()
+        return idf.astype(np.float32)
+
+
+class BM25Index:
+    """Read-only BM25 index over memory-mapped postings"""
+
+    def __init__(self, index_dir: str, avg_doc_length: float):
+        self.index_dir = index_dir
+        self.avg_doc_length = avg_doc_length or 1.0
+        self.term_offsets = _load(index_dir, "term_offsets.npy")
+        self.postings_docs = _load(index_dir, "postings_docs.npy")
+        self.postings_tf = _load(index_dir, "postings_tf.npy")
+        self.idf = _load(index_dir, "idf.npy")
+        self.doc_lengths = map_array(os.path.join(index_dir, "doc_lengths.bin"), np.int32)
+        self.vocab = _load(index_dir, "vocab.bin", raw=True)
+        self.vocab_offsets = _load(index_dir, "vocab_offsets.npy")
+        self.num_terms = len(self.vocab_offsets) - 1
+
+    def term_id(self, term: str) -> Optional[int]:
+        """Binary search the sorted on-disk vocabulary"""
+        lo, hi = 0, self.num_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = bytes(
+                self.vocab[self.vocab_offsets[mid]:self.vocab_offsets[mid + 1]]
+            ).decode("utf-8")
+            if candidate < term:
+                lo = mid + 1
+            elif candidate > term:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _term_scores(
+        self, term: str, mask: Optional[np.ndarray] = None
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """BM25 contribution of one term to every (allowed) document containing it"""
+        term_id = self.term_id(term)
+        if term_id is None:
+            return None
+        start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+        docs = self.postings_docs[start:end]
+        tf = self.postings_tf[start:end]
+        if mask is not None:
+            # Drop filtered-out postings before any scoring work
+            keep = mask[docs]
+            docs, tf = docs[keep], tf[keep]
+        tf = tf.astype(np.float32)
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / self.avg_doc_length)
+        return docs, self.idf[term_id] * tf * (BM25_K1 + 1) / (tf + norm)
+
+    def search(
+        self, query: str, k: int = 4, mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (doc ids, scores) of the top-k BM25 matches for a query"""
+        return self.search_batch([query], k, mask)[0]
+
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 4,
+        mask: Optional[np.ndarray] = None,
+        query_tokens: Optional[List[List[str]]] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Search several queries, scoring each distinct term's postings once.
+
+        With a boolean mask over doc ids, only the allowed documents are scored.
+        Already tokenized queries can be passed as query_tokens.
+        """
+        if query_tokens is None:
+            query_tokens = [tokenize(query) for query in queries]
+        term_cache: Dict[str, Optional[Tuple[np.ndarray, np.ndarray]]] = {}
+        results = []
+        for tokens in query_tokens:
+            parts = []
+            for term in tokens:
+                if term not in term_cache:
+                    term_cache[term] = self._term_scores(term, mask)
+                if term_cache[term] is not None and len(term_cache[term][0]):
+                    parts.append(term_cache[term])
+
+            if not parts:
+                results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                continue
+
+            doc_ids, inverse = np.unique(np.concatenate([d for d, _ in parts]), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate([s for _, s in parts]))
+            results.append(top_k(doc_ids, scores, k))
+        return results
+
+
+class KeywordIndexRetriever(BaseRetriever):
+    """LangChain retriever over a memory-mapped BM25 index"""
+
+    store: Any
+    k: int = 4
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        doc_ids, _ = self.store.keyword_index.search(query, self.k)
+        return [self.store.get_document(int(i)) for i in doc_ids]
+
+
+def top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Select the k highest scores with argpartition, sorted descending"""
+    if len(scores) > k:
+        part = np.argpartition(-scores, k - 1)[:k]
+    else:
+        part = np.arange(len(scores))
+    order = part[np.argsort(-scores[part], kind="stable")]
+    return ids[order], scores[order]
+
+
+def open_for_append(path: str, size: Optional[int] = None):
+    """Open a binary file for appending, truncated to a checkpointed size if given"""
+    if size is None:
+        return open(path, "wb")
+    f = open(path, "r+b")
+    f.truncate(size)
+    f.seek(size)
+    return f
+
+
+def flush_sizes(files: Dict[str, Any]) -> Dict[str, int]:
+    """Flush open files to disk and return their sizes"""
+    sizes = {}
+    for name, f in files.items():
+        f.flush()
+        os.fsync(f.fileno())
+        sizes[name] = f.tell()
+    return sizes
+
+
+def map_array(path: str, dtype, shape: Optional[Tuple[int, ...]] = None) -> np.ndarray:
+    """Memory-map a raw binary file read-only, tolerating empty files"""
+    if os.path.getsize(path) == 0:
+        return np.zeros(shape or (0,), dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape)
+
+
+def _load(index_dir: str, name: str, raw: bool = False) -> np.ndarray:
+    path = os.path.join(index_dir, name)
+    if raw:
+        return map_array(path, np.uint8)
+    return np.load(path, mmap_mode="r")
+
+
+def _write_strings(values: List[bytes], data_path: str, offsets_path: str) -> None:
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with open(data_path, "wb") as f:
+        for i, value in enumerate(values):
+            f.write(value)
+            offsets[i + 1] = offsets[i] + len(value)
+    np.save(offsets_path, offsets)
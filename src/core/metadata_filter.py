@@ -0,0 +1,103 @@
+import json
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+
+# Operators supported by both Chroma's `where` clause and the bitmap evaluator
+COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value > target,
+    "$gte": lambda value, target: value >= target,
+    "$lt": lambda value, target: value < target,
+    "$lte": lambda value, target: value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+# Metadata keys stored as epoch seconds, which range filters may give as ISO dates
+DATE_KEYS = {"ingested_at", "modified_at"}
+
+
+def to_timestamp(value: str) -> int:
+    """Epoch seconds of an ISO date or datetime, read as UTC unless it has an offset"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Expected an ISO date, got {value!r}")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def to_where(filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Normalize user-supplied metadata filters into a Chroma `where` clause.
+
+    Accepts {"source": "https://..."} for equality, {"key": {"$op": value}}
+    for comparisons and "$and"/"$or" lists. Several top-level keys are
+    combined with "$and", and ISO dates in range comparisons on DATE_KEYS
+    become epoch seconds (UTC unless an offset is given), so
+    {"ingested_at": {"$gte": "2024-06-01"}} works.
+    """
+    if not filters:
+        return None
+    if not isinstance(filters, dict):
+        raise ValueError("Filters must be an object")
+    clauses = []
+    for key, condition in filters.items():
+        if key in ("$and", "$or"):
+            if not isinstance(condition, list) or not condition:
+                raise ValueError(f"'{key}' expects a non-empty list of filters")
+            if not all(isinstance(clause, dict) and clause for clause in condition):
+                raise ValueError(f"'{key}' members must be non-empty filters")
+            clauses.append({key: [to_where(clause) for clause in condition]})
+            continue
+        if key.startswith("$"):
+            raise ValueError(f"Unsupported filter operator: {key}")
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        if not condition:
+            raise ValueError(f"Empty condition for '{key}'")
+        if len(condition) != 1:
+            # Chroma allows one operator per key clause
+            clauses.extend(to_where({key: {op: value}}) for op, value in condition.items())
+            continue
+        (op, value), = condition.items()
+        if op not in COMPARISONS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if op in _RANGE_OPERATORS and key in DATE_KEYS and isinstance(value, str):
+            value = to_timestamp(value)
+        if op in ("$in", "$nin") and not isinstance(value, list):
+            raise ValueError(f"'{op}' expects a list of values")
+        clauses.append({key: {op: value}})
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def where_mask(columns: Dict[str, Any], num_rows: int, where: Dict[str, Any]) -> np.ndarray:
+    """Evaluate a normalized `where` clause into a boolean row bitmap.
+
+    Rows lacking a key never match a condition on it, as in Chroma.
+    """
+    if "$and" in where or "$or" in where:
+        op = "$and" if "$and" in where else "$or"
+        masks = [where_mask(columns, num_rows, clause) for clause in where[op]]
+        return np.logical_and.reduce(masks) if op == "$and" else np.logical_or.reduce(masks)
+
+    (key, condition), = where.items()
+    (op, target), = condition.items()
+    column = columns.get(key)
+    if column is None:
+        return np.zeros(num_rows, dtype=bool)
+    compare = COMPARISONS[op]
+
+    def predicate(value: Any) -> bool:
+        try:
+            return value is not None and compare(value, target)
+        except TypeError:
+            return False
+
+    return column.mask(predicate)
+
+
+def cache_key(where: Dict[str, Any]) -> str:
+    return json.dumps(where, sort_keys=True)
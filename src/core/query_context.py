@@ -0,0 +1,121 @@
+import threading
+import uuid
+import weakref
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from src.core.keyword_index import tokenize
+
+
+# Per-request locks live here rather than on QueryContext, so the context
+# stays plain data that a LangGraph checkpointer can serialize. A lock is
+# dropped once no thread holds it; the next caller simply makes a new one.
+_registry_lock = threading.Lock()
+_request_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+
+
+def _request_lock(request_id: str) -> threading.Lock:
+    """The lock shared by every thread working on one request's context"""
+    with _registry_lock:
+        lock = _request_locks.get(request_id)
+        if lock is None:
+            lock = _request_locks[request_id] = threading.Lock()
+        return lock
+
+
+class QueryContextStats:
+    """Counters across requests: query embeddings computed and reused, and fusions reused"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.contexts = 0
+        self.embedding_calls = 0
+        self.embeddings_saved = 0
+        self.fusions_saved = 0
+
+    def record(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def add(self, counts: Dict[str, int]) -> None:
+        """Fold one request's QueryContext.summary() (or a delta of it) into the totals"""
+        with self._lock:
+            for counter, count in counts.items():
+                setattr(self, counter, getattr(self, counter) + count)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "contexts": self.contexts,
+                "embedding_calls": self.embedding_calls,
+                "embeddings_saved": self.embeddings_saved,
+                "fusions_saved": self.fusions_saved,
+            }
+
+
+class QueryContext:
+    """Everything derived from one request's question, computed on first use and then shared.
+
+    The workflow carries it in GraphState, so every node, retriever call,
+    fallback and retry iteration of the request uses one query embedding,
+    one BM25 tokenization and one fused candidate list per index and
+    filter, instead of each backend recomputing them.
+
+    It holds only plain data, so the state stays serializable: threads
+    coordinate through a module-level lock keyed by request_id, and the
+    caller folds summary() into a QueryContextStats.
+    """
+
+    def __init__(self, question: str, request_id: Optional[str] = None):
+        self.question = question
+        self.request_id = request_id or uuid.uuid4().hex
+        self._embedding: Optional[List[float]] = None
+        self._tokens: Optional[List[str]] = None
+        self._fused: Dict[Hashable, List[Tuple[Document, float]]] = {}
+        self.embedding_calls = 0
+        self.embeddings_saved = 0
+        self.fusions_saved = 0
+
+    def _record(self, counter: str) -> None:
+        setattr(self, counter, getattr(self, counter) + 1)
+
+    def embedding(self, embeddings: Embeddings) -> List[float]:
+        """The question's embedding, computed by the first caller"""
+        with _request_lock(self.request_id):
+            if self._embedding is None:
+                self._embedding = embeddings.embed_query(self.question)
+                self._record("embedding_calls")
+            else:
+                self._record("embeddings_saved")
+            return self._embedding
+
+    @property
+    def tokens(self) -> List[str]:
+        """The question as the BM25 index tokenizes it"""
+        if self._tokens is None:
+            self._tokens = tokenize(self.question)
+        return self._tokens
+
+    def fused_candidates(
+        self,
+        key: Hashable,
+        compute: Callable[[], List[Tuple[Document, float]]]
+    ) -> List[Tuple[Document, float]]:
+        """Fused (document, score) candidates for one index and filter, computed once"""
+        with _request_lock(self.request_id):
+            fused = self._fused.get(key)
+            if fused is not None:
+                self._record("fusions_saved")
+                return fused
+        # compute() embeds through this context, so it runs outside the lock
+        fused = compute()
+        with _request_lock(self.request_id):
+            return self._fused.setdefault(key, fused)
+
+    def summary(self) -> Dict[str, int]:
+        """Work this request did once and reused"""
+        return {
+            "embedding_calls": self.embedding_calls,
+            "embeddings_saved": self.embeddings_saved,
+            "fusions_saved": self.fusions_saved,
+        }
@@ -0,0 +1,180 @@
+import random
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+from sentence_transformers import CrossEncoder
+
+RERANK_MODES = ("full", "adaptive")
+
+
+class RerankStats:
+    """Counters describing how much cross-encoder work adaptive reranking saved"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.skipped = 0
+        self.candidates = 0
+        self.first_stage_pairs = 0
+        self.cross_encoder_pairs = 0
+        self.audited = 0
+        self.overlap_sum = 0.0
+        self.top1_matches = 0
+
+    def record(self, candidates: int, first_stage_pairs: int, cross_encoder_pairs: int) -> None:
+        with self._lock:
+            self.queries += 1
+            self.candidates += candidates
+            self.first_stage_pairs += first_stage_pairs
+            self.cross_encoder_pairs += cross_encoder_pairs
+            if not cross_encoder_pairs:
+                self.skipped += 1
+
+    def record_audit(self, overlap: float, top1_match: bool) -> None:
+        with self._lock:
+            self.audited += 1
+            self.overlap_sum += overlap
+            self.top1_matches += int(top1_match)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "skip_rate": self.skipped / self.queries if self.queries else 0.0,
+                "cross_encoder_pairs": self.cross_encoder_pairs,
+                "first_stage_pairs": self.first_stage_pairs,
+                # Share of the pairs a full rerank would have cross-encoded
+                "cross_encoder_fraction": (
+                    self.cross_encoder_pairs / self.candidates if self.candidates else 0.0
+                ),
+                "audited": self.audited,
+                "agreement_at_k": self.overlap_sum / self.audited if self.audited else None,
+                "top1_agreement": self.top1_matches / self.audited if self.audited else None,
+            }
+
+
+class AdaptiveReranker:
+    """Cross-encode only the candidates whose final_k membership is uncertain.
+
+    Candidates come with fused RRF scores. Around the boundary between the
+    final_k-th and next candidate, a band of +/- margin (as a fraction of
+    the best possible fused score) marks the uncertain middle: candidates
+    above it are kept in fused order, those below it are dropped, and only
+    the middle is cross-encoded to fill the remaining slots. When no
+    candidate falls in the band the cross-encoder is skipped entirely. An
+    optional cheaper first-stage model narrows a large middle down to
+    first_stage_keep candidates before the main cross-encoder.
+
+    A sampled fraction of queries (audit_rate) is also fully reranked to
+    measure how often the adaptive result agrees with the full one.
+    """
+
+    def __init__(
+        self,
+        reranker: CrossEncoder,
+        max_fused_score: float,
+        margin: float = 0.1,
+        first_stage_model: Optional[str] = None,
+        first_stage_keep: int = 8,
+        audit_rate: float = 0.0,
+        batch_size: int = 64,
+        stats: Optional[RerankStats] = None
+    ):
+        self.reranker = reranker
+        self.max_fused_score = max_fused_score
+        self.margin = margin
+        self.first_stage = CrossEncoder(first_stage_model) if first_stage_model else None
+        self.first_stage_keep = first_stage_keep
+        self.audit_rate = audit_rate
+        self.batch_size = batch_size
+        self.stats = stats or RerankStats()
+        self.logger = logging.getLogger(__name__)
+
+    def split(self, scored: List[Tuple[Document, float]], final_k: int) -> Tuple[List[Document], List[Document]]:
+        """Partition fused candidates into (confident head, uncertain middle)"""
+        if len(scored) <= final_k:
+            return [doc for doc, _ in scored], []
+        scores = [score for _, score in scored]
+        boundary = (scores[final_k - 1] + scores[final_k]) / 2
+        band = self.margin * self.max_fused_score
+        head = [doc for doc, score in scored if score >= boundary + band]
+        middle = [doc for doc, score in scored if boundary - band < score < boundary + band]
+        return head, middle
+
+    def rerank_batch(
+        self,
+        queries: List[str],
+        scored_candidates: List[List[Tuple[Document, float]]],
+        final_k: int
+    ) -> List[List[Document]]:
+        """Adaptive rerank of several queries, batching all model calls"""
+        splits = [self.split(scored, final_k) for scored in scored_candidates]
+
+        middles = [middle for _, middle in splits]
+        first_stage_pairs = [0] * len(queries)
+        if self.first_stage is not None:
+            narrowed = self._narrow(queries, middles)
+            first_stage_pairs = [len(m) if len(m) > self.first_stage_keep else 0 for m in middles]
+            middles = narrowed
+
+        middle_scores = self._predict(self.reranker, queries, middles)
+        results = []
+        for i, ((head, _), middle, scores) in enumerate(zip(splits, middles, middle_scores)):
+            slots = max(0, final_k - len(head))
+            order = np.argsort(-scores, kind="stable")[:slots]
+            # Ties at the boundary can put more than final_k candidates in the head
+            results.append((head + [middle[j] for j in order])[:final_k])
+            self.stats.record(len(scored_candidates[i]), first_stage_pairs[i], len(middle))
+
+        self._audit(queries, scored_candidates, results, final_k)
+        return results
+
+    def _narrow(self, queries: List[str], middles: List[List[Document]]) -> List[List[Document]]:
+        """Keep the first_stage_keep best of each large middle according to the cheap model"""
+        large = [m if len(m) > self.first_stage_keep else [] for m in middles]
+        scores = self._predict(self.first_stage, queries, large)
+        narrowed = []
+        for middle, big, big_scores in zip(middles, large, scores):
+            if not big:
+                narrowed.append(middle)
+                continue
+            keep = np.sort(np.argsort(-big_scores, kind="stable")[:self.first_stage_keep])
+            narrowed.append([big[j] for j in keep])
+        return narrowed
+
+    def _predict(
+        self,
+        model: CrossEncoder,
+        queries: List[str],
+        candidates: List[List[Document]]
+    ) -> List[np.ndarray]:
+        pairs = [[query, doc.page_content] for query, docs in zip(queries, candidates) for doc in docs]
+        scores = np.asarray(model.predict(pairs, batch_size=self.batch_size)) if pairs else np.empty(0)
+        split, offset = [], 0
+        for docs in candidates:
+            split.append(scores[offset:offset + len(docs)])
+            offset += len(docs)
+        return split
+
+    def _audit(
+        self,
+        queries: List[str],
+        scored_candidates: List[List[Tuple[Document, float]]],
+        results: List[List[Document]],
+        final_k: int
+    ) -> None:
+        """Compare a sample of adaptive results against a full rerank"""
+        sampled = [i for i in range(len(queries)) if self.audit_rate and random.random() < self.audit_rate]
+        if not sampled:
+            return
+        candidates = [[doc for doc, _ in scored_candidates[i]] for i in sampled]
+        all_scores = self._predict(self.reranker, [queries[i] for i in sampled], candidates)
+        for i, docs, scores in zip(sampled, candidates, all_scores):
+            full = [docs[j].page_content for j in np.argsort(-scores, kind="stable")[:final_k]]
+            adaptive = [doc.page_content for doc in results[i]]
+            if not full:
+                continue
+            overlap = len(set(full) & set(adaptive)) / len(full)
+            self.stats.record_audit(overlap, bool(adaptive) and adaptive[0] == full[0])
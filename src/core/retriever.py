@@ -1,30 +1,51 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from langchain.docstore.document import Document
 from langchain_community.vectorstores import Chroma
-from langchain_community.retrievers import BM25Retriever
 from langchain.retrievers import EnsembleRetriever
 from sentence_transformers import CrossEncoder
+from src.core.embeddings import similarity_search_by_vectors
+from src.core.index_store import IndexStore
+from src.core.keyword_index import KeywordIndexRetriever
+from src.core.metadata_filter import cache_key, to_where
+from src.core.query_context import QueryContext
+from src.core.reranking import RERANK_MODES, AdaptiveReranker, RerankStats
+from src.utils.exceptions import EmbeddingError
 import numpy as np
 
 class HybridRetriever:
     def __init__(
         self, 
         vectorstore: Chroma, 
-        documents: List[Document],
+        documents: Optional[List[Document]] = None,
         semantic_weight: float = 0.7,
         keyword_weight: float = 0.3,
-        rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        rerank_model: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        index_store: Optional[IndexStore] = None,
+        rerank_batch_size: int = 64,
+        rerank_mode: str = "full",
+        rerank_margin: float = 0.1,
+        rerank_first_stage_model: Optional[str] = None,
+        rerank_first_stage_keep: int = 8,
+        rerank_audit_rate: float = 0.0,
+        reranker: Optional[CrossEncoder] = None,
+        rerank_stats: Optional[RerankStats] = None,
+        candidate_k: int = 4
     ):
         self.vectorstore = vectorstore
-        self.documents = documents
+        if index_store is None:
+            # Keep chunks as flat arrays rather than a list of Documents
+            index_store = IndexStore.from_documents(documents or [])
+        self.index_store = index_store
+        self.rerank_batch_size = rerank_batch_size
         self.semantic_weight = semantic_weight
         self.keyword_weight = keyword_weight
         self.logger = logging.getLogger(__name__)
         
-        # Initialize retrievers
-        self.semantic_retriever = vectorstore.as_retriever()
-        self.keyword_retriever = BM25Retriever.from_documents(documents)
+        # Initialize retrievers; each contributes candidate_k results to the fusion
+        self.semantic_retriever = vectorstore.as_retriever(search_kwargs={"k": candidate_k})
+        # Memory-mapped postings, shared across worker processes
+        self.keyword_retriever = KeywordIndexRetriever(store=index_store, k=candidate_k)
         
         # Initialize ensemble retriever
         self.ensemble_retriever = EnsembleRetriever(
@@ -33,39 +54,95 @@ class HybridRetriever:
         )
         
         # Initialize reranker
-        self.reranker = CrossEncoder(rerank_model)
+        if rerank_mode not in RERANK_MODES:
+            raise ValueError(f"Unknown rerank mode: {rerank_mode}")
+        self.rerank_mode = rerank_mode
+        # An already loaded model and stats can be shared across index generations
+        self.reranker = reranker or CrossEncoder(rerank_model)
+        self.rerank_stats = rerank_stats or RerankStats()
+        self.adaptive_reranker = None
+        if rerank_mode == "adaptive":
+            self.adaptive_reranker = AdaptiveReranker(
+                self.reranker,
+                # Fused score of a chunk ranked first by both retrievers
+                max_fused_score=(semantic_weight + keyword_weight) / (1 + self.ensemble_retriever.c),
+                margin=rerank_margin,
+                first_stage_model=rerank_first_stage_model,
+                first_stage_keep=rerank_first_stage_keep,
+                audit_rate=rerank_audit_rate,
+                batch_size=rerank_batch_size,
+                stats=self.rerank_stats
+            )
         self.logger.info(f"Initialized hybrid retriever with semantic_weight={semantic_weight}")
     
     def retrieve_and_rerank(
         self, 
         query: str, 
         top_k: int = 10, 
-        final_k: int = 5
+        final_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None,
+        context: Optional[QueryContext] = None
     ) -> List[Document]:
-        """Retrieve documents using hybrid approach and rerank them"""
+        """Retrieve documents using hybrid approach and rerank them.
+        
+        `filters` restrict retrieval to chunks whose metadata matches, e.g.
+        {"source": url} or {"ingested_at": {"$gte": "2024-06-01"}}; they are
+        applied inside both searches rather than after them. With the
+        request's QueryContext, its embedding, tokens and fused candidates
+        are reused rather than recomputed.
+        """
+        where = to_where(filters)
         try:
             # Get initial retrieval results
-            self.logger.info(f"Retrieving top {top_k} documents for query: {query[:100]}...")
+            self.logger.info("Retrieving top %d documents for query: %.100s...", top_k, query)
+            
+            if self.adaptive_reranker is not None:
+                # Adaptive reranking needs the fused scores, not just the order
+                if context is not None:
+                    scored = self._context_candidates(context, top_k, where)
+                else:
+                    scored = self._fused_candidates([query], top_k, where)[0]
+                if not scored:
+                    self.logger.warning("No documents retrieved")
+                    return []
+                return self.adaptive_reranker.rerank_batch([query], [scored], final_k)[0]
             
-            # Use ensemble retriever to get diverse results
-            retrieved_docs = self.ensemble_retriever.get_relevant_documents(query)[:top_k]
+            if context is not None:
+                retrieved_docs = [doc for doc, _ in self._context_candidates(context, top_k, where)]
+            elif where:
+                retrieved_docs = self._hybrid_candidates([query], top_k, where)[0]
+            else:
+                # Use ensemble retriever to get diverse results
+                retrieved_docs = self.ensemble_retriever.get_relevant_documents(query)[:top_k]
             
             if not retrieved_docs:
                 self.logger.warning("No documents retrieved")
                 return []
             
             # Rerank documents
-            self.logger.info(f"Reranking {len(retrieved_docs)} documents...")
+            self.logger.info("Reranking %d documents...", len(retrieved_docs))
             reranked_docs = self._rerank_documents(query, retrieved_docs, final_k)
             
-            self.logger.info(f"Returning top {len(reranked_docs)} reranked documents")
+            self.logger.info("Returning top %d reranked documents", len(reranked_docs))
             return reranked_docs
             
         except Exception as e:
             self.logger.error(f"Error in hybrid retrieval: {e}")
             # Fallback to semantic retrieval only
+            if context is not None:
+                query_vector = context.embedding(self.vectorstore.embeddings)
+                return self.vectorstore.similarity_search_by_vector(query_vector, k=final_k, filter=where)
+            if where:
+                return self.vectorstore.similarity_search(query, k=final_k, filter=where)
             return self.semantic_retriever.get_relevant_documents(query)[:final_k]
     
+    def score_documents(self, query: str, documents: List[Document]) -> np.ndarray:
+        """Cross-encoder relevance scores of documents for a query"""
+        if not documents:
+            return np.empty(0, dtype=np.float32)
+        pairs = [[query, doc.page_content] for doc in documents]
+        return np.asarray(self.reranker.predict(pairs, batch_size=self.rerank_batch_size))
+    
     def _rerank_documents(
         self, 
         query: str, 
@@ -79,6 +156,7 @@ class HybridRetriever:
             
             # Get relevance scores
             scores = self.reranker.predict(pairs)
+            self.rerank_stats.record(len(pairs), 0, len(pairs))
             
             # Sort documents by relevance score
             doc_score_pairs = list(zip(documents, scores))
@@ -88,12 +166,138 @@ class HybridRetriever:
             reranked_docs = [doc for doc, score in doc_score_pairs[:top_k]]
             
             # Log scores for debugging
-            for i, (doc, score) in enumerate(doc_score_pairs[:top_k]):
-                self.logger.debug(f"Rank {i+1}: Score {score:.4f} - {doc.page_content[:100]}...")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                for i, (doc, score) in enumerate(doc_score_pairs[:top_k]):
+                    self.logger.debug("Rank %d: Score %.4f - %.100s...", i + 1, score, doc.page_content)
             
             return reranked_docs
             
         except Exception as e:
             self.logger.error(f"Error in reranking: {e}")
             # Fallback to original order
-            return documents[:top_k]
\ No newline at end of file
+            return documents[:top_k]
+    
+    def retrieve_and_rerank_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        final_k: int = 5,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """Hybrid retrieval and reranking for many queries with shared, batched work"""
+        where = to_where(filters)
+        try:
+            self.logger.info("Batch retrieving for %d queries...", len(queries))
+            scored = self._fused_candidates(queries, top_k, where)
+            if self.adaptive_reranker is not None:
+                return self.adaptive_reranker.rerank_batch(queries, scored, final_k)
+            candidates = [[doc for doc, _ in pairs] for pairs in scored]
+            return self._rerank_batch(queries, candidates, final_k)
+            
+        except EmbeddingError as e:
+            self.logger.warning(f"Batched vector search failed, retrieving one query at a time: {e}")
+            # Fallback to one query at a time
+            return [self.retrieve_and_rerank(query, top_k, final_k, filters) for query in queries]
+    
+    def _hybrid_candidates(
+        self,
+        queries: List[str],
+        top_k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """Fused semantic and keyword candidates for each query"""
+        return [[doc for doc, _ in scored] for scored in self._fused_candidates(queries, top_k, where)]
+    
+    def _fused_candidates(
+        self,
+        queries: List[str],
+        top_k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Fused (document, RRF score) candidates for each query"""
+        # Embedded as queries, like QueryContext does, for asymmetric models;
+        # one vector search for all of them
+        query_vectors = [self.vectorstore.embeddings.embed_query(query) for query in queries]
+        semantic_k = self.semantic_retriever.search_kwargs.get("k", 4)
+        semantic_results = self._semantic_search_batch(query_vectors, semantic_k, where)
+        keyword_results = self._keyword_search_batch(queries, where)
+        
+        # Same weighted reciprocal rank fusion as the ensemble retriever
+        return [
+            self._fuse([semantic, keyword])[:top_k]
+            for semantic, keyword in zip(semantic_results, keyword_results)
+        ]
+    
+    def _context_candidates(
+        self,
+        context: QueryContext,
+        top_k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Tuple[Document, float]]:
+        """Fused candidates for a request's question, computed once per index and filter"""
+        def fuse() -> List[Tuple[Document, float]]:
+            query_vector = context.embedding(self.vectorstore.embeddings)
+            semantic_k = self.semantic_retriever.search_kwargs.get("k", 4)
+            semantic = self._semantic_search_batch([query_vector], semantic_k, where)[0]
+            keyword = self._keyword_search_batch([context.question], where, [context.tokens])[0]
+            return self._fuse([semantic, keyword])
+        
+        key = (self.index_store.index_dir, cache_key(where or {}))
+        return context.fused_candidates(key, fuse)[:top_k]
+    
+    def _semantic_search_batch(
+        self,
+        query_vectors: List[List[float]],
+        k: int,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[List[Document]]:
+        """Dense search for all query vectors in one backend call"""
+        return similarity_search_by_vectors(self.vectorstore, query_vectors, k, where)
+    
+    def _keyword_search_batch(
+        self,
+        queries: List[str],
+        where: Optional[Dict[str, Any]] = None,
+        query_tokens: Optional[List[List[str]]] = None
+    ) -> List[List[Document]]:
+        """BM25 search for all queries, sharing postings lookups across queries"""
+        mask = self.index_store.filter_mask(where) if where else None
+        if mask is not None and not mask.any():
+            return [[] for _ in queries]
+        results = self.index_store.keyword_index.search_batch(
+            queries, self.keyword_retriever.k, mask, query_tokens
+        )
+        return [[self.index_store.get_document(int(i)) for i in doc_ids] for doc_ids, _ in results]
+    
+    def _fuse(self, ranked_lists: List[List[Document]]) -> List[Tuple[Document, float]]:
+        """Weighted reciprocal rank fusion, matching EnsembleRetriever"""
+        weights = [self.semantic_weight, self.keyword_weight]
+        fused: Dict[str, Tuple[Document, float]] = {}
+        for docs, weight in zip(ranked_lists, weights):
+            for rank, doc in enumerate(docs, start=1):
+                first, score = fused.get(doc.page_content, (doc, 0.0))
+                fused[doc.page_content] = (first, score + weight / (rank + self.ensemble_retriever.c))
+        return sorted(fused.values(), key=lambda pair: pair[1], reverse=True)
+    
+    def _rerank_batch(
+        self,
+        queries: List[str],
+        candidates: List[List[Document]],
+        top_k: int
+    ) -> List[List[Document]]:
+        """Cross-encode every (query, candidate) pair in large batches"""
+        pairs = [[query, doc.page_content] for query, docs in zip(queries, candidates) for doc in docs]
+        if not pairs:
+            return [[] for _ in queries]
+        
+        self.logger.info("Reranking %d pairs in batches of %d...", len(pairs), self.rerank_batch_size)
+        scores = self.reranker.predict(pairs, batch_size=self.rerank_batch_size)
+        
+        reranked, offset = [], 0
+        for docs in candidates:
+            doc_scores = scores[offset:offset + len(docs)]
+            offset += len(docs)
+            order = np.argsort(-np.asarray(doc_scores), kind="stable")[:top_k]
+            reranked.append([docs[i] for i in order])
+            self.rerank_stats.record(len(docs), 0, len(docs))
+        return reranked
@@ -0,0 +1,132 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import numpy as np
+from langchain.docstore.document import Document
+from src.core.metadata_filter import cache_key
+from src.utils.cache import TTLCache
+
+
+class _Session:
+    def __init__(self, filters_key: str, generation: Optional[str] = None):
+        self.filters_key = filters_key
+        # Index generation the documents were retrieved from
+        self.generation = generation
+        self.documents: List[Document] = []
+        # Last lookup, so routing and retrieval of one question score the cache once
+        self.last_question: Optional[str] = None
+        self.last_result: Optional[List[Document]] = None
+
+
+class SessionRetrievalCache:
+    """Graded chunks per conversation, reused to answer follow-up questions.
+
+    After a question's documents pass relevance grading they are stored
+    under its session id (bounded, LRU, expiring after ttl_seconds of
+    inactivity). A follow-up in the same session with the same filters
+    first scores the cached chunks with the retriever's cross-encoder; if
+    at least min_documents score min_score or more, the best final_k are
+    used directly and routing, retrieval and relevance grading are skipped.
+    Otherwise the question goes through full retrieval, as it does when
+    the index generation has been swapped since the documents were stored.
+    """
+
+    def __init__(
+        self,
+        scorer: Callable[[str, List[Document]], Sequence[float]],
+        max_sessions: int = 1024,
+        ttl_seconds: float = 1800.0,
+        max_documents: int = 20,
+        min_score: float = 0.0,
+        min_documents: int = 2,
+        generation: Optional[Callable[[], Optional[str]]] = None
+    ):
+        self.scorer = scorer
+        self.generation = generation or (lambda: None)
+        self.sessions = TTLCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+        self.max_documents = max_documents
+        self.min_score = min_score
+        self.min_documents = min_documents
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # Follow-ups answered from the cache, and those that needed full retrieval
+        self.hits = 0
+        self.below_threshold = 0
+
+    def lookup(
+        self,
+        session_id: str,
+        question: str,
+        filters: Optional[Dict[str, Any]] = None,
+        final_k: int = 5
+    ) -> Optional[List[Document]]:
+        """Cached chunks relevant enough to answer the question, or None to retrieve afresh"""
+        filters_key, generation = cache_key(filters or {}), self.generation()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if (
+                session is None or session.filters_key != filters_key
+                or session.generation != generation or not session.documents
+            ):
+                return None
+            if session.last_question == question:
+                return session.last_result
+            documents = session.documents
+
+        # Scored outside the lock; the cross-encoder is the slow part
+        try:
+            scores = np.asarray(self.scorer(question, documents), dtype=np.float32)
+        except Exception as e:
+            self.logger.error(f"Error scoring cached session documents: {e}")
+            return None
+        order = [i for i in np.argsort(-scores, kind="stable") if scores[i] >= self.min_score]
+        result = [documents[i] for i in order[:final_k]] if len(order) >= self.min_documents else None
+
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+            else:
+                self.below_threshold += 1
+            if session.documents is documents:
+                # Unless store() replaced the documents meanwhile
+                session.last_question, session.last_result = question, result
+        return result
+
+    def store(
+        self,
+        session_id: str,
+        documents: List[Document],
+        filters: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Add graded documents to the session, newest first, keeping at most max_documents"""
+        filters_key, generation = cache_key(filters or {}), self.generation()
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is None or session.filters_key != filters_key or session.generation != generation:
+                session = _Session(filters_key, generation)
+            seen, merged = set(), []
+            for doc in list(documents) + session.documents:
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    merged.append(doc)
+            session.documents = merged[:self.max_documents]
+            session.last_question = session.last_result = None
+            self.sessions.put(session_id, session)
+
+    def touch(self, session_id: str) -> None:
+        """Keep a session alive without changing it"""
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.put(session_id, session)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            follow_ups = self.hits + self.below_threshold
+            return {
+                "sessions": len(self.sessions),
+                "hits": self.hits,
+                "below_threshold": self.below_threshold,
+                "hit_rate": self.hits / follow_ups if follow_ups else 0.0,
+            }
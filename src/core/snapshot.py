@@ -0,0 +1,144 @@
+import json
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from langchain.docstore.document import Document
+from src.core.index_store import IndexStore, IndexStoreWriter
+from src.utils.document_utils import assign_chunk_ids
+from src.utils.exceptions import IndexStoreError
+
+SNAPSHOT_FORMAT = "rag-snapshot/1"
+SNAPSHOT_METADATA_KEY = b"rag_snapshot"
+
+def snapshot_schema(vector_dim: int, info: Dict[str, Any]) -> pa.Schema:
+    """One row per chunk: stable id, text, metadata as JSON and its embedding"""
+    return pa.schema(
+        [
+            pa.field("id", pa.string(), nullable=False),
+            pa.field("text", pa.large_string(), nullable=False),
+            pa.field("metadata", pa.string()),
+            pa.field("vector", pa.list_(pa.float32(), vector_dim), nullable=False),
+        ],
+        metadata={SNAPSHOT_METADATA_KEY: json.dumps(info).encode("utf-8")},
+    )
+
+
+def _is_parquet(path: str) -> bool:
+    return not path.endswith((".arrow", ".feather", ".ipc"))
+
+
+def export_snapshot(index_store: IndexStore, path: str, batch_size: int = 8192) -> Dict[str, Any]:
+    """Write an index's chunks and embeddings to a Parquet (default) or Arrow IPC file.
+
+    The vectors are copied straight from the memory-mapped matrix, so no
+    embedding model is needed on either side.
+    """
+    if index_store.vectors is None:
+        raise IndexStoreError("Index was built without embedding vectors")
+    num_rows, dim = index_store.vectors.shape
+    info = {
+        "format": SNAPSHOT_FORMAT,
+        "created_at": time.time(),
+        "num_chunks": num_rows,
+        "vector_dim": dim,
+        "source_index": index_store.index_dir,
+        "collection_name": index_store.manifest.get("collection_name"),
+    }
+    schema = snapshot_schema(dim, info)
+
+    if _is_parquet(path):
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = ipc.new_file(path, schema)
+    try:
+        seen: Dict[str, int] = {}
+        for lo in range(0, num_rows, batch_size):
+            hi = min(lo + batch_size, num_rows)
+            documents = [index_store.get_document(i) for i in range(lo, hi)]
+            missing = [doc for doc in documents if not doc.metadata.get("chunk_id")]
+            if missing:
+                # Chunks indexed without an id get a content-derived one
+                assign_chunk_ids(missing, seen)
+            ids = [doc.metadata["chunk_id"] for doc in documents]
+            vectors = np.ascontiguousarray(index_store.vectors[lo:hi], dtype=np.float32)
+            writer.write_batch(pa.record_batch([
+                pa.array(ids, pa.string()),
+                pa.array([doc.page_content for doc in documents], pa.large_string()),
+                pa.array([json.dumps(doc.metadata, ensure_ascii=False) for doc in documents], pa.string()),
+                pa.FixedSizeListArray.from_arrays(pa.array(vectors.reshape(-1)), dim),
+            ], schema=schema))
+    finally:
+        writer.close()
+
+    return info
+
+
+def read_snapshot_info(path: str) -> Dict[str, Any]:
+    """Snapshot header: format, chunk count, vector dimension and source collection"""
+    schema = pq.read_schema(path) if _is_parquet(path) else ipc.open_file(pa.memory_map(path)).schema
+    raw = (schema.metadata or {}).get(SNAPSHOT_METADATA_KEY)
+    if raw is None:
+        raise IndexStoreError(f"{path} is not an index snapshot")
+    info = json.loads(raw)
+    if info.get("format") != SNAPSHOT_FORMAT:
+        raise IndexStoreError(f"Unsupported snapshot format: {info.get('format')}")
+    return info
+
+
+def iter_snapshot(path: str, batch_size: int = 8192) -> Iterator[Tuple[List[str], List[Document], np.ndarray]]:
+    """Stream (ids, documents, vectors) batches from a snapshot file"""
+    if _is_parquet(path):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    else:
+        reader = ipc.open_file(pa.memory_map(path))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+
+    for batch in batches:
+        ids = batch.column("id").to_pylist()
+        texts = batch.column("text").to_pylist()
+        metadatas = batch.column("metadata").to_pylist()
+        vector_column = batch.column("vector")
+        vectors = vector_column.flatten().to_numpy(zero_copy_only=False)
+        vectors = vectors.reshape(len(batch), vector_column.type.list_size)
+        documents = [
+            Document(page_content=text, metadata=json.loads(metadata) if metadata else {})
+            for text, metadata in zip(texts, metadatas)
+        ]
+        yield ids, documents, vectors
+
+
+def import_snapshot(
+    path: str,
+    index_dir: str,
+    embedding_manager=None,
+    collection_name: Optional[str] = None,
+    batch_size: int = 8192
+) -> Dict[str, Any]:
+    """Bulk-load a snapshot into a new index directory and, optionally, a Chroma collection.
+
+    Stored embeddings are written as is; the embedding model is never called.
+    Returns the new index manifest.
+    """
+    info = read_snapshot_info(path)
+    vectorstore = None
+    if embedding_manager is not None and collection_name:
+        vectorstore = embedding_manager.load_vectorstore(collection_name)
+
+    writer = IndexStoreWriter(index_dir)
+    for ids, documents, vectors in iter_snapshot(path, batch_size):
+        writer.add(documents, vectors)
+        if vectorstore is not None:
+            embedding_manager.upsert(vectorstore, documents, vectors, ids)
+    extra = {"snapshot": {"path": path, "created_at": info["created_at"]}}
+    if collection_name:
+        extra["collection_name"] = collection_name
+    manifest = writer.close(extra)
+
+    if manifest["num_chunks"] != info["num_chunks"]:
+        raise IndexStoreError(
+            f"Snapshot {path} declares {info['num_chunks']} chunks but contains {manifest['num_chunks']}"
+        )
+    return manifest
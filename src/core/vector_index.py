@@ -0,0 +1,320 @@
+import os
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from src.core.keyword_index import top_k
+from src.core.metadata_filter import to_where
+from src.utils.exceptions import IndexStoreError
+
+DENSE_DTYPES = ("float16", "int8")
+DENSE_INDEX_TYPES = ("flat", "ivf")
+
+_SEARCH_BLOCK_ROWS = 65536
+_KMEANS_SAMPLE = 100_000
+_KMEANS_ITERATIONS = 10
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so inner product equals cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class DenseIndex:
+    """Flat or IVF cosine index over a memory-mapped float16/int8 matrix.
+
+    Rows are stored in list order for IVF so every inverted list is one
+    contiguous slice; `ids` maps stored rows back to chunk ids.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.logger = logging.getLogger(__name__)
+
+        config_path = os.path.join(index_dir, "dense.json")
+        if not os.path.exists(config_path):
+            raise IndexStoreError(f"No dense index found in {index_dir}")
+        with open(config_path) as f:
+            self.config = json.load(f)
+
+        self.dtype = self.config["dtype"]
+        self.index_type = self.config["index_type"]
+        self.matrix = np.load(os.path.join(index_dir, "dense.npy"), mmap_mode="r")
+        self.ids = np.load(os.path.join(index_dir, "dense_ids.npy"), mmap_mode="r")
+        self.scales = None
+        if self.dtype == "int8":
+            self.scales = np.load(os.path.join(index_dir, "dense_scales.npy"), mmap_mode="r")
+        if self.index_type == "ivf":
+            self.centroids = np.load(os.path.join(index_dir, "ivf_centroids.npy"))
+            self.list_offsets = np.load(os.path.join(index_dir, "ivf_offsets.npy"))
+
+    @classmethod
+    def exists(cls, index_dir: str) -> bool:
+        return os.path.exists(os.path.join(index_dir, "dense.json"))
+
+    @classmethod
+    def build(
+        cls,
+        index_dir: str,
+        vectors: np.ndarray,
+        dtype: str = "float16",
+        index_type: str = "flat",
+        nlist: int = 0,
+        seed: int = 0
+    ) -> "DenseIndex":
+        """Quantize vectors and write a dense index directory.
+
+        Works through the (typically memory-mapped) float32 matrix in blocks
+        of rows and writes the quantized matrix straight to a memory-mapped
+        .npy file, so peak memory is one block plus 8 bytes per vector for
+        row ids (and IVF list assignments) and the k-means sample, not the
+        whole matrix.
+        """
+        if dtype not in DENSE_DTYPES:
+            raise IndexStoreError(f"Unsupported dense dtype: {dtype}")
+        if index_type not in DENSE_INDEX_TYPES:
+            raise IndexStoreError(f"Unsupported dense index type: {index_type}")
+
+        os.makedirs(index_dir, exist_ok=True)
+        num_vectors, dim = vectors.shape
+        ids = np.arange(num_vectors, dtype=np.int64)
+        config = {"dtype": dtype, "index_type": index_type, "num_vectors": num_vectors}
+
+        if index_type == "ivf":
+            nlist = nlist or max(1, int(np.sqrt(num_vectors)))
+            centroids = _spherical_kmeans(vectors, nlist, seed)
+            nlist = len(centroids)
+            assignments = np.empty(num_vectors, dtype=np.int64)
+            for lo in range(0, num_vectors, _SEARCH_BLOCK_ROWS):
+                block = normalize(vectors[lo:lo + _SEARCH_BLOCK_ROWS])
+                assignments[lo:lo + len(block)] = np.argmax(block @ centroids.T, axis=1)
+            ids = np.argsort(assignments, kind="stable")
+            offsets = np.zeros(nlist + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignments, minlength=nlist), out=offsets[1:])
+            del assignments
+            np.save(os.path.join(index_dir, "ivf_centroids.npy"), centroids)
+            np.save(os.path.join(index_dir, "ivf_offsets.npy"), offsets)
+            config["nlist"] = nlist
+
+        matrix = np.lib.format.open_memmap(
+            os.path.join(index_dir, "dense.npy"), mode="w+",
+            dtype=np.int8 if dtype == "int8" else np.float16, shape=(num_vectors, dim)
+        )
+        scales = None
+        if dtype == "int8":
+            scales = np.lib.format.open_memmap(
+                os.path.join(index_dir, "dense_scales.npy"), mode="w+", dtype=np.float32, shape=(num_vectors,)
+            )
+        for lo in range(0, num_vectors, _SEARCH_BLOCK_ROWS):
+            rows = ids[lo:lo + _SEARCH_BLOCK_ROWS]
+            # IVF stores rows in list order; ids within a list are ascending
+            block = normalize(vectors[rows] if index_type == "ivf" else vectors[lo:lo + len(rows)])
+            if scales is not None:
+                block_scales = np.maximum(np.abs(block).max(axis=1), 1e-12) / 127.0
+                matrix[lo:lo + len(rows)] = np.round(block / block_scales[:, None]).astype(np.int8)
+                scales[lo:lo + len(rows)] = block_scales
+            else:
+                matrix[lo:lo + len(rows)] = block.astype(np.float16)
+        matrix.flush()
+        del matrix
+        if scales is not None:
+            scales.flush()
+            del scales
+
+        np.save(os.path.join(index_dir, "dense_ids.npy"), ids)
+        with open(os.path.join(index_dir, "dense.json"), "w") as f:
+            json.dump(config, f, indent=2)
+
+        return cls(index_dir)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _score(self, queries: np.ndarray, start: int, end: int) -> np.ndarray:
+        block = self.matrix[start:end].astype(np.float32)
+        scores = queries @ block.T
+        if self.scales is not None:
+            scores *= self.scales[start:end]
+        return scores
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 4,
+        nprobe: int = 8,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Batched top-k search; returns (chunk ids, scores), each (n_queries, <=k).
+
+        A boolean mask over chunk ids restricts the search to allowed chunks.
+        Selective masks are searched exactly over just the allowed rows.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        row_mask = None
+        if mask is not None:
+            row_mask = mask[self.ids]
+            rows = np.flatnonzero(row_mask)
+            if self.index_type != "ivf" or len(rows) <= _SEARCH_BLOCK_ROWS:
+                return self._search_rows(queries, rows, k)
+        if self.index_type == "ivf":
+            return self._search_ivf(queries, k, nprobe, row_mask)
+        return self._search_flat(queries, k)
+
+    def _search_flat(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(self.ids), _SEARCH_BLOCK_ROWS):
+            end = min(start + _SEARCH_BLOCK_ROWS, len(self.ids))
+            rows, scores = _partition_top_k(
+                np.arange(start, end, dtype=np.int64), self._score(queries, start, end), k
+            )
+            best_rows, best_scores = _partition_top_k(
+                np.concatenate([best_rows, rows], axis=1),
+                np.concatenate([best_scores, scores], axis=1),
+                k
+            )
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return self.ids[best_rows], np.take_along_axis(best_scores, order, axis=1)
+
+    def _search_rows(self, queries: np.ndarray, rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact search over a subset of rows, gathered block by block"""
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(rows), _SEARCH_BLOCK_ROWS):
+            block_rows = rows[start:start + _SEARCH_BLOCK_ROWS]
+            scores = queries @ self.matrix[block_rows].astype(np.float32).T
+            if self.scales is not None:
+                scores *= self.scales[block_rows]
+            best_rows, best_scores = _partition_top_k(
+                np.concatenate([best_rows, np.broadcast_to(block_rows, scores.shape)], axis=1),
+                np.concatenate([best_scores, scores], axis=1),
+                k
+            )
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return self.ids[best_rows], np.take_along_axis(best_scores, order, axis=1)
+
+    def _search_ivf(
+        self,
+        queries: np.ndarray,
+        k: int,
+        nprobe: int,
+        row_mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        nprobe = min(nprobe, len(self.centroids))
+        probes = np.argpartition(-(queries @ self.centroids.T), nprobe - 1, axis=1)[:, :nprobe]
+        all_ids, all_scores = [], []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate([
+                np.arange(self.list_offsets[l], self.list_offsets[l + 1]) for l in lists
+            ])
+            if row_mask is not None:
+                rows = rows[row_mask[rows]]
+            block = self.matrix[rows].astype(np.float32)
+            scores = block @ query
+            if self.scales is not None:
+                scores *= self.scales[rows]
+            ids, scores = top_k(self.ids[rows], scores, k)
+            all_ids.append(ids)
+            all_scores.append(scores)
+        return _pad(all_ids, k, -1, np.int64), _pad(all_scores, k, -np.inf, np.float32)
+
+
+class NumpyVectorStore(VectorStore):
+    """Read-only LangChain vector store backed by a DenseIndex and an IndexStore"""
+
+    def __init__(self, dense_index: DenseIndex, store: Any, embedding: Embeddings, nprobe: int = 8):
+        self.dense_index = dense_index
+        self.store = store
+        self.embedding = embedding
+        self.nprobe = nprobe
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, **kwargs) -> List[str]:
+        raise NotImplementedError("NumpyVectorStore is read-only; rebuild the index instead")
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, **kwargs):
+        raise NotImplementedError("Build the index with scripts/setup_vectorstore.py")
+
+    def similarity_search_with_score_by_vectors(
+        self,
+        embeddings: List[List[float]],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """Search many query vectors in one batched matrix product.
+
+        `filter` is a Chroma-style `where` clause, evaluated as a cached bitmap.
+        """
+        mask = self.store.filter_mask(to_where(filter)) if filter else None
+        ids, scores = self.dense_index.search(np.asarray(embeddings), k, self.nprobe, mask)
+        return [
+            [(self.store.get_document(int(i)), float(s)) for i, s in zip(row_ids, row_scores) if i >= 0]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vectors([embedding], k, filter)[0]]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vectors([self.embedding.embed_query(query)], k, filter)[0]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None, **kwargs
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+
+def _spherical_kmeans(vectors: np.ndarray, nlist: int, seed: int) -> np.ndarray:
+    """Cosine k-means on a sample of the vectors"""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > _KMEANS_SAMPLE:
+        # Sorted, so a memory-mapped matrix is read front to back
+        sample = normalize(vectors[np.sort(rng.choice(len(vectors), _KMEANS_SAMPLE, replace=False))])
+    else:
+        sample = normalize(vectors)
+    nlist = min(nlist, len(sample))
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = sample[assignments == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = normalize(centroids)
+    return centroids
+
+
+def _partition_top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the k best columns of each row of scores, unordered"""
+    rows = np.broadcast_to(rows, scores.shape)
+    if scores.shape[1] <= k:
+        return np.array(rows), scores
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(rows, part, axis=1), np.take_along_axis(scores, part, axis=1)
+
+
+def _pad(rows: List[np.ndarray], k: int, fill, dtype) -> np.ndarray:
+    out = np.full((len(rows), k), fill, dtype=dtype)
+    for i, row in enumerate(rows):
+        out[i, :len(row)] = row
+    return out
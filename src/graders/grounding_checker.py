@@ -0,0 +1,174 @@
+import re
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from src.utils.cache import TTLCache
+
+GROUNDED = "grounded"
+UNGROUNDED = "ungrounded"
+AMBIGUOUS = "ambiguous"
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d")
+# Words that flip a claim; "t" is what _WORD leaves of "n't"
+_NEGATIONS = {"no", "not", "never", "none", "nor", "neither", "cannot", "without", "t"}
+
+
+def split_sentences(text: str, min_words: int = 3) -> List[str]:
+    """Split text into sentences, dropping fragments too short to judge"""
+    sentences = (s.strip() for s in _SENTENCE_END.split(text))
+    return [s for s in sentences if len(_WORD.findall(s)) >= min_words]
+
+
+def ngrams(tokens: List[str], n: int) -> Set[Tuple[str, ...]]:
+    return {tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)}
+
+
+class GroundingChecker:
+    """Cheap grounding check of a generation against its retrieved documents.
+
+    Every sentence of the generation is scored by word n-gram overlap with
+    the documents and by its best embedding similarity to any document. A
+    sentence is supported only if both scores are high and every number and
+    negation in it sits inside an n-gram found in the documents, so a copied
+    sentence with one number changed or a "not" added still goes to the
+    grader. It is unsupported if both scores are low. The generation is grounded when every sentence is supported,
+    ungrounded when at least reject_fraction of its sentences are
+    unsupported, and ambiguous otherwise; only ambiguous generations need
+    the LLM hallucination grader. Document vectors are cached by text, so
+    regeneration retries and popular chunks only embed the answer sentences.
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Embeddings] = None,
+        ngram_size: int = 3,
+        overlap_high: float = 0.6,
+        overlap_low: float = 0.1,
+        similarity_high: float = 0.85,
+        similarity_low: float = 0.35,
+        reject_fraction: float = 0.5,
+        document_cache_size: int = 2048,
+        document_cache_ttl: float = 3600.0
+    ):
+        self.embeddings = embeddings
+        self.ngram_size = ngram_size
+        self.overlap_high = overlap_high
+        self.overlap_low = overlap_low
+        self.similarity_high = similarity_high
+        self.similarity_low = similarity_low
+        self.reject_fraction = reject_fraction
+        self.document_vectors = TTLCache(max_size=document_cache_size, ttl_seconds=document_cache_ttl)
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self.counts = {GROUNDED: 0, UNGROUNDED: 0, AMBIGUOUS: 0}
+
+    def check(self, generation: str, documents: List[Document]) -> Dict[str, Any]:
+        """Return {"decision", "supported", "unsupported", "sentences"} for a generation"""
+        sentences = split_sentences(generation)
+        texts = [doc.page_content for doc in documents if doc.page_content]
+        if not sentences or not texts:
+            return self._result(AMBIGUOUS, [])
+
+        overlaps = self._overlaps(sentences, texts)
+        similarities = self._similarities(sentences, texts)
+
+        scored = []
+        for sentence, (overlap, claims_matched), similarity in zip(sentences, overlaps, similarities):
+            high = (
+                overlap >= self.overlap_high and claims_matched
+                and similarity is not None and similarity >= self.similarity_high
+            )
+            low = overlap <= self.overlap_low and (similarity is None or similarity <= self.similarity_low)
+            scored.append({
+                "sentence": sentence,
+                "overlap": round(float(overlap), 3),
+                "similarity": None if similarity is None else round(float(similarity), 3),
+                "support": "supported" if high else "unsupported" if low else "uncertain",
+            })
+
+        unsupported = sum(1 for s in scored if s["support"] == "unsupported")
+        if all(s["support"] == "supported" for s in scored):
+            decision = GROUNDED
+        elif unsupported >= self.reject_fraction * len(scored):
+            decision = UNGROUNDED
+        else:
+            decision = AMBIGUOUS
+        return self._result(decision, scored)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = sum(self.counts.values())
+            return {
+                **self.counts,
+                "llm_calls_avoided_rate": (total - self.counts[AMBIGUOUS]) / total if total else 0.0,
+                "document_vectors": self.document_vectors.stats(),
+            }
+
+    def _result(self, decision: str, scored: List[Dict[str, Any]]) -> Dict[str, Any]:
+        with self._lock:
+            self.counts[decision] += 1
+        return {
+            "decision": decision,
+            "supported": sum(1 for s in scored if s["support"] == "supported"),
+            "unsupported": sum(1 for s in scored if s["support"] == "unsupported"),
+            "sentences": scored,
+        }
+
+    def _overlaps(self, sentences: List[str], texts: List[str]) -> List[Tuple[float, bool]]:
+        """Fraction of each sentence's n-grams found anywhere in the documents.
+
+        Also whether each of its numbers and negations is part of a matched n-gram.
+        """
+        n = self.ngram_size
+        doc_grams: Set[Tuple[str, ...]] = set()
+        doc_words: Set[str] = set()
+        for text in texts:
+            tokens = _WORD.findall(text.lower())
+            doc_grams |= ngrams(tokens, n)
+            doc_words.update(tokens)
+
+        overlaps = []
+        for sentence in sentences:
+            tokens = _WORD.findall(sentence.lower())
+            grams = ngrams(tokens, n)
+            claims = [i for i, t in enumerate(tokens) if t in _NEGATIONS or _NUMBER.search(t)]
+            if grams:
+                matched = {
+                    i for i in range(len(tokens) - n + 1) if tuple(tokens[i:i + n]) in doc_grams
+                }
+                claims_matched = all(
+                    any(start in matched for start in range(max(0, i - n + 1), i + 1)) for i in claims
+                )
+                overlaps.append((len(grams & doc_grams) / len(grams), claims_matched))
+            else:
+                claims_matched = all(tokens[i] in doc_words for i in claims)
+                overlaps.append((sum(t in doc_words for t in tokens) / len(tokens), claims_matched))
+        return overlaps
+
+    def _similarities(self, sentences: List[str], texts: List[str]) -> List[Optional[float]]:
+        """Best cosine similarity of each sentence to any document, in one embedding call.
+
+        Only the sentences and documents not seen recently are embedded.
+        """
+        if self.embeddings is None:
+            return [None] * len(sentences)
+        cached = {text: self.document_vectors.get(text) for text in texts}
+        missing = [text for text, vector in cached.items() if vector is None]
+        try:
+            vectors = np.asarray(self.embeddings.embed_documents(sentences + missing), dtype=np.float32)
+        except Exception as e:
+            self.logger.warning(f"Grounding check without embeddings: {e}")
+            return [None] * len(sentences)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        for text, vector in zip(missing, vectors[len(sentences):]):
+            cached[text] = vector
+            self.document_vectors.put(text, vector)
+        document_vectors = np.stack([cached[text] for text in texts])
+        similarity = vectors[:len(sentences)] @ document_vectors.T
+        return list(similarity.max(axis=1))
@@ -1,21 +1,61 @@
-from typing import List
+import time
+import hashlib
+from typing import Any, Dict, List, Optional
 from langchain.docstore.document import Document
 
 def format_docs(docs: List[Document]) -> str:
     """Format documents for context"""
     return "\n\n".join(doc.page_content for doc in docs)
 
+def summarize_sources(docs: List[Document], limit: int = 3, max_chars: int = 200) -> List[Dict[str, Any]]:
+    """Truncated content and metadata of the top documents, for API responses"""
+    return [
+        {
+            "content": doc.page_content[:max_chars] + "..." if len(doc.page_content) > max_chars else doc.page_content,
+            "metadata": doc.metadata if hasattr(doc, 'metadata') else {}
+        }
+        for doc in docs[:limit]
+    ]
+
+def clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only scalar metadata values that can be serialized"""
+    return {
+        k: v for k, v in metadata.items() 
+        if isinstance(v, (str, int, float, bool))
+    }
+
 def filter_complex_metadata(documents: List[Document]) -> List[Document]:
     """Filter out complex metadata that can't be serialized"""
     filtered_docs = []
     for doc in documents:
         if isinstance(doc, Document) and hasattr(doc, 'metadata'):
-            cleaned_metadata = {
-                k: v for k, v in doc.metadata.items() 
-                if isinstance(v, (str, int, float, bool))
-            }
             filtered_docs.append(Document(
                 page_content=doc.page_content, 
-                metadata=cleaned_metadata
+                metadata=clean_metadata(doc.metadata)
             ))
-    return filtered_docs
\ No newline at end of file
+    return filtered_docs
+
+def assign_chunk_ids(documents: List[Document], seen: Optional[Dict[str, int]] = None) -> List[str]:
+    """Attach a stable content-derived chunk_id to each document's metadata.
+    
+    Pass the same `seen` dict across batches to keep ids unique over a stream.
+    """
+    ids = []
+    seen = {} if seen is None else seen
+    for doc in documents:
+        digest = hashlib.sha1(
+            f"{doc.metadata.get('source', '')}\x00{doc.page_content}".encode("utf-8")
+        ).hexdigest()[:16]
+        count = seen.get(digest, 0)
+        seen[digest] = count + 1
+        chunk_id = digest if count == 0 else f"{digest}-{count}"
+        doc.metadata["chunk_id"] = chunk_id
+        ids.append(chunk_id)
+    return ids
+
+def stamp_ingested_at(documents: List[Document], timestamp: Optional[int] = None) -> int:
+    """Record the ingest time (epoch seconds) in each document's metadata for date filters"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    for doc in documents:
+        doc.metadata["ingested_at"] = timestamp
+    return timestamp
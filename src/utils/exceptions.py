@@ -12,4 +12,8 @@ class EmbeddingError(RAGSystemError):
 
 class GradingError(RAGSystemError):
     """Raised when grading operations fail"""
-    pass
\ No newline at end of file
+    pass
+
+class IndexStoreError(RAGSystemError):
+    """Raised when the on-disk retrieval index is missing or invalid"""
+    pass
@@ -1,15 +1,150 @@
-import logging
 import sys
-from typing import Optional
-
-def setup_logging(level: str = "INFO") -> logging.Logger:
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=getattr(logging, level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler('rag_system.log')
-        ]
-    )
+import json
+import queue
+import atexit
+import random
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Loggers that emit several lines per request; sampling only applies to these
+HOT_PATH_LOGGERS: Tuple[str, ...] = (
+    "src.workflow.nodes",
+    "src.workflow.edges",
+    "src.graders",
+    "src.agents",
+    "src.core.retriever",
+)
+
+# Attributes every LogRecord has; anything else was passed via `extra`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+_sampling_filter: Optional["SamplingFilter"] = None
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any `extra` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of INFO/DEBUG records from the hot-path loggers"""
+
+    def __init__(self, rate: float, loggers: Tuple[str, ...] = HOT_PATH_LOGGERS):
+        super().__init__()
+        self.rate = rate
+        self.loggers = loggers
+        # Filters run on the logging threads before the handler lock is taken
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not record.name.startswith(self.loggers):
+            return True
+        if random.random() < self.rate:
+            return True
+        with self._lock:
+            self.dropped += 1
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the listener thread without formatting them or waiting on a full queue.
+
+    The record is enqueued as is, so message interpolation happens on the
+    listener thread; log arguments should therefore not be mutated after
+    the call.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stop_listener() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def setup_logging(
+    level: str = "INFO",
+    json_format: bool = False,
+    use_queue: bool = False,
+    sample_rate: float = 1.0,
+    queue_size: int = 10000,
+    log_file: str = 'rag_system.log'
+) -> logging.Logger:
+    """Setup logging configuration.
+
+    With use_queue, callers only enqueue records and a background listener
+    formats and writes them to stdout and the log file; records are dropped,
+    not waited on, when the queue is full. sample_rate < 1 keeps that
+    fraction of INFO/DEBUG records from the per-request loggers. Calling it
+    again replaces the previous configuration.
+    """
+    global _listener, _queue_handler, _sampling_filter, _atexit_registered
+    _stop_listener()
+
+    formatter = JsonFormatter() if json_format else logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout), logging.FileHandler(log_file)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    _queue_handler = None
+    if use_queue:
+        log_queue = queue.Queue(maxsize=queue_size)
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        if not _atexit_registered:
+            atexit.register(_stop_listener)
+            _atexit_registered = True
+        _queue_handler = NonBlockingQueueHandler(log_queue)
+        handlers = [_queue_handler]
+
+    _sampling_filter = SamplingFilter(sample_rate) if sample_rate < 1.0 else None
+    if _sampling_filter is not None:
+        for handler in handlers:
+            handler.addFilter(_sampling_filter)
+
+    logging.basicConfig(level=getattr(logging, level.upper()), handlers=handlers, force=True)
     return logging.getLogger(__name__)
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Queue backlog and records dropped by a full queue or by sampling"""
+    return {
+        "queued": _queue_handler.queue.qsize() if _queue_handler else 0,
+        "dropped_queue_full": _queue_handler.dropped if _queue_handler else 0,
+        "sampled_out": _sampling_filter.dropped if _sampling_filter else 0,
+    }
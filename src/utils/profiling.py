@@ -0,0 +1,194 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+from langchain_core.callbacks import BaseCallbackHandler
+
+# cProfile and tracemalloc are process-wide, so profiled requests run one at a time
+_PROFILE_LOCK = threading.Lock()
+
+
+class SpanRecorder(BaseCallbackHandler):
+    """LangChain callback recording wall-clock spans of graph nodes, chains, LLM and tool calls"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self._open: Dict[UUID, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, kind: str, name: Optional[str], run_id: UUID, parent_run_id: Optional[UUID]) -> None:
+        with self._lock:
+            self._open[run_id] = {
+                "name": name or kind,
+                "kind": kind,
+                "start": time.perf_counter() - self.origin,
+                "thread": threading.get_ident(),
+                "parent": self._open.get(parent_run_id, {}).get("name"),
+            }
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            span["seconds"] = time.perf_counter() - self.origin - span["start"]
+            if error is not None:
+                span["error"] = str(error)
+            self.spans.append(span)
+
+    @staticmethod
+    def _name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any]) -> Optional[str]:
+        return kwargs.get("name") or (serialized or {}).get("name")
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = self._name(serialized, kwargs)
+        # LangGraph tags the runnable of each node with its node name
+        kind = "node" if name and (kwargs.get("metadata") or {}).get("langgraph_node") == name else "chain"
+        self._start(kind, name, run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", self._name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._start("llm", self._name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start("tool", self._name(serialized, kwargs), run_id, parent_run_id)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def trace_events(self) -> Dict[str, Any]:
+        """Spans in Chrome trace event format, which speedscope and Perfetto open directly"""
+        pid = os.getpid()
+        events = [
+            {
+                "name": span["name"],
+                "cat": span["kind"],
+                "ph": "X",
+                "ts": span["start"] * 1e6,
+                "dur": span["seconds"] * 1e6,
+                "pid": pid,
+                "tid": span["thread"],
+                "args": {key: span[key] for key in ("parent", "error") if span.get(key)},
+            }
+            for span in sorted(self.spans, key=lambda s: s["start"])
+        ]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class RequestProfiler:
+    """Profile one workflow run: CPU profile, node/LLM spans and peak memory.
+
+    Use as a context manager and pass `callbacks` in the workflow's config.
+    On exit it writes <name>.prof (pstats, snakeviz, flameprof),
+    <name>.trace.json (speedscope, Perfetto, chrome://tracing) and
+    <name>.memory.txt (top allocation sites still alive at the end) under
+    output_dir, and `summary` holds the headline numbers. The CPU profile
+    covers the calling thread, where LangGraph runs single-node steps;
+    memory is traced process-wide, so concurrent unprofiled requests can
+    add to the allocation numbers.
+    """
+
+    def __init__(self, output_dir: str, name: str, top_n: int = 25):
+        self.output_dir = output_dir
+        self.name = name
+        self.top_n = top_n
+        self.spans = SpanRecorder()
+        self.summary: Dict[str, Any] = {}
+        self.logger = logging.getLogger(__name__)
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    @property
+    def callbacks(self) -> List[BaseCallbackHandler]:
+        return [self.spans]
+
+    def __enter__(self) -> "RequestProfiler":
+        _PROFILE_LOCK.acquire()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self.spans.origin = self._start
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self._profile.disable()
+            wall_seconds = time.perf_counter() - self._start
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+            self._write(wall_seconds, peak, snapshot)
+        except Exception as e:
+            self.logger.error(f"Error writing profile {self.name}: {e}")
+        finally:
+            _PROFILE_LOCK.release()
+
+    def _write(self, wall_seconds: float, peak: int, snapshot: tracemalloc.Snapshot) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, self.name)
+        files = {"cpu": base + ".prof", "spans": base + ".trace.json", "memory": base + ".memory.txt"}
+
+        self._profile.dump_stats(files["cpu"])
+        with open(files["spans"], "w") as f:
+            json.dump(self.spans.trace_events(), f)
+        allocations = snapshot.statistics("lineno")[:self.top_n]
+        with open(files["memory"], "w") as f:
+            f.write(f"Peak traced memory: {peak / 2**20:.1f} MiB\n")
+            f.write(f"Top {len(allocations)} allocation sites alive at the end of the request:\n")
+            for stat in allocations:
+                f.write(f"{stat}\n")
+
+        stats = pstats.Stats(self._profile)
+        top_functions = [
+            {
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "calls": calls,
+                "cumulative_seconds": round(cumulative, 4),
+            }
+            for (filename, line, function), (_, calls, _, cumulative, _) in sorted(
+                stats.stats.items(), key=lambda item: item[1][3], reverse=True
+            )[:10]
+        ]
+        self.summary = {
+            "files": files,
+            "wall_seconds": round(wall_seconds, 4),
+            "peak_memory_bytes": peak,
+            "spans": [
+                {"name": s["name"], "kind": s["kind"], "seconds": round(s["seconds"], 4)}
+                for s in sorted(self.spans.spans, key=lambda s: s["start"])
+                if s["kind"] != "chain" and s["name"] != "__start__"
+            ],
+            "top_functions": top_functions,
+        }
+        self.logger.info(f"Wrote profile {self.name} to {self.output_dir} ({wall_seconds:.2f}s, peak {peak / 2**20:.1f} MiB)")
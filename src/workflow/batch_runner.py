@@ -0,0 +1,92 @@
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from langchain.docstore.document import Document
+from src.core.retriever import HybridRetriever
+from src.utils.document_utils import summarize_sources
+
+class BatchQuestionRunner:
+    def __init__(
+        self,
+        app,
+        hybrid_retriever: HybridRetriever,
+        max_concurrency: int = 4,
+        top_k: int = 10,
+        final_k: int = 5
+    ):
+        self.app = app
+        self.hybrid_retriever = hybrid_retriever
+        self.max_concurrency = max_concurrency
+        self.top_k = top_k
+        self.final_k = final_k
+        self.logger = logging.getLogger(__name__)
+    
+    def workers(self, num_questions: int, max_concurrency: Optional[int] = None) -> int:
+        """Graph runs a batch may have in flight; callers can lower, not raise, the configured cap"""
+        requested = min(max_concurrency or self.max_concurrency, self.max_concurrency)
+        return max(1, min(requested, num_questions or 1))
+    
+    def run(
+        self,
+        questions: List[str],
+        max_concurrency: Optional[int] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Answer many questions with shared retrieval and bounded graph concurrency"""
+        start = time.perf_counter()
+        workers = self.workers(len(questions), max_concurrency)
+        self.logger.info(f"Running batch of {len(questions)} questions with concurrency {workers}")
+        
+        # Embedding, search and rerank for every question at once; questions
+        # the router sends to web search simply ignore their prefetched documents
+        prefetched = self.hybrid_retriever.retrieve_and_rerank_batch(
+            questions, top_k=self.top_k, final_k=self.final_k, filters=filters
+        )
+        retrieval_seconds = time.perf_counter() - start
+        
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(self._answer, questions, prefetched))
+        
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for result in results if result["error"])
+        self.logger.info(
+            f"Batch finished: {len(questions)} questions in {elapsed:.2f}s "
+            f"({len(questions) / elapsed if elapsed else 0.0:.2f} q/s), {failed} failed"
+        )
+        return {
+            "results": results,
+            "succeeded": len(results) - failed,
+            "failed": failed,
+            "retrieval_seconds": retrieval_seconds,
+            "total_seconds": elapsed,
+            "questions_per_second": len(questions) / elapsed if elapsed else 0.0
+        }
+    
+    def _answer(self, question: str, documents: List[Document]) -> Dict[str, Any]:
+        """Run the graph for one question, capturing its own error"""
+        start = time.perf_counter()
+        try:
+            final_output = self.app.invoke({
+                "question": question,
+                "prefetched_documents": documents
+            })
+            if not final_output or "generation" not in final_output:
+                raise ValueError("Failed to generate answer")
+            
+            return {
+                "question": question,
+                "answer": final_output["generation"],
+                "sources": summarize_sources(final_output.get("documents") or []),
+                "error": None,
+                "latency_seconds": time.perf_counter() - start
+            }
+        except Exception as e:
+            self.logger.error(f"Error processing question '{question[:100]}': {e}")
+            return {
+                "question": question,
+                "answer": None,
+                "sources": [],
+                "error": str(e),
+                "latency_seconds": time.perf_counter() - start
+            }
@@ -1,8 +1,10 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.router_agent import RouterAgent
 from src.graders.hallucination_grader import HallucinationGrader
 from src.graders.answer_grader import AnswerGrader
+from src.graders.grounding_checker import GROUNDED, UNGROUNDED, GroundingChecker
+from src.core.session_cache import SessionRetrievalCache
 from src.utils.document_utils import format_docs
 
 class WorkflowEdges:
@@ -10,11 +12,17 @@ class WorkflowEdges:
         self,
         router_agent: RouterAgent,
         hallucination_grader: HallucinationGrader,
-        answer_grader: AnswerGrader
+        answer_grader: AnswerGrader,
+        grounding_checker: Optional[GroundingChecker] = None,
+        session_cache: Optional[SessionRetrievalCache] = None,
+        final_k: int = 5
     ):
         self.router_agent = router_agent
         self.hallucination_grader = hallucination_grader
         self.answer_grader = answer_grader
+        self.grounding_checker = grounding_checker
+        self.session_cache = session_cache
+        self.final_k = final_k
         self.logger = logging.getLogger(__name__)
     
     def route_question(self, state: Dict[str, Any]) -> str:
@@ -22,6 +30,14 @@ class WorkflowEdges:
         self.logger.info("---ROUTE QUESTION---")
         question = state["question"]
         
+        session_id = state.get("session_id")
+        if session_id and self.session_cache is not None and self.session_cache.lookup(
+            session_id, question, state.get("filters"), self.final_k
+        ) is not None:
+            # The session's documents cover this follow-up; no need to ask the router
+            self.logger.info("---ROUTE QUESTION TO RAG (SESSION)---")
+            return "vectorstore"
+        
         datasource = self.router_agent.route_question(question)
         
         if datasource == 'web_search':
@@ -50,16 +66,8 @@ class WorkflowEdges:
         documents = state["documents"]
         generation = state["generation"]
         
-        # Format documents for grading
-        documents_text = format_docs(documents)
-        
         # Check for hallucinations
-        hallucination_score = self.hallucination_grader.grade(
-            documents=documents_text,
-            generation=generation,
-            question=question
-        )
-        hallucination_grade = hallucination_score.get('score', 'no')
+        hallucination_grade = self._grade_grounding(question, documents, generation)
         
         if hallucination_grade.lower() == "yes":
             self.logger.info("---DECISION: GENERATION IS GROUNDED IN DOCUMENTS---")
@@ -80,4 +88,26 @@ class WorkflowEdges:
                 return "not useful"
         else:
             self.logger.info("---DECISION: GENERATION IS NOT GROUNDED IN DOCUMENTS, RE-TRY---")
-            return "not supported"
\ No newline at end of file
+            return "not supported"
+    
+    def _grade_grounding(self, question: str, documents, generation: str) -> str:
+        """Cheap lexical/embedding pre-check, falling back to the LLM grader when ambiguous"""
+        if self.grounding_checker is not None:
+            check = self.grounding_checker.check(generation, documents)
+            self.logger.info(
+                "Grounding pre-check: %s (%d supported, %d unsupported sentences)",
+                check["decision"], check["supported"], check["unsupported"]
+            )
+            if check["decision"] == GROUNDED:
+                return "yes"
+            if check["decision"] == UNGROUNDED:
+                return "no"
+        
+        # Format documents for grading
+        documents_text = format_docs(documents)
+        hallucination_score = self.hallucination_grader.grade(
+            documents=documents_text,
+            generation=generation,
+            question=question
+        )
+        return hallucination_score.get('score', 'no')
@@ -0,0 +1,188 @@
+import os
+import json
+import math
+import time
+import hashlib
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from src.utils.profiling import RequestProfiler
+
+def iter_question_records(
+    path: str,
+    question_field: str = "question",
+    id_field: str = "id"
+) -> Iterator[Dict[str, Any]]:
+    """Stream {"id", "question"} records from a JSONL file"""
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            question = record.get(question_field)
+            if not question:
+                raise ValueError(f"Line {line_number} of {path} has no '{question_field}' field")
+            record_id = record.get(id_field)
+            if record_id is None:
+                record_id = question_id(question)
+            yield {"id": str(record_id), "question": question}
+
+def question_id(question: str) -> str:
+    """Stable id for records that do not carry one"""
+    return hashlib.sha1(question.encode("utf-8")).hexdigest()[:12]
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+class EvaluationRunner:
+    """Run questions through the workflow with a worker pool, writing JSONL as results finish.
+
+    Results already present in the output file are skipped, so an interrupted
+    run resumes where it stopped. Questions that failed are run again and
+    their new record carries its "attempt" number; the record with the
+    highest attempt for an id supersedes the earlier ones. Node timings are measured between streamed
+    graph updates, so each node's time includes the conditional edge evaluated
+    after it (e.g. the graders after "generate", routing before the first node).
+    With profile_dir set, every question is profiled into that directory;
+    profiled questions run one at a time.
+    """
+
+    def __init__(self, app, workers: int = 1, profile_dir: Optional[str] = None):
+        self.app = app
+        self.workers = max(1, workers)
+        self.profile_dir = profile_dir
+        self.logger = logging.getLogger(__name__)
+
+    def run(
+        self,
+        records: Iterable[Dict[str, Any]],
+        output_path: str,
+        resume: bool = True,
+        on_result: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Answer every record not yet in output_path and return summary statistics"""
+        done, attempts = self._previous_attempts(output_path) if resume else (set(), {})
+        if done:
+            self.logger.info(f"Resuming: {len(done)} questions already finished in {output_path}")
+
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        if resume:
+            self._terminate_partial_line(output_path)
+        latencies, errors, skipped = [], 0, 0
+        start = time.perf_counter()
+
+        with open(output_path, "a" if resume else "w") as out, \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = set()
+            for record in records:
+                if record["id"] in done:
+                    skipped += 1
+                    continue
+                # Bound in-flight work so the question file is streamed, not loaded
+                if len(pending) >= self.workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    errors += self._write(finished, out, latencies, on_result)
+                record = {**record, "attempt": attempts.get(record["id"], 0) + 1}
+                pending.add(pool.submit(self.run_one, record))
+            errors += self._write(pending, out, latencies, on_result)
+
+        elapsed = time.perf_counter() - start
+        summary = {
+            "completed": len(latencies),
+            "errors": errors,
+            "skipped": skipped,
+            "total_seconds": elapsed,
+            "questions_per_second": len(latencies) / elapsed if elapsed else 0.0,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p90": percentile(latencies, 90),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+        }
+        self.logger.info(f"Evaluation finished: {summary}")
+        return summary
+
+    def run_one(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one question, recording per-node timings, route and retries"""
+        if self.profile_dir:
+            with RequestProfiler(self.profile_dir, f"question-{record['id']}") as profiler:
+                result = self._run_one(record, {"callbacks": profiler.callbacks})
+            result["profile"] = profiler.summary
+            return result
+        return self._run_one(record)
+
+    def _run_one(self, record: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        nodes, final_output, error = [], None, None
+        start = last = time.perf_counter()
+        try:
+            for output in self.app.stream({"question": record["question"]}, config=config):
+                now = time.perf_counter()
+                for key, value in output.items():
+                    nodes.append({"node": key, "seconds": now - last})
+                    final_output = value
+                last = now
+            if not final_output or "generation" not in final_output:
+                raise ValueError("Failed to generate answer")
+        except Exception as e:
+            self.logger.error(f"Error processing question '{record['question'][:100]}': {e}")
+            error = str(e)
+
+        path = [step["node"] for step in nodes]
+        return {
+            "id": record["id"],
+            "attempt": record.get("attempt", 1),
+            "question": record["question"],
+            "answer": final_output.get("generation") if final_output and not error else None,
+            "error": error,
+            "latency_seconds": time.perf_counter() - start,
+            "route": "websearch" if path and path[0] == "websearch" else "vectorstore",
+            "path": path,
+            "generate_retries": max(0, path.count("generate") - 1),
+            "websearch_count": path.count("websearch"),
+            "node_timings": nodes,
+        }
+
+    def _write(self, futures, out, latencies: List[float], on_result) -> int:
+        errors = 0
+        for future in futures:
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            if result["error"]:
+                errors += 1
+            else:
+                latencies.append(result["latency_seconds"])
+            if on_result:
+                on_result(result)
+        return errors
+
+    def _terminate_partial_line(self, output_path: str) -> None:
+        """Make sure appended results do not run into a line cut off by a crash"""
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            return
+        with open(output_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+    def _previous_attempts(self, output_path: str) -> Tuple[Set[str], Dict[str, int]]:
+        """Ids of successfully answered questions, and the records written so far per id"""
+        done, attempts = set(), {}
+        if not os.path.exists(output_path):
+            return done, attempts
+        with open(output_path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    # Partial last line from a crash
+                    continue
+                attempts[result["id"]] = attempts.get(result["id"], 0) + 1
+                if not result.get("error"):
+                    done.add(result["id"])
+        return done, attempts
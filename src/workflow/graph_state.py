@@ -1,5 +1,7 @@
 from typing_extensions import TypedDict
-from typing import List
+from typing import Any, Dict, List
+from langchain.docstore.document import Document
+from src.core.query_context import QueryContext
 
 class GraphState(TypedDict):
     """
@@ -10,8 +12,18 @@ class GraphState(TypedDict):
         generation: LLM generation
         web_search: whether to add search
         documents: list of documents 
+        prefetched_documents: documents retrieved ahead of time by a batch run
+        filters: metadata filters restricting retrieval
+        session_id: conversation whose graded documents may answer follow-ups
+        session_hit: documents came from the session cache and are already graded
+        query_context: the question's embedding, tokens and fused candidates, shared by every stage
     """
     question: str
     generation: str
     web_search: str
-    documents: List[str]
\ No newline at end of file
+    documents: List[str]
+    prefetched_documents: List[Document]
+    filters: Dict[str, Any]
+    session_id: str
+    session_hit: bool
+    query_context: QueryContext
\ No newline at end of file
@@ -1,12 +1,14 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from src.agents.rag_agent import RAGAgent
 from src.agents.web_search_agent import WebSearchAgent
 from src.agents.router_agent import RouterAgent
 from src.graders.relevance_grader import RelevanceGrader
 from src.graders.hallucination_grader import HallucinationGrader
 from src.graders.answer_grader import AnswerGrader
-from src.core.hybrid_retriever import HybridRetriever
+from src.core.query_context import QueryContext, QueryContextStats
+from src.core.retriever import HybridRetriever
+from src.core.session_cache import SessionRetrievalCache
 from src.utils.document_utils import format_docs
 
 class WorkflowNodes:
@@ -18,7 +20,11 @@ class WorkflowNodes:
         router_agent: RouterAgent,
         relevance_grader: RelevanceGrader,
         hallucination_grader: HallucinationGrader,
-        answer_grader: AnswerGrader
+        answer_grader: AnswerGrader,
+        session_cache: Optional[SessionRetrievalCache] = None,
+        top_k: int = 10,
+        final_k: int = 5,
+        query_stats: Optional[QueryContextStats] = None
     ):
         self.hybrid_retriever = hybrid_retriever
         self.rag_agent = rag_agent
@@ -27,6 +33,10 @@ class WorkflowNodes:
         self.relevance_grader = relevance_grader
         self.hallucination_grader = hallucination_grader
         self.answer_grader = answer_grader
+        self.session_cache = session_cache
+        self.top_k = top_k
+        self.final_k = final_k
+        self.query_stats = query_stats
         self.logger = logging.getLogger(__name__)
     
     def retrieve(self, state: Dict[str, Any]) -> Dict[str, Any]:
@@ -34,15 +44,42 @@ class WorkflowNodes:
         self.logger.info("---RETRIEVE---")
         question = state["question"]
         
-        # Use hybrid retrieval with reranking
-        documents = self.hybrid_retriever.retrieve_and_rerank(
-            query=question,
-            top_k=10,
-            final_k=5
-        )
+        # Batch runs retrieve for all questions up front
+        documents = state.get("prefetched_documents")
+        session_id = state.get("session_id")
+        if documents is None and session_id and self.session_cache is not None:
+            # Follow-up: reuse this session's graded chunks if they still fit
+            documents = self.session_cache.lookup(session_id, question, state.get("filters"), self.final_k)
+            if documents is not None:
+                self.logger.info("---RETRIEVE: REUSING SESSION DOCUMENTS---")
+                return {"documents": documents, "question": question, "session_hit": True}
+        if documents is None:
+            # Use hybrid retrieval with reranking
+            context = self._query_context(state)
+            before = context.summary()
+            documents = self.hybrid_retriever.retrieve_and_rerank(
+                query=question,
+                top_k=self.top_k,
+                final_k=self.final_k,
+                filters=state.get("filters"),
+                context=context
+            )
+            if self.query_stats is not None:
+                after = context.summary()
+                self.query_stats.add({counter: after[counter] - before[counter] for counter in after})
+            return {"documents": documents, "question": question, "query_context": context}
         
         return {"documents": documents, "question": question}
     
+    def _query_context(self, state: Dict[str, Any]) -> QueryContext:
+        """The request's QueryContext, created the first time a stage needs it"""
+        context = state.get("query_context")
+        if context is None or context.question != state["question"]:
+            context = QueryContext(state["question"])
+            if self.query_stats is not None:
+                self.query_stats.record("contexts")
+        return context
+    
     def generate(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Generate answer using RAG on retrieved documents"""
         self.logger.info("---GENERATE---")
@@ -63,6 +100,12 @@ class WorkflowNodes:
         self.logger.info("---CHECK DOCUMENT RELEVANCE TO QUESTION---")
         question = state["question"]
         documents = state["documents"]
+        session_id = state.get("session_id")
+        
+        if state.get("session_hit"):
+            # Graded relevant earlier in the session and rescored for this question
+            self.session_cache.touch(session_id)
+            return {"documents": documents, "question": question, "web_search": "No"}
         
         filtered_docs = []
         web_search = "No"
@@ -81,6 +124,9 @@ class WorkflowNodes:
                 self.logger.info("---GRADE: DOCUMENT NOT RELEVANT---")
                 web_search = "Yes"
         
+        if session_id and self.session_cache is not None and filtered_docs:
+            self.session_cache.store(session_id, filtered_docs, state.get("filters"))
+        
         return {
             "documents": filtered_docs, 
             "question": question, 
@@ -93,13 +139,12 @@ class WorkflowNodes:
         question = state["question"]
         documents = state.get("documents", [])
         
-        # Perform web search
-        web_result = self.web_search_agent.search(question)
+        # Perform web search; each result stays a separate document with its URL
+        web_results = self.web_search_agent.search(question)
+        if not web_results:
+            self.logger.warning("Web search returned no results")
         
         # Add web results to existing documents
-        if documents:
-            documents.append(web_result)
-        else:
-            documents = [web_result]
+        documents = list(documents or []) + web_results
         
         return {"documents": documents, "question": question}
@@ -4,16 +4,23 @@ from config.settings import Settings
 from src.core.document_processor import DocumentProcessor
 from src.core.embeddings import EmbeddingManager
 from src.core.llm_client import LLMClient
-from src.core.hybrid_retriever import HybridRetriever
+from src.core.retriever import HybridRetriever
+from src.core.index_store import IndexStore
+from src.core.index_manager import IndexManager, resolve_index_dir
+from src.core.query_context import QueryContextStats
+from src.core.session_cache import SessionRetrievalCache
+from src.utils.document_utils import stamp_ingested_at
 from src.agents.rag_agent import RAGAgent
 from src.agents.web_search_agent import WebSearchAgent
 from src.agents.router_agent import RouterAgent
 from src.graders.relevance_grader import RelevanceGrader
 from src.graders.hallucination_grader import HallucinationGrader
 from src.graders.answer_grader import AnswerGrader
+from src.graders.grounding_checker import GroundingChecker
 from src.workflow.graph_state import GraphState
 from src.workflow.nodes import WorkflowNodes
 from src.workflow.edges import WorkflowEdges
+from src.workflow.batch_runner import BatchQuestionRunner
 
 class RAGWorkflowBuilder:
     def __init__(self, settings: Settings):
@@ -29,7 +36,10 @@ class RAGWorkflowBuilder:
         self.document_processor = DocumentProcessor(
             chunk_size=self.settings.chunk_size,
             chunk_overlap=self.settings.chunk_overlap,
-            firecrawl_api_key=self.settings.firecrawl_api_key
+            firecrawl_api_key=self.settings.firecrawl_api_key,
+            split_workers=self.settings.split_workers,
+            dedup_threshold=self.settings.dedup_threshold,
+            dedup_num_perm=self.settings.dedup_num_perm
         )
         
         self.embedding_manager = EmbeddingManager(
@@ -46,7 +56,14 @@ class RAGWorkflowBuilder:
         
         # Agents
         self.rag_agent = RAGAgent(self.llm_client.get_regular_llm())
-        self.web_search_agent = WebSearchAgent(self.settings.tavily_api_key)
+        self.web_search_agent = WebSearchAgent(
+            self.settings.tavily_api_key,
+            k=self.settings.web_search_k,
+            cache_size=self.settings.web_search_cache_size,
+            cache_ttl=self.settings.web_search_cache_ttl,
+            timeout=self.settings.web_search_timeout,
+            max_variants=self.settings.web_search_variants
+        )
         self.router_agent = RouterAgent(self.llm_client.get_json_llm())
         
         # Graders
@@ -55,6 +72,20 @@ class RAGWorkflowBuilder:
         self.hallucination_grader = HallucinationGrader(json_llm)
         self.answer_grader = AnswerGrader(json_llm)
         
+        self.session_cache = SessionRetrievalCache(
+            self.hybrid_retriever.score_documents,
+            max_sessions=self.settings.session_max_sessions,
+            ttl_seconds=self.settings.session_ttl,
+            max_documents=self.settings.session_max_documents,
+            min_score=self.settings.session_min_score,
+            min_documents=self.settings.session_min_documents,
+            # Documents from a swapped-out index generation are not reused
+            generation=lambda: self.index_manager.current.name if self.index_manager else None
+        )
+        
+        # Query embeddings and fusions each request reused instead of recomputing
+        self.query_stats = QueryContextStats()
+        
         # Workflow components
         self.nodes = WorkflowNodes(
             hybrid_retriever=self.hybrid_retriever,
@@ -63,19 +94,48 @@ class RAGWorkflowBuilder:
             router_agent=self.router_agent,
             relevance_grader=self.relevance_grader,
             hallucination_grader=self.hallucination_grader,
-            answer_grader=self.answer_grader
+            answer_grader=self.answer_grader,
+            session_cache=self.session_cache,
+            top_k=self.settings.rerank_top_k,
+            final_k=self.settings.final_top_k,
+            query_stats=self.query_stats
         )
         
+        self.grounding_checker = None
+        if self.settings.grounding_precheck:
+            self.grounding_checker = GroundingChecker(
+                embeddings=self.embedding_manager.embeddings,
+                overlap_high=self.settings.grounding_overlap_high,
+                overlap_low=self.settings.grounding_overlap_low,
+                similarity_high=self.settings.grounding_similarity_high,
+                similarity_low=self.settings.grounding_similarity_low
+            )
+        
         self.edges = WorkflowEdges(
             router_agent=self.router_agent,
             hallucination_grader=self.hallucination_grader,
-            answer_grader=self.answer_grader
+            answer_grader=self.answer_grader,
+            grounding_checker=self.grounding_checker,
+            session_cache=self.session_cache,
+            final_k=self.settings.final_top_k
         )
         
         self.logger.info("All components initialized successfully")
     
     def _setup_vectorstore(self):
         """Setup vectorstore and hybrid retriever"""
+        self.index_manager = None
+        if resolve_index_dir(self.settings.index_path):
+            # Prebuilt index from scripts/setup_vectorstore.py: nothing to crawl.
+            # The manager stands in for the retriever and hot-swaps rebuilt generations.
+            self.index_manager = IndexManager(
+                self.settings.index_path,
+                self._load_index_generation,
+                watch_interval=self.settings.index_watch_interval
+            )
+            self.hybrid_retriever = self.index_manager
+            return
+        
         try:
             # Try to load existing vectorstore
             vectorstore = self.embedding_manager.load_vectorstore(
@@ -92,8 +152,10 @@ class RAGWorkflowBuilder:
             
             # Process documents
             documents = self.document_processor.crawl_urls(self.settings.default_urls)
-            doc_splits = self.document_processor.split_documents(documents)
-            filtered_docs = self.document_processor.filter_metadata(doc_splits)
+            filtered_docs = self.document_processor.deduplicate(
+                list(self.document_processor.iter_split_documents(documents))
+            )
+            stamp_ingested_at(filtered_docs)
             
             # Create vectorstore
             vectorstore = self.embedding_manager.create_vectorstore(
@@ -108,16 +170,51 @@ class RAGWorkflowBuilder:
             vectorstore=vectorstore,
             documents=documents,
             semantic_weight=self.settings.semantic_weight,
-            keyword_weight=self.settings.keyword_weight
+            keyword_weight=self.settings.keyword_weight,
+            **self._rerank_options()
         )
     
+    def _load_index_generation(self, index_dir: str) -> HybridRetriever:
+        """Open one index generation and its paired vector collection"""
+        index_store = IndexStore(index_dir)
+        vectorstore = self.embedding_manager.load_vector_backend(
+            backend=self.settings.vector_backend,
+            collection_name=index_store.manifest.get("collection_name", self.settings.collection_name),
+            index_store=index_store,
+            nprobe=self.settings.ivf_nprobe
+        )
+        previous = self.index_manager.current.hybrid_retriever if self.index_manager else None
+        return HybridRetriever(
+            vectorstore=vectorstore,
+            semantic_weight=self.settings.semantic_weight,
+            keyword_weight=self.settings.keyword_weight,
+            index_store=index_store,
+            # Reuse the loaded cross-encoder and keep stats across swaps
+            reranker=previous.reranker if previous else None,
+            rerank_stats=previous.rerank_stats if previous else None,
+            **self._rerank_options()
+        )
+    
+    def _rerank_options(self):
+        """Candidate depth and reranking settings shared by every hybrid retriever setup"""
+        return {
+            "candidate_k": self.settings.retrieval_candidate_k,
+            "rerank_batch_size": self.settings.rerank_batch_size,
+            "rerank_mode": self.settings.rerank_mode,
+            "rerank_margin": self.settings.rerank_margin,
+            "rerank_first_stage_model": self.settings.rerank_first_stage_model,
+            "rerank_first_stage_keep": self.settings.rerank_first_stage_keep,
+            "rerank_audit_rate": self.settings.rerank_audit_rate,
+        }
+    
     def _get_documents_for_hybrid_search(self):
         """Get documents for hybrid search - in production, store these separately"""
         # For now, recreate documents - in production, you'd cache these
         try:
             documents = self.document_processor.crawl_urls(self.settings.default_urls)
-            doc_splits = self.document_processor.split_documents(documents)
-            filtered_docs = self.document_processor.filter_metadata(doc_splits)
+            filtered_docs = self.document_processor.deduplicate(
+                list(self.document_processor.iter_split_documents(documents))
+            )
             return filtered_docs
         except Exception as e:
             self.logger.warning(f"Could not recreate documents for hybrid search: {e}")
@@ -170,4 +267,14 @@ class RAGWorkflowBuilder:
         app = workflow.compile()
         self.logger.info("Workflow compiled successfully")
         
-        return app
\ No newline at end of file
+        return app
+    
+    def build_batch_runner(self, app=None) -> BatchQuestionRunner:
+        """Build a runner answering many questions with shared, batched retrieval"""
+        return BatchQuestionRunner(
+            app=app or self.build_workflow(),
+            hybrid_retriever=self.hybrid_retriever,
+            max_concurrency=self.settings.batch_max_concurrency,
+            top_k=self.settings.rerank_top_k,
+            final_k=self.settings.final_top_k
+        )
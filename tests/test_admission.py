@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from api.admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected
+
+
+async def hold(controller, client_id, order, release, priority=INTERACTIVE, weight=1, deadline=None):
+    async with controller.admit(client_id, priority, deadline=deadline, weight=weight):
+        order.append(client_id)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_interactive_requests_jump_queued_batches():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, per_client_limit=10)
+        order, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, "first", order, release))]
+        await settle()
+        tasks.append(asyncio.create_task(hold(controller, "batch", order, release, priority=BATCH)))
+        await settle()
+        tasks.append(asyncio.create_task(hold(controller, "interactive", order, release)))
+        await settle()
+        release.set()
+        await asyncio.gather(*tasks)
+        return order, controller.running
+
+    order, running = asyncio.run(scenario())
+    assert order == ["first", "interactive", "batch"]
+    assert running == 0
+
+
+def test_weighted_request_waits_for_enough_free_slots():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=3, per_client_limit=10)
+        order, release_one, release_rest = [], asyncio.Event(), asyncio.Event()
+        one = asyncio.create_task(hold(controller, "one", order, release_one))
+        two = asyncio.create_task(hold(controller, "two", order, release_rest))
+        await settle()
+        batch = asyncio.create_task(hold(controller, "batch", order, release_rest, priority=BATCH, weight=2))
+        await settle()
+        assert order == ["one", "two"] and controller.running == 2
+        release_one.set()
+        await settle()
+        assert order == ["one", "two", "batch"] and controller.running == 3
+        release_rest.set()
+        await asyncio.gather(one, two, batch)
+        return controller.running
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_expired_head_lets_waiters_behind_it_start():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=2, per_client_limit=10, initial_service_seconds=0.01)
+        order, release, done = [], asyncio.Event(), asyncio.Event()
+        running = asyncio.create_task(hold(controller, "running", order, done))
+        await settle()
+        heavy = asyncio.create_task(
+            hold(controller, "heavy", order, release, priority=BATCH, weight=2, deadline=0.05)
+        )
+        await settle()
+        light = asyncio.create_task(hold(controller, "light", order, release, priority=BATCH))
+        await settle()
+        assert order == ["running"]
+        with pytest.raises(AdmissionRejected) as rejected:
+            await heavy
+        await settle()
+        # The slot left free behind the expired head is granted without any release
+        assert order == ["running", "light"]
+        release.set()
+        done.set()
+        await asyncio.gather(running, light)
+        return rejected.value, controller
+
+    rejected, controller = asyncio.run(scenario())
+    assert rejected.status_code == 503 and rejected.reason == "expired"
+    assert controller.running == 0 and controller.stats()["queue_depth"] == 0
+
+
+def test_estimated_wait_counts_queued_weight():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=4, per_client_limit=10, initial_service_seconds=10.0)
+        order, release = [], asyncio.Event()
+        tasks = [asyncio.create_task(hold(controller, f"r{i}", order, release)) for i in range(4)]
+        await settle()
+        light_wait = controller.estimated_wait(BATCH)
+        tasks.append(asyncio.create_task(hold(controller, "batch", order, release, priority=BATCH, weight=4)))
+        await settle()
+        heavy_wait = controller.estimated_wait(BATCH)
+        release.set()
+        await asyncio.gather(*tasks)
+        return light_wait, heavy_wait
+
+    light_wait, heavy_wait = asyncio.run(scenario())
+    # Four busy slots at half a request each, then four queued slot-requests of 10s
+    assert light_wait == pytest.approx(5.0)
+    assert heavy_wait == pytest.approx(15.0)
+
+
+def test_sheds_over_quota_and_past_deadline():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, per_client_limit=1, initial_service_seconds=10.0)
+        order, release = [], asyncio.Event()
+        first = asyncio.create_task(hold(controller, "a", order, release))
+        await settle()
+        with pytest.raises(AdmissionRejected) as quota:
+            await hold(controller, "a", order, release)
+        with pytest.raises(AdmissionRejected) as deadline:
+            await hold(controller, "b", order, release, deadline=1.0)
+        release.set()
+        await first
+        return quota.value, deadline.value, controller.stats()
+
+    quota, deadline, stats = asyncio.run(scenario())
+    assert (quota.status_code, quota.reason) == (429, "client_quota")
+    assert (deadline.status_code, deadline.reason) == (503, "deadline")
+    assert deadline.retry_after >= 1.0
+    assert stats["shed"] == {"client_quota": 1, "deadline": 1}
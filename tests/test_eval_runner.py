@@ -0,0 +1,66 @@
+import json
+from src.workflow.eval_runner import EvaluationRunner, iter_question_records, question_id
+
+
+class StubApp:
+    """Stand-in compiled graph: streams retrieve/generate updates, failing chosen questions"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.questions = []
+
+    def stream(self, inputs, config=None):
+        question = inputs["question"]
+        self.questions.append(question)
+        yield {"retrieve": {"question": question}}
+        if question in self.failing:
+            raise RuntimeError("LLM unavailable")
+        yield {"generate": {"question": question, "generation": f"answer to {question}"}}
+
+
+def read_results(path):
+    """Result records, skipping a line cut short by a crash"""
+    results = []
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return results
+
+
+def test_falsy_ids_are_kept(tmp_path):
+    path = tmp_path / "questions.jsonl"
+    path.write_text(
+        '{"id": 0, "question": "zero?"}\n'
+        '{"id": "", "question": "empty?"}\n'
+        '\n'
+        '{"question": "no id?"}\n'
+    )
+    records = list(iter_question_records(str(path)))
+    assert [record["id"] for record in records] == ["0", "", question_id("no id?")]
+
+
+def test_resume_skips_answered_and_retries_failed(tmp_path):
+    output = str(tmp_path / "out" / "results.jsonl")
+    records = [{"id": "0", "question": "first"}, {"id": "1", "question": "second"}]
+
+    summary = EvaluationRunner(StubApp(failing={"second"})).run(records, output)
+    assert (summary["completed"], summary["errors"]) == (1, 1)
+
+    # A crash cut the last record short
+    with open(output, "a") as f:
+        f.write('{"id": "1", "quest')
+    app = StubApp()
+    summary = EvaluationRunner(app).run(records, output)
+
+    assert app.questions == ["second"]
+    assert (summary["completed"], summary["skipped"]) == (1, 1)
+    # Results are written as they finish, not in input order
+    results = sorted(read_results(output), key=lambda r: (r["id"], r["attempt"]))
+    assert [(r["id"], r["attempt"], r["error"] is None) for r in results] == [
+        ("0", 1, True), ("1", 1, False), ("1", 2, True)
+    ]
+    assert results[-1]["path"] == ["retrieve", "generate"]
+    assert results[-1]["answer"] == "answer to second"
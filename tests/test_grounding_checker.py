@@ -0,0 +1,63 @@
+import re
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+from src.graders.grounding_checker import AMBIGUOUS, GROUNDED, UNGROUNDED, GroundingChecker
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """Deterministic stand-in: hashed word counts, so near-copies are very similar"""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.zeros(256)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[sum(map(ord, word)) % 256] += 1.0
+        return vector.tolist()
+
+
+DOCUMENTS = [
+    Document(page_content=(
+        "The premium plan costs 20 dollars per month and includes priority support for every team member."
+    )),
+    Document(page_content=(
+        "Prompt caching reduces the cost of repeated requests to the language model by reusing earlier work."
+    )),
+]
+
+
+@pytest.fixture
+def checker():
+    return GroundingChecker(embeddings=BagOfWordsEmbeddings())
+
+
+def test_copied_sentences_are_grounded(checker):
+    generation = "The premium plan costs 20 dollars per month and includes priority support for every team member."
+    assert checker.check(generation, DOCUMENTS)["decision"] == GROUNDED
+
+
+@pytest.mark.parametrize("generation", [
+    "The premium plan costs 30 dollars per month and includes priority support for every team member.",
+    "Prompt caching does not reduce the cost of repeated requests to the language model by reusing earlier work.",
+    "Prompt caching never reduces the cost of repeated requests to the language model by reusing earlier work.",
+])
+def test_number_swap_or_added_negation_goes_to_the_grader(checker, generation):
+    result = checker.check(generation, DOCUMENTS)
+    sentence = result["sentences"][0]
+    # Both signals are high, but the changed claim is not in the documents
+    assert sentence["overlap"] >= checker.overlap_high
+    assert sentence["similarity"] >= checker.similarity_high
+    assert result["decision"] == AMBIGUOUS
+
+
+def test_overlap_alone_is_not_enough():
+    generation = "The premium plan costs 20 dollars per month and includes priority support for every team member."
+    assert GroundingChecker(embeddings=None).check(generation, DOCUMENTS)["decision"] == AMBIGUOUS
+
+
+def test_unrelated_answer_is_ungrounded(checker):
+    generation = "Our office dog enjoys long walks in the park. Bananas grow in tropical climates."
+    assert checker.check(generation, DOCUMENTS)["decision"] == UNGROUNDED
@@ -0,0 +1,89 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+from langchain.docstore.document import Document
+from src.core.index_manager import (
+    IndexLease,
+    IndexManager,
+    leased_generations,
+    list_generations,
+    prune_generations,
+    publish_generation,
+)
+from src.core.index_store import IndexStoreWriter
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def build_generation(root, name, text):
+    index_dir = os.path.join(root, name)
+    writer = IndexStoreWriter(index_dir)
+    writer.add([Document(page_content=text, metadata={"source": "a.md"})], [[1.0, 0.0]])
+    writer.close({"collection_name": f"rag-{name}"})
+    return index_dir
+
+
+class FakeRetriever:
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+
+    def retrieve_and_rerank(self, question, entered=None, proceed=None):
+        if entered is not None:
+            entered.set()
+            proceed.wait(5)
+        return [os.path.basename(self.index_dir)]
+
+
+def test_reload_swaps_and_drains_in_flight_calls(tmp_path):
+    root = str(tmp_path)
+    publish_generation(root, build_generation(root, "gen-1", "one"))
+    manager = IndexManager(root, FakeRetriever)
+    assert manager.retrieve_and_rerank("q") == ["gen-1"]
+
+    entered, proceed, result = threading.Event(), threading.Event(), []
+    call = threading.Thread(target=lambda: result.append(manager.retrieve_and_rerank("q", entered, proceed)))
+    call.start()
+    entered.wait(5)
+    publish_generation(root, build_generation(root, "gen-2", "two"))
+    assert manager.reload(wait=True)["status"] == "swapped"
+
+    old = manager.status()["draining"]
+    assert manager.retrieve_and_rerank("q") == ["gen-2"]
+    proceed.set()
+    call.join()
+    assert result == [["gen-1"]]
+    assert old == [{"generation": "gen-1", "in_flight": 1}]
+    assert manager.status()["draining"] == []
+    assert leased_generations(root) == {"gen-2"}
+
+
+def test_prune_keeps_live_and_leased_generations(tmp_path):
+    root = str(tmp_path)
+    for i in range(1, 4):
+        build_generation(root, f"gen-{i}", str(i))
+    publish_generation(root, os.path.join(root, "gen-3"))
+    lease = IndexLease(root)
+    lease.update(["gen-1"])
+    dropped = []
+
+    removed = prune_generations(root, keep=1, drop_collection=dropped.append)
+
+    assert [os.path.basename(d) for d in removed] == ["gen-2"]
+    assert dropped == ["rag-gen-2"]
+    assert [os.path.basename(d) for d in list_generations(root)] == ["gen-1", "gen-3"]
+    lease.remove()
+
+
+def test_lease_of_exited_process_is_removed(tmp_path):
+    root = str(tmp_path)
+    script = (
+        "import sys; from src.core.index_manager import IndexLease; "
+        "IndexLease(sys.argv[1]).update(['gen-1'])"
+    )
+    subprocess.run([sys.executable, "-c", script, root], check=True, cwd=REPO_ROOT)
+    assert len(os.listdir(os.path.join(root, "leases"))) == 2
+
+    assert leased_generations(root) == set()
+    assert os.listdir(os.path.join(root, "leases")) == []
@@ -0,0 +1,74 @@
+import json
+import logging
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+from rank_bm25 import BM25Okapi
+from src.core.index_store import IndexStore, IndexStoreWriter
+from src.core.keyword_index import tokenize
+from src.utils.exceptions import IndexStoreError
+
+CORPUS = [
+    "the quick brown fox jumps over the lazy dog",
+    "a fast brown fox leaps over lazy dogs",
+    "retrieval augmented generation combines search and generation",
+    "the fox and the hound",
+    "vector search with memory mapped indexes",
+    "héllo wörld, non-ascii text survives",
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    writer = IndexStoreWriter(str(tmp_path / "index"))
+    documents = [
+        Document(page_content=text, metadata={"source": f"doc{i}.md", "page": i})
+        for i, text in enumerate(CORPUS)
+    ]
+    vectors = np.eye(len(CORPUS), dtype=np.float32)
+    # Two batches, as the pipeline writes them
+    writer.add(documents[:3], vectors[:3])
+    writer.add(documents[3:], vectors[3:])
+    writer.close({"collection_name": "rag-test"})
+    return IndexStore(str(tmp_path / "index"))
+
+
+def test_round_trips_texts_metadata_and_vectors(store):
+    assert len(store) == len(CORPUS)
+    assert store.manifest["collection_name"] == "rag-test"
+    for i, text in enumerate(CORPUS):
+        document = store.get_document(i)
+        assert document.page_content == text
+        assert document.metadata == {"source": f"doc{i}.md", "page": i}
+    np.testing.assert_array_equal(store.vectors, np.eye(len(CORPUS), dtype=np.float32))
+
+
+@pytest.mark.parametrize("query", ["brown fox", "the lazy dog", "search generation", "fox fox hound", "missing"])
+def test_bm25_scores_match_rank_bm25(store, query):
+    reference = BM25Okapi([tokenize(text) for text in CORPUS]).get_scores(tokenize(query))
+    doc_ids, scores = store.keyword_index.search(query, k=len(CORPUS))
+
+    # Documents sharing no term with the query are not returned; they score 0
+    dense = np.zeros(len(CORPUS))
+    dense[doc_ids] = scores
+    np.testing.assert_allclose(dense, reference, rtol=1e-5, atol=1e-6)
+    assert scores.tolist() == sorted(scores.tolist(), reverse=True)
+
+
+def test_bm25_mask_restricts_scored_documents(store):
+    mask = np.zeros(len(CORPUS), dtype=bool)
+    mask[[1, 3]] = True
+    doc_ids, _ = store.keyword_index.search("fox", k=len(CORPUS), mask=mask)
+    assert sorted(doc_ids.tolist()) == [1, 3]
+
+
+def test_older_format_counts_as_missing_and_warns_once(tmp_path, caplog):
+    (tmp_path / "manifest.json").write_text(json.dumps({"version": 1, "num_chunks": 0}))
+
+    with caplog.at_level(logging.WARNING, logger="src.core.index_store"):
+        assert not IndexStore.exists(str(tmp_path))
+        assert not IndexStore.exists(str(tmp_path))
+
+    assert len([r for r in caplog.records if "format version 1" in r.getMessage()]) == 1
+    with pytest.raises(IndexStoreError, match="rebuild"):
+        IndexStore(str(tmp_path))
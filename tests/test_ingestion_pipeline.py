@@ -0,0 +1,71 @@
+import os
+import time
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+from src.core.index_store import IndexStore
+from src.core.ingestion_pipeline import IngestionPipeline
+from src.utils.exceptions import DocumentProcessingError
+
+
+class WholeDocumentProcessor:
+    """Stand-in for DocumentProcessor: each document is one chunk"""
+
+    def iter_split_documents(self, documents, workers=1):
+        yield from documents
+
+
+class StubEmbeddingManager:
+    """Stand-in for EmbeddingManager: one-hot vectors by text length, no vector store"""
+
+    def __init__(self):
+        self.upserted = []
+
+    def load_vectorstore(self, collection_name):
+        return None
+
+    def embed_documents(self, texts, batch_size=64):
+        return [np.eye(8)[len(text) % 8].tolist() for text in texts]
+
+    def upsert(self, vectorstore, documents, vectors, ids):
+        self.upserted.extend(ids)
+
+
+def load(sources, fail_at=None, loaded=None):
+    for source in sources:
+        if source == fail_at:
+            # Let the sources before it reach the upsert stage first
+            time.sleep(1.0)
+            raise RuntimeError("crawl failed")
+        if loaded is not None:
+            loaded.append(source)
+        yield source, [Document(page_content=f"chunk of {source}", metadata={"source": source})]
+
+
+def test_resume_after_failure_skips_checkpointed_sources(tmp_path):
+    index_dir = str(tmp_path / "gen-1")
+    sources = [f"doc{i}.md" for i in range(25)]
+
+    failing = IngestionPipeline(
+        WholeDocumentProcessor(), StubEmbeddingManager(), index_dir,
+        checkpoint_sources=10, load_sources=lambda pending: load(pending, fail_at="doc23.md")
+    )
+    with pytest.raises(DocumentProcessingError):
+        failing.run(sources)
+    with open(failing.sources_log_path) as f:
+        assert f.read().split() == sources[:20]
+
+    loaded = []
+    resumed = IngestionPipeline(
+        WholeDocumentProcessor(), StubEmbeddingManager(), index_dir,
+        checkpoint_sources=10, load_sources=lambda pending: load(pending, loaded=loaded)
+    )
+    summary = resumed.run(sources)
+
+    assert loaded == sources[20:]
+    assert summary["chunks"] == 25
+    assert not os.path.exists(resumed.checkpoint_path)
+    assert not os.path.exists(resumed.sources_log_path)
+    store = IndexStore(index_dir)
+    assert [store.get_metadata(i)["source"] for i in range(len(store))] == sources
+    assert store.keyword_index.search("doc24.md", k=1)[0].tolist() == [24]
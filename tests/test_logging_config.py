@@ -0,0 +1,28 @@
+import logging
+import pytest
+import src.utils.logging_config as logging_config
+from src.utils.logging_config import setup_logging
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    logging_config._stop_listener()
+    for handler in root.handlers:
+        handler.close()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def test_repeated_setup_registers_one_exit_hook(tmp_path, monkeypatch, restore_logging):
+    registered = []
+    monkeypatch.setattr(logging_config.atexit, "register", registered.append)
+    monkeypatch.setattr(logging_config, "_atexit_registered", False, raising=False)
+
+    for _ in range(3):
+        setup_logging(use_queue=True, log_file=str(tmp_path / "rag.log"))
+
+    assert registered == [logging_config._stop_listener]
+
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+from src.core.chunk_store import ChunkStore, write_columns
+from src.core.metadata_filter import to_where, where_mask
+
+
+def test_equality_and_several_keys():
+    assert to_where({"source": "a.md"}) == {"source": {"$eq": "a.md"}}
+    assert to_where({"source": "a.md", "page": {"$gt": 1}}) == {
+        "$and": [{"source": {"$eq": "a.md"}}, {"page": {"$gt": 1}}]
+    }
+
+
+def test_naive_dates_are_utc_and_only_date_keys_are_coerced():
+    assert to_where({"ingested_at": {"$gte": "2024-06-01"}}) == {"ingested_at": {"$gte": 1717200000}}
+    assert to_where({"modified_at": {"$lt": "2024-06-01T00:00:00+02:00"}}) == {"modified_at": {"$lt": 1717192800}}
+    assert to_where({"title": {"$gte": "M"}}) == {"title": {"$gte": "M"}}
+
+
+@pytest.mark.parametrize("filters", [
+    {"source": {}},
+    {"$and": [{}]},
+    {"$or": [None]},
+    {"$and": []},
+    {"ingested_at": {"$gte": "soon"}},
+    {"source": {"$like": "a"}},
+    {"source": {"$in": "a.md"}},
+    ["source"],
+])
+def test_malformed_filters_raise_value_error(filters):
+    with pytest.raises(ValueError):
+        to_where(filters)
+
+
+def test_filter_mask_matches_rows(tmp_path):
+    rows = [
+        {"source": "a.md", "ingested_at": 1717200000},
+        {"source": "b.md", "ingested_at": 1717300000},
+        {"source": "a.md"},
+        {},
+    ]
+    write_columns(str(tmp_path), lambda: iter(rows), len(rows))
+    (tmp_path / "texts.bin").write_bytes(b"")
+    np.zeros(len(rows) + 1, dtype=np.int64).tofile(tmp_path / "text_offsets.bin")
+    store = ChunkStore.open(str(tmp_path))
+
+    def mask(filters):
+        return where_mask(store.columns, len(rows), to_where(filters)).tolist()
+
+    assert mask({"source": "a.md"}) == [True, False, True, False]
+    assert mask({"ingested_at": {"$gte": "2024-06-01T12:00:00"}}) == [False, True, False, False]
+    assert mask({"$or": [{"source": "b.md"}, {"ingested_at": {"$lt": 1717250000}}]}) == [True, True, False, False]
+    assert mask({"source": {"$nin": ["a.md"]}}) == [False, True, False, False]
+    assert mask({"title": "x"}) == [False] * 4
@@ -0,0 +1,55 @@
+import copy
+import pickle
+import threading
+import time
+from src.core.query_context import QueryContext, QueryContextStats
+
+
+class SlowEmbeddings:
+    """Stand-in embedder that counts calls and is slow enough for threads to race"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        time.sleep(0.05)
+        return [float(len(text))]
+
+
+def test_concurrent_callers_embed_once():
+    context = QueryContext("how to reduce llm cost")
+    embeddings = SlowEmbeddings()
+    threads = [threading.Thread(target=context.embedding, args=(embeddings,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert embeddings.calls == 1
+    assert context.summary() == {"embedding_calls": 1, "embeddings_saved": 3, "fusions_saved": 0}
+
+
+def test_context_survives_serialization():
+    context = QueryContext("chunk size")
+    context.embedding(SlowEmbeddings())
+    context.fused_candidates(("gen-1", None), lambda: [])
+
+    restored = pickle.loads(pickle.dumps(context))
+    embeddings = SlowEmbeddings()
+
+    assert restored.request_id == context.request_id
+    assert restored.embedding(embeddings) == [10.0] and embeddings.calls == 0
+    assert restored.fused_candidates(("gen-1", None), lambda: [None]) == []
+    assert copy.deepcopy(restored).summary() == restored.summary()
+
+
+def test_stats_fold_in_request_summaries():
+    stats = QueryContextStats()
+    context = QueryContext("chunk size")
+    stats.record("contexts")
+    context.embedding(SlowEmbeddings())
+    context.embedding(SlowEmbeddings())
+    stats.add(context.summary())
+
+    assert stats.snapshot() == {"contexts": 1, "embedding_calls": 1, "embeddings_saved": 1, "fusions_saved": 0}
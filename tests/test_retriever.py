@@ -0,0 +1,98 @@
+import re
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+
+pytest.importorskip("sentence_transformers")
+
+from src.core.index_store import IndexStoreWriter, IndexStore  # noqa: E402
+from src.core.query_context import QueryContext  # noqa: E402
+from src.core.retriever import HybridRetriever  # noqa: E402
+from src.core.vector_index import NumpyVectorStore  # noqa: E402
+
+CORPUS = [
+    "prompt caching reduces llm cost for repeated prefixes",
+    "smaller models reduce llm cost at some quality loss",
+    "batching requests improves gpu throughput",
+    "vector databases store embeddings for similarity search",
+    "bm25 ranks documents by term frequency and inverse document frequency",
+    "reranking with a cross encoder improves precision",
+    "chunk size trades recall against context length",
+    "metadata filters restrict retrieval to matching sources",
+]
+QUERIES = ["how to reduce llm cost", "what improves precision", "similarity search with embeddings", "chunk size"]
+
+
+class AsymmetricEmbeddings(Embeddings):
+    """Hashed word counts; documents and queries get different marker features, as in E5-style models"""
+
+    def __init__(self):
+        self.calls = {"documents": 0, "query": 0}
+
+    def _embed(self, text, marker):
+        vector = np.zeros(64)
+        vector[marker] = 2.0
+        for word in re.findall(r"\w+", text.lower()):
+            vector[2 + sum(map(ord, word)) % 62] += 1.0
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        self.calls["documents"] += 1
+        return [self._embed(text, 0) for text in texts]
+
+    def embed_query(self, text):
+        self.calls["query"] += 1
+        return self._embed(text, 1)
+
+
+class OverlapReranker:
+    """Stand-in cross-encoder: shared words between query and passage"""
+
+    def predict(self, pairs, batch_size=32, **kwargs):
+        return np.array([len(set(q.split()) & set(p.split())) for q, p in pairs], dtype=np.float32)
+
+
+@pytest.fixture(scope="module")
+def retriever(tmp_path_factory):
+    index_dir = str(tmp_path_factory.mktemp("index"))
+    embeddings = AsymmetricEmbeddings()
+    writer = IndexStoreWriter(index_dir)
+    documents = [Document(page_content=text, metadata={"source": f"doc{i}.md"}) for i, text in enumerate(CORPUS)]
+    writer.add(documents, embeddings.embed_documents(CORPUS))
+    writer.close()
+    store = IndexStore(index_dir)
+    store.build_dense_index()
+    vectorstore = NumpyVectorStore(store.dense_index, store, embeddings)
+    return HybridRetriever(vectorstore, index_store=store, reranker=OverlapReranker(), candidate_k=3)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_batched_fusion_matches_ensemble_retriever(retriever, query):
+    expected = [doc.page_content for doc in retriever.ensemble_retriever.invoke(query)]
+    fused = retriever._fused_candidates([query], top_k=10)[0]
+    assert [doc.page_content for doc, _ in fused] == expected
+
+
+def test_batched_queries_are_embedded_as_queries(retriever):
+    calls = retriever.vectorstore.embeddings.calls
+    calls.update(documents=0, query=0)
+    retriever.retrieve_and_rerank_batch(QUERIES, top_k=6, final_k=3)
+    assert calls == {"documents": 0, "query": len(QUERIES)}
+
+
+def test_batch_context_and_single_query_paths_agree(retriever):
+    batch = retriever.retrieve_and_rerank_batch(QUERIES, top_k=6, final_k=3)
+    for query, documents in zip(QUERIES, batch):
+        single = retriever.retrieve_and_rerank(query, top_k=6, final_k=3)
+        with_context = retriever.retrieve_and_rerank(query, top_k=6, final_k=3, context=QueryContext(query))
+        assert [d.page_content for d in documents] == [d.page_content for d in single]
+        assert [d.page_content for d in documents] == [d.page_content for d in with_context]
+
+
+def test_filters_apply_to_both_searches(retriever):
+    documents = retriever.retrieve_and_rerank_batch(
+        ["reduce llm cost"], top_k=6, final_k=6, filters={"source": {"$in": ["doc1.md", "doc2.md"]}}
+    )[0]
+    assert {doc.metadata["source"] for doc in documents} <= {"doc1.md", "doc2.md"}
+    assert documents[0].metadata["source"] == "doc1.md"
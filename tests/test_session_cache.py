@@ -0,0 +1,80 @@
+from langchain.docstore.document import Document
+from src.core.session_cache import SessionRetrievalCache
+
+
+def overlap_scorer(question, documents):
+    """Stand-in cross-encoder: shared words between question and chunk"""
+    words = set(question.lower().split())
+    return [len(words & set(doc.page_content.lower().split())) for doc in documents]
+
+
+DOCUMENTS = [
+    Document(page_content="prompt caching reduces llm cost"),
+    Document(page_content="smaller models reduce llm cost"),
+    Document(page_content="unrelated chunk about gardening"),
+]
+
+
+def make_cache(generation=None, **kwargs):
+    calls = []
+
+    def scorer(question, documents):
+        calls.append(question)
+        return overlap_scorer(question, documents)
+
+    options = {"min_score": 1, "min_documents": 2, **kwargs}
+    return SessionRetrievalCache(scorer, generation=generation, **options), calls
+
+
+def test_follow_up_reuses_relevant_documents_and_memoizes():
+    cache, calls = make_cache()
+    cache.store("chat", DOCUMENTS)
+
+    first = cache.lookup("chat", "how to reduce llm cost", final_k=2)
+    again = cache.lookup("chat", "how to reduce llm cost", final_k=2)
+
+    assert [doc.page_content for doc in first] == [
+        "smaller models reduce llm cost", "prompt caching reduces llm cost"
+    ]
+    assert again is first and calls == ["how to reduce llm cost"]
+    assert cache.lookup("chat", "weather tomorrow") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["below_threshold"] == 1
+
+
+def test_different_filters_miss_and_replace_the_session():
+    cache, _ = make_cache()
+    cache.store("chat", DOCUMENTS, filters={"source": "a.md"})
+
+    assert cache.lookup("chat", "reduce llm cost", filters={"source": "b.md"}) is None
+    assert cache.lookup("chat", "reduce llm cost", filters={"source": "a.md"}) is not None
+
+    cache.store("chat", DOCUMENTS[2:], filters={"source": "b.md"})
+    assert cache.lookup("chat", "reduce llm cost", filters={"source": "a.md"}) is None
+
+
+def test_documents_from_a_swapped_generation_are_not_reused():
+    generation = ["gen-1"]
+    cache, _ = make_cache(generation=lambda: generation[0], min_documents=1)
+    cache.store("chat", DOCUMENTS)
+    assert cache.lookup("chat", "prompt caching") is not None
+
+    generation[0] = "gen-2"
+    assert cache.lookup("chat", "prompt caching") is None
+
+    # Storing after the swap starts over instead of merging gen-1 documents
+    cache.store("chat", DOCUMENTS[1:2])
+    assert cache.lookup("chat", "prompt caching") is None
+    assert [doc.page_content for doc in cache.lookup("chat", "reduce llm cost")] == [
+        "smaller models reduce llm cost"
+    ]
+
+
+def test_store_keeps_newest_unique_documents():
+    cache, _ = make_cache(max_documents=2, min_documents=1)
+    cache.store("chat", DOCUMENTS[:1])
+    cache.store("chat", DOCUMENTS[1:2] + DOCUMENTS[:1])
+    cache.store("chat", DOCUMENTS[2:])
+
+    assert [doc.page_content for doc in cache.lookup("chat", "gardening smaller", final_k=5)] == [
+        "unrelated chunk about gardening", "smaller models reduce llm cost"
+    ]
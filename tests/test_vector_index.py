@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import src.core.vector_index as vector_index
+from src.core.vector_index import DenseIndex, normalize
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    rng = np.random.default_rng(7)
+    # Clustered data, so IVF lists are meaningful
+    centers = rng.normal(size=(16, 32))
+    return (centers[rng.integers(0, 16, 2000)] + 0.3 * rng.normal(size=(2000, 32))).astype(np.float32)
+
+
+def exact_top_k(vectors, queries, k, mask=None):
+    scores = normalize(queries) @ normalize(vectors).T
+    if mask is not None:
+        scores[:, ~mask] = -np.inf
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall(found, expected):
+    return np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found.tolist(), expected.tolist())])
+
+
+@pytest.mark.parametrize("index_type,dtype,min_recall", [
+    ("flat", "float16", 0.99),
+    ("flat", "int8", 0.9),
+    ("ivf", "float16", 0.9),
+    ("ivf", "int8", 0.9),
+])
+def test_recall_against_exact_search(tmp_path, monkeypatch, vectors, index_type, dtype, min_recall):
+    # Small blocks, so the blockwise build and search paths are exercised
+    monkeypatch.setattr(vector_index, "_SEARCH_BLOCK_ROWS", 300)
+    index = DenseIndex.build(str(tmp_path), vectors, dtype=dtype, index_type=index_type, nlist=16)
+    queries = vectors[:50] + 0.05
+
+    ids, scores = index.search(queries, k=10, nprobe=4)
+
+    assert ids.shape == (50, 10)
+    assert recall(ids, exact_top_k(vectors, queries, 10)) >= min_recall
+    assert np.all(np.diff(scores, axis=1) <= 1e-6)
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf"])
+def test_mask_limits_results_to_allowed_rows(tmp_path, vectors, index_type):
+    index = DenseIndex.build(str(tmp_path), vectors, index_type=index_type, nlist=16)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[::7] = True
+    queries = vectors[:20]
+
+    ids, _ = index.search(queries, k=5, nprobe=4, mask=mask)
+
+    assert mask[ids].all()
+    assert recall(ids, exact_top_k(vectors, queries, 5, mask)) >= 0.95
+
+
+def test_reopened_index_matches_built_index(tmp_path, vectors):
+    built = DenseIndex.build(str(tmp_path), vectors, dtype="int8", index_type="ivf", nlist=16)
+    reopened = DenseIndex(str(tmp_path))
+
+    np.testing.assert_array_equal(reopened.search(vectors[:5], k=3)[0], built.search(vectors[:5], k=3)[0])
+    assert len(reopened) == len(vectors)
@@ -0,0 +1,48 @@
+import threading
+from src.agents.web_search_agent import WebSearchAgent
+
+
+class StubSearchTool:
+    """Local stand-in for TavilySearchResults that records every query"""
+
+    def __init__(self, block: threading.Event = None):
+        self.queries = []
+        self.block = block
+
+    def invoke(self, inputs):
+        self.queries.append(inputs["query"])
+        if self.block is not None:
+            self.block.wait(5)
+        return [{"url": f"https://example.com/{len(self.queries)}", "content": f"result for {inputs['query']}"}]
+
+
+def test_results_become_documents_and_are_cached():
+    tool = StubSearchTool()
+    agent = WebSearchAgent(search_tool=tool)
+
+    first = agent.search("What is RAG?")
+    second = agent.search("what is rag")
+
+    assert [doc.page_content for doc in first] == ["result for What is RAG?"]
+    assert first[0].metadata["source"] == "https://example.com/1"
+    assert [doc.page_content for doc in second] == [doc.page_content for doc in first]
+    assert tool.queries == ["What is RAG?"]
+
+
+def test_keyword_variant_only_when_enabled():
+    tool = StubSearchTool()
+    WebSearchAgent(search_tool=tool, max_variants=2).search("What is retrieval augmented generation?")
+    assert sorted(tool.queries) == sorted(["What is retrieval augmented generation?", "retrieval augmented generation"])
+
+
+def test_timed_out_search_is_not_shared():
+    release = threading.Event()
+    tool = StubSearchTool(block=release)
+    agent = WebSearchAgent(search_tool=tool, timeout=0.05)
+
+    assert agent.search("slow question") == []
+    assert agent._in_flight == {}
+    # A fresh search is issued instead of attaching to the hung one
+    agent.search("slow question")
+    assert tool.queries == ["slow question", "slow question"]
+    release.set()